@@ -0,0 +1,7 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""The ASGI application, to be run by an ASGI server, e.g. `uvicorn asgi:application`."""
+
+from wgp_demo.asgi import create_and_initialize_asgi_app
+
+application = create_and_initialize_asgi_app()
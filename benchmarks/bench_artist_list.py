@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+"""Time taken by each stage of ArtistJsonRepository.list() at different dataset sizes.
+
+For every size a seeded synthetic dataset is written to a JSON file and compiled to a
+snapshot, then it measures:
+
+* loading the JSON file and the snapshot
+* for a set of queries, each stage of list(): planning, candidate selection, every
+  filter, rank normalisation, ordering and the creation of the domain models, plus
+  the JSON serialisation of the result
+
+Stages are timed by wrapping the repository methods of a single instance, every
+query is run --repeat times and the minimum and median times are reported, in
+seconds, as JSON so that runs on different commits can be compared.
+
+Usage: python benchmarks/bench_artist_list.py [SIZE ...] (default: 10000 100000 1000000 10000000)
+"""
+import argparse
+import collections
+import datetime
+import functools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+import numpy as np  # noqa: E402
+
+from benchmarks import synthetic  # noqa: E402
+from wgp_demo.repositories import artist_json_repository as ajr  # noqa: E402
+from wgp_demo.repositories import artist_snapshot as asn  # noqa: E402
+from wgp_demo.serializers import artist_serializer as asr  # noqa: E402
+
+LONDON = '51.5126064,-0.1802461'
+
+# (name, filters, weights)
+QUERIES = [
+    ('all', {}, {}),
+    ('gender', {'gender': 'F'}, {'age': '1'}),
+    ('age', {'age': '25,35'}, {'age': '1'}),
+    ('rate_max', {'rate_max': '15'}, {'rate': '1'}),
+    ('location_5mi', {'location': LONDON + ',5'}, {'distance': '1'}),
+    ('location_100mi', {'location': LONDON + ',100'}, {'distance': '1'}),
+    ('combined', {'gender': 'M', 'age': '30,50', 'rate_max': '30', 'location': LONDON + ',50'},
+     {'age': '1', 'distance': '2', 'rate': '1'}),
+]
+
+
+class StageTimer(object):
+    """Accumulates the time spent in the wrapped functions, by stage."""
+
+    def __init__(self):
+        self.timings = collections.OrderedDict()
+
+    def reset(self):
+        self.timings = collections.OrderedDict()
+
+    def wrap(self, stage, function):
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.timings[stage] = self.timings.get(stage, 0) + time.perf_counter() - start
+
+        return timed
+
+    def time(self, stage, function, *args, **kwargs):
+        return self.wrap(stage, function)(*args, **kwargs)
+
+
+def instrument(repo, timer):
+    repo._estimate_filters = timer.wrap('plan', repo._estimate_filters)
+    repo.planner.plan = timer.wrap('plan', repo.planner.plan)
+    repo._select_candidates = timer.wrap('select_candidates', repo._select_candidates)
+    for name, function in list(repo._filter_functions.items()):
+        repo._filter_functions[name] = timer.wrap('filter_' + name, function)
+    repo._filter_shards = timer.wrap('shards', repo._filter_shards)
+    repo._normalize_artist_ranks = timer.wrap('normalize_ranks', repo._normalize_artist_ranks)
+    repo._order_by_rank = timer.wrap('order', repo._order_by_rank)
+    repo._build_artists = timer.wrap('build_artists', repo._build_artists)
+
+
+def summarize(runs):
+    stages = collections.OrderedDict()
+    for timings in runs:
+        for stage in timings:
+            stages.setdefault(stage, [timings.get(stage, 0) for timings in runs])
+
+    return collections.OrderedDict(
+        (stage, {'min': min(values), 'median': float(np.median(values))}) for stage, values in stages.items()
+    )
+
+
+def get_data_files(data_dir, size, seed, timer):
+    json_file = os.path.join(data_dir, 'artists_{}_{}.json'.format(size, seed))
+    snapshot_file = os.path.join(data_dir, 'artists_{}_{}.snapshot'.format(size, seed))
+
+    if not os.path.exists(json_file):
+        timer.time('generate_json', synthetic.write_artists, json_file, size, seed)
+
+    if not os.path.exists(snapshot_file):
+        timer.time('compile_snapshot', asn.compile_snapshot, json_file, snapshot_file)
+
+    return json_file, snapshot_file
+
+
+def run(size, args, data_dir):
+    timer = StageTimer()
+    json_file, snapshot_file = get_data_files(data_dir, size, args.seed, timer)
+
+    repo = timer.time('load_json', ajr.ArtistJsonRepository, json_file)
+    del repo
+    repo = timer.time('load_snapshot', ajr.ArtistJsonRepository, snapshot_file, shards=args.shards, shard_min_rows=0)
+    load = timer.timings
+
+    instrument(repo, timer)
+    limit = args.limit or None
+
+    queries = collections.OrderedDict()
+    for name, filters, weights in QUERIES:
+        runs = []
+        for _ in range(args.repeat):
+            timer.reset()
+            artists = timer.time('list', repo.list, filters=dict(filters), weights=dict(weights), limit=limit)
+            timer.time('serialize', json.dumps, list(artists), cls=asr.ArtistEncoder)
+            runs.append(timer.timings)
+
+        queries[name] = {
+            'filters': filters,
+            'weights': weights,
+            'total': artists.total,
+            'returned': len(artists),
+            'stages': summarize(runs)
+        }
+
+    repo.close()
+    return {'size': size, 'load': load, 'queries': queries}
+
+
+def get_metadata(args):
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.STDOUT
+        ).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'commit': commit,
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'limit': args.limit or None,
+        'shards': args.shards
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('sizes', metavar='SIZE', type=int, nargs='*', default=[10000, 100000, 1000000, 10000000])
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic datasets')
+    parser.add_argument('--repeat', type=int, default=3, help='runs of every query')
+    parser.add_argument('--limit', type=int, default=50, help='page size of the queries, 0 for no limit')
+    parser.add_argument('--shards', type=int, default=1, help='processes running the queries on shards of the dataset')
+    parser.add_argument('--data-dir', help='directory where the datasets are kept between runs (default: temporary)')
+    parser.add_argument('--output', '-o', help='file the JSON results are written to (default: standard output)')
+    args = parser.parse_args()
+
+    data_dir = args.data_dir or tempfile.mkdtemp()
+    try:
+        results = {'metadata': get_metadata(args), 'results': [run(size, args, data_dir) for size in args.sizes]}
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(data_dir)
+
+    output = json.dumps(results, indent=4)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""Memory taken by the artists at different dataset sizes.
+
+For every size it measures, with tracemalloc:
+
+* the parsed JSON document, which the repository used to keep
+* the columnar ArtistDataset, indexes included, which the repository keeps now
+* one domain Artist per row, with the __slots__ model and with a __dict__ based one
+* the result of an unfiltered query, for a page of 50 artists and for all of them
+
+Usage: python benchmarks/bench_artist_memory.py [SIZE ...] (default: 100000 1000000)
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from benchmarks import synthetic  # noqa: E402
+from wgp_demo.domain import models as domod  # noqa: E402
+from wgp_demo.repositories import artist_dataset as ads  # noqa: E402
+from wgp_demo.repositories import artist_json_repository as ajr  # noqa: E402
+
+
+class DictArtist(object):
+    """The Artist model without __slots__."""
+
+    def __init__(self, uuid, gender, age, latitude, longitude, rate):
+        self.uuid = uuid
+        self.gender = gender
+        self.age = age
+        self.latitude = float(latitude)
+        self.longitude = float(longitude)
+        self.rate = rate
+        self.distance = None
+        self.distance_rank = 0
+        self.age_rank = 0
+        self.rate_rank = 0
+        self.global_rank = None
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    del result
+    gc.collect()
+    return size
+
+
+def build_artists(cls, artists):
+    return [
+        cls(artist['uuid'], artist['gender'], artist['age'], artist['latitude'], artist['longitude'], artist['rate'])
+        for artist in artists
+    ]
+
+
+def run(size, tempdir):
+    document = json.dumps({'artists': synthetic.generate_artists(size)})
+    artists = json.loads(document)['artists']
+
+    filepath = os.path.join(tempdir, 'artists_{}.json'.format(size))
+    with open(filepath, 'w') as f:
+        f.write(document)
+    repo = ajr.ArtistJsonRepository(filepath)
+
+    results = {
+        'parsed_json': measure(lambda: json.loads(document)),
+        'columnar_dataset': measure(lambda: ads.ArtistDataset.from_dict({'artists': artists})),
+        'slots_artists': measure(lambda: build_artists(domod.Artist, artists)),
+        'dict_artists': measure(lambda: build_artists(DictArtist, artists)),
+        'query_page_of_50': measure(lambda: repo.list(limit=50)),
+        'query_all': measure(lambda: repo.list()),
+    }
+
+    return {
+        'size': size,
+        'bytes': results,
+        'bytes_per_artist': dict((name, round(float(value) / size, 1)) for name, value in results.items())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('sizes', metavar='SIZE', type=int, nargs='*', default=[100000, 1000000])
+    args = parser.parse_args()
+
+    tempdir = tempfile.mkdtemp()
+    try:
+        results = [run(size, tempdir) for size in args.sizes]
+    finally:
+        shutil.rmtree(tempdir)
+
+    print(json.dumps(results, indent=4, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""Time taken to serialise pages of artists with ArtistEncoder and with ArtistSerializer.
+
+For every page size the artists of a location query ranked by distance, so that
+every field has a value, are encoded:
+
+* by json.dumps() with ArtistEncoder, as the endpoint did before ArtistSerializer
+* by ArtistSerializer with all the fields, checking that the output is the same
+* by ArtistSerializer with the fields of the mobile clients (uuid, distance, global_rank)
+
+Every encoding is run --repeat times and the minimum and median times are
+reported, in seconds, along with the size of the output in bytes.
+
+Usage: python benchmarks/bench_artist_serializer.py [PAGE_SIZE ...] (default: 50 1000 10000)
+"""
+import argparse
+import collections
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+import numpy as np  # noqa: E402
+
+from benchmarks import synthetic  # noqa: E402
+from wgp_demo.repositories import artist_json_repository as ajr  # noqa: E402
+from wgp_demo.serializers import artist_serializer as asr  # noqa: E402
+
+LONDON_100MI = '51.5126064,-0.1802461,100'
+
+MOBILE_FIELDS = ['uuid', 'distance', 'global_rank']
+
+
+def measure(encode, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = encode()
+        durations.append(time.perf_counter() - start)
+
+    return output, {'min': min(durations), 'median': float(np.median(durations)), 'bytes': len(output)}
+
+
+def run(page_size, repo, args):
+    artists = repo.list(filters={'location': LONDON_100MI}, weights={'distance': '1', 'age': '1'}, limit=page_size)
+
+    encoders = collections.OrderedDict([
+        ('artist_encoder', lambda: json.dumps(artists, cls=asr.ArtistEncoder)),
+        ('artist_serializer', lambda: asr.ArtistSerializer().encode(artists)),
+        ('artist_serializer_mobile_fields', lambda: asr.ArtistSerializer(MOBILE_FIELDS).encode(artists)),
+    ])
+
+    outputs = {}
+    timings = collections.OrderedDict()
+    for name, encode in encoders.items():
+        outputs[name], timings[name] = measure(encode, args.repeat)
+
+    if outputs['artist_serializer'] != outputs['artist_encoder']:
+        raise AssertionError('ArtistSerializer output differs from ArtistEncoder for {} artists'.format(page_size))
+
+    return {
+        'page_size': page_size,
+        'artists': len(artists),
+        'encoders': timings,
+        'speedup': dict(
+            (name, timings['artist_encoder']['min'] / timing['min']) for name, timing in timings.items()
+        )
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('page_sizes', metavar='PAGE_SIZE', type=int, nargs='*', default=[50, 1000, 10000])
+    parser.add_argument('--size', type=int, default=100000, help='artists of the synthetic dataset')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic dataset')
+    parser.add_argument('--repeat', type=int, default=20, help='runs of every encoding')
+    args = parser.parse_args()
+
+    tempdir = tempfile.mkdtemp()
+    try:
+        filepath = os.path.join(tempdir, 'artists.json')
+        synthetic.write_artists(filepath, args.size, args.seed)
+        repo = ajr.ArtistJsonRepository(filepath)
+        results = [run(page_size, repo, args) for page_size in args.page_sizes]
+    finally:
+        shutil.rmtree(tempdir)
+
+    print(json.dumps({'size': args.size, 'seed': args.seed, 'results': results}, indent=4))
+
+
+if __name__ == '__main__':
+    main()
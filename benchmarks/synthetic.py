@@ -0,0 +1,91 @@
+"""Seeded synthetic artists with the schema of artists.json.
+
+Artists live around a few cities, with a normal spread that depends on the size of
+the city, plus a share scattered over the whole country, so that location queries
+see dense and sparse areas as in real data. The same seed and size always give the
+same artists.
+"""
+import json
+import uuid
+
+import numpy as np
+
+# (name, latitude, longitude, share of the clustered artists, spread in degrees)
+CITIES = [
+    ('London', 51.5074, -0.1278, 0.40, 0.20),
+    ('Birmingham', 52.4862, -1.8904, 0.10, 0.12),
+    ('Manchester', 53.4808, -2.2426, 0.10, 0.12),
+    ('Leeds', 53.8008, -1.5491, 0.07, 0.10),
+    ('Glasgow', 55.8642, -4.2518, 0.07, 0.10),
+    ('Bristol', 51.4545, -2.5879, 0.06, 0.08),
+    ('Edinburgh', 55.9533, -3.1883, 0.06, 0.08),
+    ('Liverpool', 53.4084, -2.9916, 0.06, 0.08),
+    ('Cardiff', 51.4816, -3.1791, 0.04, 0.06),
+    ('Belfast', 54.5973, -5.9301, 0.04, 0.06),
+]
+
+# Share of the artists scattered uniformly over COUNTRY_BOX
+SCATTERED_SHARE = 0.1
+COUNTRY_BOX = ((50.0, 58.5), (-6.5, 1.8))
+
+GENDERS = ['F', 'M']
+AGE_RANGE = (16, 75)
+RATE_RANGE = (10.0, 40.0)
+
+# Artists generated with a single call of the random generator
+CHUNK_SIZE = 100000
+
+
+def _generate_chunk(random_state, size):
+    shares = np.array([city[3] for city in CITIES])
+    city = random_state.choice(len(CITIES), size=size, p=shares / shares.sum())
+    centers = np.array([city[1:3] for city in CITIES])[city]
+    spreads = np.array([city[4] for city in CITIES])[city]
+
+    latitudes = centers[:, 0] + random_state.normal(size=size) * spreads
+    # A degree of longitude is shorter than a degree of latitude at these latitudes
+    longitudes = centers[:, 1] + random_state.normal(size=size) * spreads / np.cos(np.radians(centers[:, 0]))
+
+    scattered = random_state.random_sample(size) < SCATTERED_SHARE
+    latitudes[scattered] = random_state.uniform(COUNTRY_BOX[0][0], COUNTRY_BOX[0][1], scattered.sum())
+    longitudes[scattered] = random_state.uniform(COUNTRY_BOX[1][0], COUNTRY_BOX[1][1], scattered.sum())
+
+    genders = random_state.randint(len(GENDERS), size=size)
+    ages = random_state.randint(AGE_RANGE[0], AGE_RANGE[1], size=size)
+    rates = np.round(random_state.uniform(RATE_RANGE[0], RATE_RANGE[1], size=size), 2)
+    uuid_bytes = random_state.bytes(16 * size)
+
+    for index in range(size):
+        yield {
+            'uuid': str(uuid.UUID(bytes=uuid_bytes[16 * index:16 * (index + 1)], version=4)),
+            'gender': GENDERS[genders[index]],
+            'age': int(ages[index]),
+            'latitude': '{:.8f}'.format(latitudes[index]),
+            'longitude': '{:.8f}'.format(longitudes[index]),
+            'rate': float(rates[index])
+        }
+
+
+def iter_artists(size, seed=0):
+    """Yields `size` random artists, generating them a chunk at a time."""
+    random_state = np.random.RandomState(seed)
+
+    for start in range(0, size, CHUNK_SIZE):
+        for artist in _generate_chunk(random_state, min(CHUNK_SIZE, size - start)):
+            yield artist
+
+
+def generate_artists(size, seed=0):
+    """Returns a list of `size` random artists."""
+    return list(iter_artists(size, seed))
+
+
+def write_artists(filepath, size, seed=0):
+    """Writes `size` random artists to a JSON file like artists.json, without keeping them in memory."""
+    with open(filepath, 'w') as f:
+        f.write('{"artists": [')
+        for index, artist in enumerate(iter_artists(size, seed)):
+            if index:
+                f.write(', ')
+            f.write(json.dumps(artist))
+        f.write(']}')
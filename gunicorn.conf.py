@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""gunicorn settings, read by `gunicorn wsgi:application` from the current directory.
+
+The master process loads the artists into shared memory before it forks the
+workers, which attach to them instead of each loading its own copy (see
+wgp_demo/prefork.py). SIGHUP loads them again for the new workers.
+"""
+import multiprocessing
+import os
+
+from wgp_demo import prefork
+
+bind = os.environ.get('WGP_DEMO_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+
+# Queries only read the dataset, the threads of a worker run them at once
+worker_class = 'gthread'
+threads = int(os.environ.get('WGP_DEMO_THREADS', 4))
+
+# The application is created by each worker, attached to the shared dataset
+preload_app = False
+
+
+def on_starting(server):
+    prefork.share_dataset()
+
+
+def on_reload(server):
+    prefork.share_dataset()
+
+
+def on_exit(server):
+    prefork.release_dataset()
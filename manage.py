@@ -1,17 +1,67 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from flask_script import Manager, Server
+from flask_script import Command, Manager, Option, Server
 from flask_script.commands import Clean, ShowUrls
 
 from wgp_demo.app import create_and_initialize_app
+from wgp_demo.repositories import artist_json_repository as ajr
+from wgp_demo.repositories import artist_snapshot as asn
+from wgp_demo.repositories import artist_sqlite_repository as asq
+from wgp_demo.repositories import json_stream as jst
 
 app = create_and_initialize_app()
 manager = Manager(app)
 
+
+class CompileSnapshot(Command):
+    """Compiles the artists JSON file into a binary snapshot that can be memory-mapped."""
+
+    option_list = (
+        Option('--input', '-i', dest='input', default=None, help='JSON file, defaults to JSON_DATA_FILE'),
+        Option('--output', '-o', dest='output', required=True, help='Snapshot file'),
+    )
+
+    def run(self, input, output):
+        count = asn.compile_snapshot(input or app.config['JSON_DATA_FILE'], output)
+        print('Compiled {} artists into {}'.format(count, output))
+
+
+class ImportSqlite(Command):
+    """Imports the artists JSON file into a SQLite database, replacing its artists."""
+
+    option_list = (
+        Option('--input', '-i', dest='input', default=None, help='JSON file, defaults to JSON_DATA_FILE'),
+        Option('--output', '-o', dest='output', default=None, help='Database file, defaults to SQLITE_DATA_FILE'),
+    )
+
+    def run(self, input, output):
+        output = output or app.config['SQLITE_DATA_FILE']
+        if not output:
+            raise ValueError('No output database given and SQLITE_DATA_FILE is not set')
+
+        with open(input or app.config['JSON_DATA_FILE']) as f:
+            count = asq.import_artists(output, jst.iter_items(f, 'artists'))
+        print('Imported {} artists into {}'.format(count, output))
+
+
+class CompactChanges(Command):
+    """Writes the changes of the change log into the JSON data file, or its snapshot, and empties the log."""
+
+    def run(self):
+        if not isinstance(app.artist_repo, ajr.ArtistJsonRepository):
+            raise ValueError('Only the JSON data file has a change log')
+
+        count = app.artist_repo.compact()
+        print('Compacted {} changes into {}'.format(count, app.artist_repo.filepath))
+
+
 manager.add_command('server', Server())
 manager.add_command('urls', ShowUrls())
 manager.add_command('clean', Clean())
+manager.add_command('compile_snapshot', CompileSnapshot())
+manager.add_command('import_sqlite', ImportSqlite())
+manager.add_command('compact_changes', CompactChanges())
 
 if __name__ == '__main__':
     manager.run()
@@ -10,12 +10,14 @@ setup(
     author_email='',
     license='',
     packages=find_packages(),
+    python_requires='>=3.8',
     description="A demo search server for WGP",
     long_description="",
     classifiers=(
     ),
     install_requires=[
         'flask',
+        'numpy',
         'six',
     ],
 )
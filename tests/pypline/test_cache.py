@@ -0,0 +1,99 @@
+from wgp_demo.shared import cache
+
+
+class FakeTimer(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_get_and_set():
+    lru_cache = cache.LRUCache(maxsize=2)
+
+    lru_cache.set('a', 1)
+
+    assert lru_cache.get('a') == 1
+    assert lru_cache.get('b') is None
+    assert lru_cache.get('b', 2) == 2
+    assert lru_cache.hits == 1
+    assert lru_cache.misses == 2
+
+
+def test_cache_evicts_least_recently_used_entries():
+    lru_cache = cache.LRUCache(maxsize=2)
+
+    lru_cache.set('a', 1)
+    lru_cache.set('b', 2)
+    lru_cache.get('a')
+    lru_cache.set('c', 3)
+
+    assert len(lru_cache) == 2
+    assert lru_cache.get('b') is None
+    assert lru_cache.get('a') == 1
+    assert lru_cache.get('c') == 3
+    assert lru_cache.evictions == 1
+
+
+def test_cache_entries_expire():
+    timer = FakeTimer()
+    lru_cache = cache.LRUCache(maxsize=2, ttl=10, timer=timer)
+
+    lru_cache.set('a', 1)
+    timer.now = 9
+    assert lru_cache.get('a') == 1
+
+    timer.now = 10
+    assert lru_cache.get('a') is None
+    assert lru_cache.expirations == 1
+    assert len(lru_cache) == 0
+
+
+def test_cache_is_cleared_when_version_changes():
+    lru_cache = cache.LRUCache(maxsize=2)
+    lru_cache.set_version('v1')
+    lru_cache.set('a', 1)
+
+    lru_cache.set_version('v1')
+    assert lru_cache.get('a') == 1
+
+    lru_cache.set_version('v2')
+    assert lru_cache.get('a') is None
+    assert lru_cache.invalidations == 1
+
+
+def test_cache_stores_only_values_of_its_version():
+    lru_cache = cache.LRUCache(maxsize=2)
+    lru_cache.set_version('v2')
+
+    lru_cache.set('a', 1, version='v1')
+    lru_cache.set('b', 2, version='v2')
+
+    assert lru_cache.get('a') is None
+    assert lru_cache.get('b') == 2
+
+
+def test_cache_with_zero_size_stores_nothing():
+    lru_cache = cache.LRUCache(maxsize=0)
+
+    lru_cache.set('a', 1)
+
+    assert lru_cache.get('a') is None
+
+
+def test_cache_stats():
+    lru_cache = cache.LRUCache(maxsize=2, ttl=5)
+    lru_cache.set('a', 1)
+    lru_cache.get('a')
+
+    assert lru_cache.stats() == {
+        'size': 1,
+        'maxsize': 2,
+        'ttl': 5,
+        'hits': 1,
+        'misses': 0,
+        'evictions': 0,
+        'expirations': 0,
+        'invalidations': 0
+    }
@@ -1,7 +1,10 @@
+import gzip
 import pytest
 import json
 from flask import Response
 
+from wgp_demo.domain import models as domod
+from wgp_demo.shared import cache
 from wgp_demo.shared import response_object as res
 from wgp_demo.shared import http_response as hres
 
@@ -22,6 +25,18 @@ def test_build_http_response_from_successful_response_object(successful_response
     assert http_json_response.mimetype == expected_flask_response.mimetype
 
 
+def test_build_http_response_with_total_count():
+    http_json_response = hres.HttpResponse(res.ResponseSuccess([])).json()
+
+    assert hres.HttpResponse.TOTAL_COUNT_HEADER not in http_json_response.headers
+
+    response_object = res.ResponseSuccess(domod.ArtistList([], total=42))
+    http_json_response = hres.HttpResponse(response_object).json()
+
+    assert http_json_response.headers[hres.HttpResponse.TOTAL_COUNT_HEADER] == '42'
+    assert http_json_response.data == b'[]'
+
+
 def test_build_http_response_from_resource_error_response_object():
     error_object = res.ResponseFailure.build_resource_error('')
     http_json_response = hres.HttpResponse(error_object).json()
@@ -53,3 +68,195 @@ def test_build_http_response_from_system_error_response_object():
     assert http_json_response.status_code == expected_flask_response.status_code
     assert http_json_response.data == expected_flask_response.data
     assert http_json_response.mimetype == expected_flask_response.mimetype
+
+
+def test_build_http_response_from_conflict_error_response_object():
+    error_object = res.ResponseFailure.build_conflict_error('')
+    http_json_response = hres.HttpResponse(error_object).json()
+
+    assert http_json_response.status_code == 409
+    assert json.loads(http_json_response.data.decode('utf-8')) == error_object.value
+
+
+def test_build_http_response_with_status():
+    http_json_response = hres.HttpResponse(res.ResponseSuccess({'a': 1})).json(status=201)
+
+    assert http_json_response.status_code == 201
+    assert json.loads(http_json_response.data.decode('utf-8')) == {'a': 1}
+
+
+def test_build_streamed_http_response_from_successful_response_object():
+    value = [{'a': 1, 'b': [1.5, None]}, 'text', 3] * 150
+    http_json_response = hres.HttpResponse(res.ResponseSuccess(value)).json(stream_min_items=10)
+
+    assert http_json_response.is_streamed
+    assert http_json_response.status_code == 200
+    assert http_json_response.mimetype == 'application/json'
+    assert http_json_response.get_data() == json.dumps(value).encode('utf-8')
+
+
+def test_build_streamed_http_response_with_encoder():
+    class Point(object):
+        def __init__(self, x, y):
+            self.x = x
+            self.y = y
+
+    class PointEncoder(json.JSONEncoder):
+        def default(self, o):
+            return {'x': o.x, 'y': o.y}
+
+    value = [Point(i, i / 3.0) for i in range(250)]
+    http_json_response = hres.HttpResponse(res.ResponseSuccess(value)).json(PointEncoder, stream_min_items=1)
+
+    assert http_json_response.is_streamed
+    assert http_json_response.get_data() == json.dumps(value, cls=PointEncoder).encode('utf-8')
+
+
+def test_build_streamed_http_response_from_empty_list():
+    http_json_response = hres.HttpResponse(res.ResponseSuccess([])).json(stream_min_items=0)
+
+    assert http_json_response.get_data() == b'[]'
+
+
+def test_build_http_response_below_streaming_threshold_is_not_streamed():
+    http_json_response = hres.HttpResponse(res.ResponseSuccess([1, 2])).json(stream_min_items=3)
+
+    assert not http_json_response.is_streamed
+    assert http_json_response.get_data() == b'[1, 2]'
+
+
+def test_build_http_response_with_items_encoder():
+    def items_encoder(items):
+        return ['"{}"'.format(item) for item in items]
+
+    value = list(range(250))
+    http_json_response = hres.HttpResponse(res.ResponseSuccess(value)).json(items_encoder=items_encoder)
+    streamed_http_json_response = hres.HttpResponse(res.ResponseSuccess(value)).json(
+        stream_min_items=1, items_encoder=items_encoder)
+
+    assert http_json_response.get_data() == json.dumps([str(item) for item in value]).encode('utf-8')
+    assert streamed_http_json_response.is_streamed
+    assert streamed_http_json_response.get_data() == http_json_response.get_data()
+    assert hres.HttpResponse(res.ResponseSuccess([])).json(
+        stream_min_items=0, items_encoder=items_encoder).get_data() == b'[]'
+
+
+def test_make_etag_depends_on_the_parts():
+    etag = hres.make_etag('v1', (('gender', 'F'),), None)
+
+    assert etag == hres.make_etag('v1', (('gender', 'F'),), None)
+    assert etag != hres.make_etag('v2', (('gender', 'F'),), None)
+    assert etag != hres.make_etag('v1', (('gender', 'F'),), ['uuid'])
+
+
+def test_is_not_modified_with_if_none_match():
+    assert hres.is_not_modified('abc', None, if_none_match='W/"abc"') is True
+    assert hres.is_not_modified('abc', None, if_none_match='"xyz", "abc"') is True
+    assert hres.is_not_modified('abc', None, if_none_match='*') is True
+    assert hres.is_not_modified('abc', None, if_none_match='W/"xyz"') is False
+    assert hres.is_not_modified(None, None, if_none_match='W/"xyz"') is False
+    # If-None-Match wins over If-Modified-Since
+    assert hres.is_not_modified('abc', 1000, if_none_match='W/"xyz"',
+                                if_modified_since='Wed, 21 Oct 2015 07:28:00 GMT') is False
+
+
+def test_is_not_modified_with_if_modified_since():
+    since = 'Wed, 21 Oct 2015 07:28:00 GMT'
+
+    assert hres.is_not_modified('abc', 1445412480.7, if_modified_since=since) is True
+    assert hres.is_not_modified('abc', 1445412479, if_modified_since=since) is True
+    assert hres.is_not_modified('abc', 1445412481, if_modified_since=since) is False
+    assert hres.is_not_modified('abc', None, if_modified_since=since) is False
+    assert hres.is_not_modified('abc', 1000, if_modified_since='yesterday') is False
+    assert hres.is_not_modified('abc', 1000) is False
+
+
+def test_build_not_modified_response():
+    response = hres.not_modified('abc', 1445412480.7)
+
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.headers['ETag'] == 'W/"abc"'
+    assert response.headers['Last-Modified'] == 'Wed, 21 Oct 2015 07:28:00 GMT'
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+
+def test_build_http_response_with_validators():
+    http_json_response = hres.HttpResponse(res.ResponseSuccess([1])).json(etag='abc', last_modified=1445412480)
+    error_json_response = hres.HttpResponse(res.ResponseFailure.build_system_error('')).json(etag='abc')
+
+    assert http_json_response.headers['ETag'] == 'W/"abc"'
+    assert http_json_response.headers['Last-Modified'] == 'Wed, 21 Oct 2015 07:28:00 GMT'
+    assert 'ETag' not in error_json_response.headers
+    assert 'ETag' not in hres.HttpResponse(res.ResponseSuccess([1])).json().headers
+
+
+def test_accepts_gzip():
+    assert hres.accepts_gzip('gzip') is True
+    assert hres.accepts_gzip('deflate, gzip;q=0.5') is True
+    assert hres.accepts_gzip('*') is True
+    assert hres.accepts_gzip('gzip;q=0') is False
+    assert hres.accepts_gzip('br, *;q=0') is False
+    assert hres.accepts_gzip('identity') is False
+    assert hres.accepts_gzip(None) is False
+
+
+def test_compress_http_response():
+    value = list(range(1000))
+    http_json_response = hres.compress(hres.HttpResponse(res.ResponseSuccess(value)).json(), 'gzip', min_size=100)
+
+    assert http_json_response.headers['Content-Encoding'] == 'gzip'
+    assert http_json_response.headers['Vary'] == 'Accept-Encoding'
+    assert http_json_response.headers['Content-Length'] == str(len(http_json_response.get_data()))
+    assert json.loads(gzip.decompress(http_json_response.get_data()).decode('utf-8')) == value
+
+
+def test_compress_http_response_not_accepted_or_too_small():
+    value = list(range(1000))
+    not_accepted_response = hres.compress(hres.HttpResponse(res.ResponseSuccess(value)).json(), None)
+    small_response = hres.compress(hres.HttpResponse(res.ResponseSuccess(value)).json(), 'gzip', min_size=10000)
+    error_response = hres.compress(
+        hres.HttpResponse(res.ResponseFailure.build_system_error('x' * 1000)).json(), 'gzip')
+
+    assert 'Content-Encoding' not in not_accepted_response.headers
+    assert not_accepted_response.headers['Vary'] == 'Accept-Encoding'
+    assert json.loads(not_accepted_response.get_data().decode('utf-8')) == value
+    assert 'Content-Encoding' not in small_response.headers
+    assert 'Vary' not in small_response.headers
+    assert 'Content-Encoding' not in error_response.headers
+
+
+def test_compress_streamed_http_response():
+    value = list(range(1000))
+    gzip_cache = cache.LRUCache(maxsize=2)
+    http_json_response = hres.compress(
+        hres.HttpResponse(res.ResponseSuccess(value)).json(stream_min_items=1), 'gzip', min_size=10 ** 6,
+        cache=gzip_cache, cache_key='abc'
+    )
+
+    assert http_json_response.is_streamed
+    assert http_json_response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in http_json_response.headers
+    assert gzip_cache.get('abc') is None
+
+    body = http_json_response.get_data()
+
+    assert json.loads(gzip.decompress(body).decode('utf-8')) == value
+    assert gzip_cache.get('abc')[0] == body
+
+
+def test_cached_gzip_response():
+    gzip_cache = cache.LRUCache(maxsize=2)
+    response_object = res.ResponseSuccess(domod.ArtistList(list(range(1000)), total=1000))
+    http_json_response = hres.compress(
+        hres.HttpResponse(response_object).json(etag='abc'), 'gzip', cache=gzip_cache, cache_key='abc'
+    )
+    cached_response = hres.cached_gzip_response(gzip_cache, 'abc')
+
+    assert cached_response.status_code == 200
+    assert cached_response.get_data() == http_json_response.get_data()
+    for name in ['Content-Encoding', 'Content-Length', 'Content-Type', 'ETag', 'Vary',
+                 hres.HttpResponse.TOTAL_COUNT_HEADER]:
+        assert cached_response.headers[name] == http_json_response.headers[name]
+    assert hres.cached_gzip_response(gzip_cache, 'xyz') is None
+    assert hres.cached_gzip_response(gzip_cache, None) is None
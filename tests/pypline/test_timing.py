@@ -0,0 +1,70 @@
+from wgp_demo.shared import timing
+
+
+def test_stages_are_not_recorded_by_default():
+    timing.stop()
+
+    with timing.stage('load'):
+        pass
+
+    assert timing.current() is timing.NULL_TIMINGS
+    assert timing.current().durations == {}
+    assert timing.current().server_timing() == ''
+
+
+def test_stages_are_recorded_between_start_and_stop():
+    timings = timing.start()
+
+    with timing.stage('load'):
+        pass
+    with timing.stage('filter'):
+        pass
+    with timing.stage('load'):
+        pass
+
+    assert timing.stop() is timings
+    assert list(timings.durations) == ['load', 'filter']
+    assert all(duration >= 0 for duration in timings.durations.values())
+
+    with timing.stage('serialize'):
+        pass
+
+    assert 'serialize' not in timings.durations
+
+
+def test_stage_is_recorded_when_an_exception_is_raised():
+    timings = timing.start()
+
+    try:
+        with timing.stage('load'):
+            raise ValueError()
+    except ValueError:
+        pass
+    finally:
+        timing.stop()
+
+    assert 'load' in timings.durations
+
+
+def test_server_timing_header_value():
+    timings = timing.Timings()
+    timings.add('load', 0.0125)
+    timings.add('filter_age', 0.001)
+    timings.add('load', 0.0005)
+
+    assert timings.server_timing() == 'load;dur=13.000, filter_age;dur=1.000'
+
+
+def test_iter_stage_records_in_the_timings_current_when_created():
+    timings = timing.start()
+    items = timing.iter_stage('serialize', ['a', 'b'])
+    timing.stop()
+
+    assert list(items) == ['a', 'b']
+    assert 'serialize' in timings.durations
+
+
+def test_iter_stage_without_timings_returns_the_items():
+    timing.stop()
+
+    assert list(timing.iter_stage('serialize', ['a', 'b'])) == ['a', 'b']
@@ -0,0 +1,143 @@
+import pytest
+
+from wgp_demo.repositories import artist_dataset as ads
+
+from wgp_demo.domain import models as domod
+
+data_dict = {
+    'artists': [
+        {
+            'uuid': 'f853578c-fc0f-4e65-81b8-566c5dffa35a',
+            'gender': 'F',
+            'age': 39,
+            'longitude': '-0.09998975',
+            'latitude': '51.75436293',
+            'rate': 14.21
+        },
+        {
+            'uuid': 'fe2c3195-aeff-487a-a08f-e0bdc0ec6e9a',
+            'gender': 'M',
+            'age': 66,
+            'longitude': '0.18228006',
+            'latitude': '51.74640997',
+            'rate': 39.5
+        }
+    ]
+}
+
+
+def test_dataset_from_dict():
+    dataset = ads.ArtistDataset.from_dict(data_dict)
+
+    assert len(dataset) == 2
+    assert list(dataset.age) == [39, 66]
+    assert list(dataset.rate) == [14.21, 39.5]
+    assert list(dataset.latitude) == [51.75436293, 51.74640997]
+    assert list(dataset.longitude) == [-0.09998975, 0.18228006]
+    assert dataset.genders == ('F', 'M')
+    assert list(dataset.gender_code) == [0, 1]
+
+
+def test_dataset_from_dict_without_artists():
+    dataset = ads.ArtistDataset.from_dict({'artists': []})
+
+    assert len(dataset) == 0
+
+
+def test_dataset_gender_code():
+    dataset = ads.ArtistDataset.from_dict(data_dict)
+
+    assert dataset.get_gender_code('M') == 1
+    assert dataset.get_gender_code('X') is None
+
+
+def test_dataset_builds_domain_artists():
+    dataset = ads.ArtistDataset.from_dict(data_dict)
+
+    artist = dataset.artist(1)
+
+    assert isinstance(artist, domod.DomainModel)
+    assert artist.uuid == 'fe2c3195-aeff-487a-a08f-e0bdc0ec6e9a'
+    assert artist.gender == 'M'
+    assert artist.age == 66
+    assert type(artist.age) is int
+    assert artist.latitude == 51.74640997
+    assert artist.longitude == 0.18228006
+    assert artist.rate == 39.5
+    assert type(artist.rate) is float
+
+
+def test_dataset_columns_are_read_only():
+    dataset = ads.ArtistDataset.from_dict(data_dict)
+
+    for name in ads.ArtistDataset.COLUMNS:
+        with pytest.raises(ValueError):
+            getattr(dataset, name)[0] = getattr(dataset, name)[1]
+
+
+def test_dataset_from_records_in_chunks(monkeypatch):
+    monkeypatch.setattr(ads.ArtistDataset, 'RECORDS_CHUNK_SIZE', 2)
+    records = [
+        dict(data_dict['artists'][index % 2], gender=gender)
+        for index, gender in enumerate(['M', 'X', 'F', 'M', 'A'])
+    ]
+
+    dataset = ads.ArtistDataset.from_records(iter(records))
+
+    assert len(dataset) == 5
+    assert dataset.genders == ('A', 'F', 'M', 'X')
+    assert [dataset.genders[code] for code in dataset.gender_code] == ['M', 'X', 'F', 'M', 'A']
+    assert list(dataset.age) == [39, 66, 39, 66, 39]
+    assert list(dataset.gender_index.rows(dataset.get_gender_code('M'))) == [0, 3]
+
+
+def assert_same_dataset(dataset, expected):
+    assert list(dataset.iter_records()) == list(expected.iter_records())
+    assert dataset.genders == expected.genders
+    for name in ['age_index', 'rate_index', 'location_index']:
+        for array_name, array in getattr(expected, name).get_arrays().items():
+            assert list(getattr(dataset, name).get_arrays()[array_name]) == list(array)
+    for gender in expected.genders:
+        assert list(dataset.gender_index.rows(dataset.get_gender_code(gender))) == list(
+            expected.gender_index.rows(expected.get_gender_code(gender)))
+
+
+def test_dataset_upsert_adds_an_artist():
+    dataset = ads.ArtistDataset.from_dict(data_dict)
+    artist = dict(data_dict['artists'][0], uuid='913694c6-435a-4366-ba0d-da5334a611b2', gender='X', age=60)
+
+    changed, created = dataset.upsert(artist, version='v2')
+
+    assert created is True
+    assert changed.version == 'v2'
+    assert changed.genders == ('F', 'M', 'X')
+    assert changed.find(artist['uuid']) == 2
+    assert len(dataset) == 2
+    assert_same_dataset(changed, ads.ArtistDataset.from_records(data_dict['artists'] + [artist]))
+
+
+def test_dataset_upsert_replaces_an_artist():
+    dataset = ads.ArtistDataset.from_dict(data_dict)
+    artist = dict(data_dict['artists'][0], gender='A', age=70, latitude=-33.9, longitude=151.2, rate=20)
+
+    changed, created = dataset.upsert(artist)
+
+    assert created is False
+    assert changed.genders == ('A', 'M')
+    assert changed.artist(0).age == 70
+    assert dataset.artist(0).age == 39
+    assert_same_dataset(changed, ads.ArtistDataset.from_records([artist, data_dict['artists'][1]]))
+
+
+def test_dataset_delete():
+    dataset = ads.ArtistDataset.from_dict(data_dict)
+
+    changed = dataset.delete(data_dict['artists'][0]['uuid'], version='v2')
+
+    assert changed.version == 'v2'
+    assert len(changed) == 1
+    assert changed.find(data_dict['artists'][1]['uuid']) == 0
+    assert changed.genders == ('M',)
+    assert list(changed.gender_code) == [0]
+    assert dataset.delete('913694c6-435a-4366-ba0d-da5334a611b2') is None
+    assert_same_dataset(changed, ads.ArtistDataset.from_records(data_dict['artists'][1:]))
@@ -3,8 +3,15 @@ import pytest
 import tempfile
 import shutil
 import json
+import itertools
+import multiprocessing
+import mock
+from concurrent import futures
 
 from wgp_demo.repositories import artist_json_repository as ajr
+from wgp_demo.repositories import artist_snapshot as asn
+from wgp_demo.repositories import query_planner as qp
+from wgp_demo.serializers import artist_serializer as asr
 
 from wgp_demo.domain import models as domod
 
@@ -82,6 +89,49 @@ def test_initialize_repo(temp_json_file):
     assert len(repo.data) != 0
 
 
+def test_reload_if_changed_does_nothing_if_file_is_unchanged(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file)
+    data = repo.data
+
+    assert repo.reload_if_changed() is False
+    assert repo.data is data
+
+
+def test_list_reloads_data_when_file_changes(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file)
+
+    with open(temp_json_file, 'w') as f:
+        f.write(json.dumps({'artists': data_dict['artists'][:2]}))
+
+    artists = repo.list()
+
+    assert len(artists) == 2
+
+
+def test_reload_keeps_current_data_if_file_is_invalid(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file)
+    data = repo.data
+
+    with open(temp_json_file, 'w') as f:
+        f.write('{"artists": [')
+
+    assert repo.reload_if_changed() is False
+    assert repo.data is data
+    assert len(repo.list()) == len(data_dict['artists'])
+
+
+def test_version_changes_when_file_changes(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file)
+    version = repo.get_version()
+
+    assert repo.get_version() == version
+
+    with open(temp_json_file, 'w') as f:
+        f.write(json.dumps({'artists': data_dict['artists'][:2]}))
+
+    assert repo.get_version() != version
+
+
 def test_list_all_artists(temp_json_file):
     repo = ajr.ArtistJsonRepository(temp_json_file)
 
@@ -226,6 +276,17 @@ def test_list_with_multiple_filters(temp_json_file):
     assert all([artist.rate_rank == 1 for artist in artists])
 
 
+def test_list_without_filters_gives_every_artist_the_same_ranks(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file)
+
+    artists = repo.list()
+
+    assert [artist.uuid for artist in artists] == [artist['uuid'] for artist in data_dict['artists']]
+    assert all([artist.distance is None for artist in artists])
+    assert all([type(artist.age_rank) is int and artist.age_rank == 1 for artist in artists])
+    assert all([type(artist.global_rank) is int and artist.global_rank == 1 for artist in artists])
+
+
 def test_list_accepts_weights(temp_json_file):
     repo = ajr.ArtistJsonRepository(temp_json_file)
 
@@ -304,6 +365,52 @@ def test_list_rank_by_half_distance_half_age(temp_json_file):
     assert [artist.uuid for artist in artists] == expected_result
 
 
+def test_list_returns_the_total_number_of_artists(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file)
+
+    artists = repo.list(filters={'gender': 'M'})
+
+    assert len(artists) == 3
+    assert artists.total == 3
+
+
+def test_list_with_limit_and_offset(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file)
+
+    artists = repo.list(filters={}, weights={'age': '1'}, limit=2, offset=1)
+
+    expected_result = [
+        'fe2c3195-aeff-487a-a08f-e0bdc0ec6e9a',
+        '913694c6-435a-4366-ba0d-da5334a611b2',
+    ]
+
+    assert [artist.uuid for artist in artists] == expected_result
+    assert artists.total == len(data_dict['artists'])
+
+
+def test_list_with_limit_keeps_file_order_for_equal_ranks(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file)
+
+    artists = repo.list(filters={'age': '39,66'}, weights={'rate': '1'}, limit=2)
+
+    expected_result = [
+        'f853578c-fc0f-4e65-81b8-566c5dffa35a',
+        'fe2c3195-aeff-487a-a08f-e0bdc0ec6e9a',
+    ]
+
+    assert [artist.uuid for artist in artists] == expected_result
+    assert artists.total == 4
+
+
+def test_list_with_offset_past_the_end(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file)
+
+    artists = repo.list(limit=2, offset=10)
+
+    assert len(artists) == 0
+    assert artists.total == len(data_dict['artists'])
+
+
 def test_list_ranks_shall_be_normalized(temp_json_file):
     repo = ajr.ArtistJsonRepository(temp_json_file)
 
@@ -338,3 +445,329 @@ def test_list_global_ranks_are_normalized(temp_json_file):
 
 
     assert all([1 >= artist.global_rank >= 0 for artist in artists])
+
+
+def test_list_results_do_not_depend_on_the_query_plan(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file)
+    filters = {
+        'age': '39,66',
+        'gender': 'M',
+        'rate_max': '35',
+        'location': '{},{},{}'.format(london_position['latitude'], london_position['longitude'], 31.1)
+    }
+    weights = {'age': '1', 'distance': '2', 'rate': '3'}
+
+    expected_artists = repo.list(filters=dict(filters), weights=dict(weights))
+
+    for filters_order in itertools.permutations(filters):
+        for driver in filters:
+            repo.planner.plan = lambda estimates, size: qp.QueryPlan(driver, list(filters_order))
+            artists = repo.list(filters=dict(filters), weights=dict(weights))
+
+            assert [artist.uuid for artist in artists] == [artist.uuid for artist in expected_artists]
+            for artist, expected_artist in zip(artists, expected_artists):
+                assert artist.distance == expected_artist.distance
+                assert artist.age_rank == expected_artist.age_rank
+                assert artist.distance_rank == expected_artist.distance_rank
+                assert artist.rate_rank == expected_artist.rate_rank
+                assert artist.global_rank == expected_artist.global_rank
+
+
+def test_list_batch_matches_single_queries(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file)
+    location = '{},{},'.format(london_position['latitude'], london_position['longitude'])
+    queries = [
+        {'filters': {'location': location + '20.5'}, 'weights': {'distance': '1'}},
+        {'filters': {'location': location + '31.1', 'gender': 'M'}, 'weights': {'age': '1'}, 'limit': 2},
+        {'filters': {'location': location + '23', 'age': '60,66'}, 'weights': {}, 'offset': 1},
+        {'filters': {'location': '51.7,0.1,5'}, 'weights': {'distance': '1'}},
+        {'filters': {'rate_max': '31'}, 'weights': {'rate': '1'}},
+        {}
+    ]
+
+    expected_lists = [
+        repo.list(filters=dict(query.get('filters', {})), weights=dict(query.get('weights', {})),
+                  limit=query.get('limit'), offset=query.get('offset'))
+        for query in queries
+    ]
+    artist_lists = repo.list_batch(queries)
+
+    assert len(artist_lists) == len(queries)
+    for artists, expected_artists in zip(artist_lists, expected_lists):
+        assert artists.total == expected_artists.total
+        assert [artist.uuid for artist in artists] == [artist.uuid for artist in expected_artists]
+        for artist, expected_artist in zip(artists, expected_artists):
+            assert artist.distance == expected_artist.distance
+            assert artist.global_rank == expected_artist.global_rank
+
+
+def test_list_does_not_change_its_arguments(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file)
+    filters = {'age': '39,66', 'rate_max': '35'}
+    weights = {'age': '1'}
+
+    repo.list(filters=filters, weights=weights)
+
+    assert filters == {'age': '39,66', 'rate_max': '35'}
+    assert weights == {'age': '1'}
+
+
+def test_list_in_concurrent_threads_matches_serial_queries(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file)
+    location = '{},{},'.format(london_position['latitude'], london_position['longitude'])
+    queries = [
+        {'filters': {'location': location + '31.1'}, 'weights': {'distance': '1', 'age': '1'}},
+        {'filters': {'gender': 'M'}, 'weights': {'age': '1'}, 'limit': 2},
+        {'filters': {'rate_max': '31'}, 'weights': {'rate': '1'}, 'offset': 1},
+        {}
+    ]
+
+    def encode(query):
+        return json.dumps(repo.list(**query), cls=asr.ArtistEncoder)
+
+    expected = [encode(query) for query in queries]
+    with futures.ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(encode, queries * 20))
+
+    assert results == expected * 20
+
+
+@pytest.mark.parametrize('filters, weights, limit, offset', [
+    ({}, {}, None, None),
+    ({'gender': 'M'}, {'age': '1'}, None, None),
+    ({'age': '39,66'}, {'rate': '1'}, 2, None),
+    ({'age': '60'}, {}, None, None),
+    ({'rate_max': '31.1'}, {'rate': '1'}, None, 1),
+    ({'location': '{},{},{}'.format(london_position['latitude'], london_position['longitude'], 23.1)},
+     {'age': '0.5', 'distance': '0.5'}, None, None),
+    ({'age': '39,66', 'gender': 'M', 'rate_max': '35',
+      'location': '{},{},{}'.format(london_position['latitude'], london_position['longitude'], 31.1)},
+     {'age': '1', 'distance': '2', 'rate': '3'}, 2, 0),
+])
+def test_list_with_shards_matches_the_serial_list(temp_json_file, filters, weights, limit, offset):
+    serial_repo = ajr.ArtistJsonRepository(temp_json_file)
+    repo = ajr.ArtistJsonRepository(temp_json_file, shards=3, shard_min_rows=0)
+
+    try:
+        expected_artists = serial_repo.list(filters=dict(filters), weights=dict(weights), limit=limit, offset=offset)
+        artists = repo.list(filters=dict(filters), weights=dict(weights), limit=limit, offset=offset)
+    finally:
+        repo.close()
+
+    assert json.dumps(artists, cls=asr.ArtistEncoder) == json.dumps(expected_artists, cls=asr.ArtistEncoder)
+    assert artists.total == expected_artists.total
+
+
+def test_list_of_few_candidates_does_not_use_shards(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file, shards=2, shard_min_rows=5)
+    repo.shard_pool.map = mock.Mock()
+
+    artists = repo.list()
+
+    assert len(artists) == 4
+    assert not repo.shard_pool.map.called
+
+
+def test_list_with_shards_follows_reloads(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file, shards=2, shard_min_rows=0)
+
+    try:
+        assert len(repo.list(filters={'gender': 'M'})) == 3
+
+        with open(temp_json_file, 'w') as f:
+            f.write(json.dumps({'artists': data_dict['artists'][:2]}))
+
+        assert [artist.uuid for artist in repo.list(filters={'gender': 'M'})] == [data_dict['artists'][1]['uuid']]
+    finally:
+        repo.close()
+
+
+def test_list_with_shards_follows_writes_without_new_processes(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file, shards=2, shard_min_rows=0)
+    serial_repo = ajr.ArtistJsonRepository(temp_json_file)
+
+    try:
+        repo.list(filters={'gender': 'M'})
+        workers = set(process.pid for process in multiprocessing.active_children())
+
+        repo.upsert(dict(data_dict['artists'][0], uuid='0b6c4c4e-8ad6-4a8d-9b7d-1a2b3c4d5e6f', gender='M'))
+        repo.delete(data_dict['artists'][1]['uuid'])
+        results = []
+        map_shards = repo.shard_pool.map
+
+        def spy_map(*args):
+            results.extend(map_shards(*args))
+            return results
+
+        repo.shard_pool.map = spy_map
+        artists = repo.list(filters={'gender': 'M'}, weights={'age': '1'})
+
+        assert set(process.pid for process in multiprocessing.active_children()) == workers
+        # The shard processes applied the changes themselves
+        assert results and None not in results
+        expected_artists = serial_repo.list(filters={'gender': 'M'}, weights={'age': '1'})
+        assert json.dumps(artists, cls=asr.ArtistEncoder) == json.dumps(expected_artists, cls=asr.ArtistEncoder)
+    finally:
+        repo.close()
+
+
+def test_list_falls_back_to_serial_if_shards_cannot_run(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file, shards=2, shard_min_rows=0)
+    # A shard process not at the version of the dataset
+    repo.shard_pool.map = mock.Mock(return_value=[None, None])
+
+    artists = repo.list(filters={'gender': 'M'})
+
+    assert repo.shard_pool.map.called
+    assert len(artists) == 3
+
+
+def test_last_modified_is_the_modification_time_of_the_file(temp_json_file):
+    os.utime(temp_json_file, (1445412480.5, 1445412480.5))
+    repo = ajr.ArtistJsonRepository(temp_json_file)
+
+    assert repo.get_last_modified() == pytest.approx(1445412480.5)
+
+
+new_artist = {
+    'uuid': '0b8a9d2e-5c5e-4a0c-9f2c-3d1f7a8b6c4e',
+    'gender': 'X',
+    'age': 30,
+    'latitude': 51.5,
+    'longitude': -0.15,
+    'rate': 12.5
+}
+
+
+def test_upsert_adds_and_replaces_artists(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file)
+    version = repo.get_version()
+
+    assert repo.upsert(new_artist) is True
+    assert repo.get_version() != version
+    assert repo.upsert(dict(new_artist, age=31), replace=False) is None
+    assert repo.upsert(dict(data_dict['artists'][0], age=70)) is False
+
+    assert [artist.uuid for artist in repo.list(filters={'gender': 'X'})] == [new_artist['uuid']]
+    assert [artist.age for artist in repo.list(filters={'age': '70,70'})] == [70]
+    assert len(repo.list(filters={'location': '51.5,-0.15,1'})) == 1
+    assert len(repo.list()) == 5
+    assert os.path.exists(temp_json_file + ajr.CHANGE_LOG_SUFFIX)
+
+
+def test_delete_artists(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file)
+
+    assert repo.delete(data_dict['artists'][1]['uuid']) is True
+    assert repo.delete(data_dict['artists'][1]['uuid']) is False
+    assert [artist.uuid for artist in repo.list(filters={'gender': 'M'})] == [
+        data_dict['artists'][2]['uuid'], data_dict['artists'][3]['uuid']
+    ]
+    assert repo.change_log.read()[0] == [{'op': 'delete', 'uuid': data_dict['artists'][1]['uuid']}]
+
+
+def test_changes_are_loaded_with_the_data_file(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file)
+    repo.upsert(new_artist)
+    repo.delete(data_dict['artists'][0]['uuid'])
+
+    loaded_repo = ajr.ArtistJsonRepository(temp_json_file)
+
+    assert loaded_repo.get_version() == repo.get_version()
+    assert list(loaded_repo.data.iter_records()) == list(repo.data.iter_records())
+
+
+def test_changes_of_another_repository_are_applied(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file)
+    other_repo = ajr.ArtistJsonRepository(temp_json_file)
+
+    other_repo.upsert(new_artist)
+    other_repo.upsert(dict(data_dict['artists'][0], age=70))
+
+    with mock.patch.object(repo, '_load') as mock_load:
+        artists = repo.list(filters={'age': '70,70'})
+
+    assert not mock_load.called
+    assert len(artists) == 1
+    assert repo.get_version() == other_repo.get_version()
+    assert list(repo.data.iter_records()) == list(other_repo.data.iter_records())
+
+    repo.delete(new_artist['uuid'])
+
+    assert len(other_repo.list()) == 4
+
+
+def test_last_modified_follows_the_changes(temp_json_file):
+    os.utime(temp_json_file, (1000000000, 1000000000))
+    repo = ajr.ArtistJsonRepository(temp_json_file)
+
+    assert repo.get_last_modified() == 1000000000
+
+    repo.upsert(new_artist)
+
+    assert repo.get_last_modified() > 1000000000
+
+
+def test_compact_writes_the_changes_to_the_data_file(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file)
+    repo.upsert(new_artist)
+    repo.delete(data_dict['artists'][0]['uuid'])
+    data = repo.data
+
+    assert repo.compact() == 2
+    compacted = repo.data
+    assert repo.compact() == 0
+    assert repo.reload_if_changed() is False
+    assert repo.data is compacted
+    assert list(compacted.iter_records()) == list(data.iter_records())
+    assert compacted.version == ajr.ArtistJsonRepository(temp_json_file).data.version != data.version
+    assert repo.change_log.read() == ([], 0)
+
+    with open(temp_json_file) as f:
+        records = json.load(f)['artists']
+    assert [record['uuid'] for record in records] == [artist['uuid'] for artist in data_dict['artists'][1:]] + [
+        new_artist['uuid']]
+    # The artists no change touched are the ones of the file, values as they were written
+    assert records[:-1] == data_dict['artists'][1:]
+    assert list(ajr.ArtistJsonRepository(temp_json_file).data.iter_records()) == list(data.iter_records())
+
+
+def test_compact_without_net_changes_keeps_the_data_file_identical(temp_json_file):
+    ajr._write_json_file(temp_json_file, data_dict['artists'])
+    with open(temp_json_file, 'rb') as f:
+        content = f.read()
+    repo = ajr.ArtistJsonRepository(temp_json_file)
+    repo.upsert(new_artist)
+    repo.delete(new_artist['uuid'])
+
+    assert repo.compact() == 2
+    assert repo.data.genders == ajr.ArtistJsonRepository(temp_json_file).data.genders
+    with open(temp_json_file, 'rb') as f:
+        assert f.read() == content
+
+
+def test_compact_keeps_a_snapshot(temp_empty_dir, temp_json_file):
+    snapshot_file = os.path.join(temp_empty_dir, 'artists.snapshot')
+    asn.compile_snapshot(temp_json_file, snapshot_file)
+    repo = ajr.ArtistJsonRepository(snapshot_file)
+    repo.upsert(new_artist)
+
+    assert ajr.ArtistJsonRepository(snapshot_file).list(filters={'gender': 'X'})[0].uuid == new_artist['uuid']
+    assert repo.compact() == 1
+    assert asn.is_snapshot(snapshot_file)
+    assert repo.data.version == ajr.ArtistJsonRepository(snapshot_file).data.version
+    assert ajr.ArtistJsonRepository(snapshot_file).list(filters={'gender': 'X'})[0].uuid == new_artist['uuid']
+
+
+def test_changes_are_compacted_in_the_background(temp_json_file):
+    repo = ajr.ArtistJsonRepository(temp_json_file, compact_min_changes=2)
+
+    repo.upsert(new_artist)
+    assert repo._compaction is None
+
+    repo.delete(new_artist['uuid'])
+    repo.close()
+
+    assert repo.change_log.read() == ([], 0)
+    with open(temp_json_file) as f:
+        assert len(json.load(f)['artists']) == 4
@@ -0,0 +1,171 @@
+import os
+import pytest
+import tempfile
+import shutil
+import threading
+import time
+import json
+
+from wgp_demo.repositories import artist_json_repository as ajr
+from wgp_demo.repositories import artist_sqlite_repository as asq
+from wgp_demo.serializers import artist_serializer as asr
+
+from wgp_demo.domain import models as domod
+
+from tests.repositories.test_artist_list_json_repository import data_dict, json_content, london_position
+
+london_location = '{},{},{}'.format(london_position['latitude'], london_position['longitude'], 23.1)
+
+
+@pytest.fixture
+def temp_empty_dir(request):
+    tempdir = tempfile.mkdtemp()
+
+    def fin():
+        shutil.rmtree(tempdir)
+
+    request.addfinalizer(fin)
+    return tempdir
+
+
+@pytest.fixture
+def temp_db_file(temp_empty_dir):
+    filepath = os.path.join(temp_empty_dir, "artists.db")
+    asq.import_artists(filepath, data_dict['artists'])
+
+    return filepath
+
+
+@pytest.fixture
+def temp_json_file(temp_empty_dir):
+    filepath = os.path.join(temp_empty_dir, "artists.json")
+    with open(filepath, 'w') as f:
+        f.write(json_content)
+
+    return filepath
+
+
+def test_import_artists_returns_the_number_of_artists(temp_empty_dir):
+    filepath = os.path.join(temp_empty_dir, "artists.db")
+
+    assert asq.import_artists(filepath, iter(data_dict['artists'])) == 4
+    assert asq.import_artists(filepath, data_dict['artists'][:2]) == 2
+    assert len(asq.ArtistSqliteRepository(filepath).list()) == 2
+
+
+def test_list_all_artists(temp_db_file):
+    repo = asq.ArtistSqliteRepository(temp_db_file)
+
+    artists = repo.list()
+
+    assert len(artists) == 4
+    assert isinstance(artists[0], domod.DomainModel)
+    assert [artist.uuid for artist in artists] == [artist['uuid'] for artist in data_dict['artists']]
+
+
+def test_list_of_an_empty_database(temp_empty_dir):
+    repo = asq.ArtistSqliteRepository(os.path.join(temp_empty_dir, "artists.db"))
+
+    artists = repo.list(filters={'age': '39,66'}, weights={'age': '1'})
+
+    assert len(artists) == 0
+    assert artists.total == 0
+
+
+def test_list_can_filter_by_location(temp_db_file):
+    repo = asq.ArtistSqliteRepository(temp_db_file)
+
+    artists = repo.list(filters={'location': london_location}, weights={'distance': '1'})
+
+    assert [artist.uuid for artist in artists] == [
+        'f853578c-fc0f-4e65-81b8-566c5dffa35a',
+        '913694c6-435a-4366-ba0d-da5334a611b2',
+        'fe2c3195-aeff-487a-a08f-e0bdc0ec6e9a',
+    ]
+
+
+@pytest.mark.parametrize('filters, weights, limit, offset', [
+    ({}, {}, None, None),
+    ({'gender': 'M'}, {'age': '1'}, None, None),
+    ({'gender': 'X'}, {}, None, None),
+    ({'age': '39,66'}, {'rate': '1'}, 2, None),
+    ({'age': '60'}, {}, None, None),
+    ({'rate_max': '31.1'}, {'rate': '1'}, None, 1),
+    ({'location': london_location}, {'age': '0.5', 'distance': '0.5'}, None, None),
+    ({'age': '39,66', 'gender': 'M', 'rate_max': '35', 'location': london_location},
+     {'age': '1', 'distance': '2', 'rate': '3'}, 2, 0),
+])
+def test_list_matches_the_json_repository(temp_db_file, temp_json_file, filters, weights, limit, offset):
+    json_repo = ajr.ArtistJsonRepository(temp_json_file)
+    repo = asq.ArtistSqliteRepository(temp_db_file)
+
+    expected_artists = json_repo.list(filters=dict(filters), weights=dict(weights), limit=limit, offset=offset)
+    artists = repo.list(filters=dict(filters), weights=dict(weights), limit=limit, offset=offset)
+
+    assert json.dumps(artists, cls=asr.ArtistEncoder) == json.dumps(expected_artists, cls=asr.ArtistEncoder)
+    assert artists.total == expected_artists.total
+
+
+def test_version_changes_when_artists_are_imported(temp_db_file):
+    repo = asq.ArtistSqliteRepository(temp_db_file)
+    version = repo.get_version()
+
+    assert version is not None
+    assert repo.get_version() == version
+
+    asq.import_artists(temp_db_file, data_dict['artists'][:2])
+
+    assert repo.get_version() != version
+    assert len(repo.list()) == 2
+
+
+def test_every_thread_uses_its_own_connection(temp_db_file):
+    repo = asq.ArtistSqliteRepository(temp_db_file)
+    connections = []
+
+    def query():
+        connections.append(repo._get_connection())
+        assert len(repo.list(filters={'gender': 'M'})) == 3
+
+    threads = [threading.Thread(target=query) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(id(connection) for connection in connections)) == 3
+    assert repo._get_connection() is repo._get_connection()
+
+    repo.close()
+    assert len(repo.list()) == 4
+
+
+def test_last_modified_is_the_time_of_the_import(temp_empty_dir):
+    filepath = os.path.join(temp_empty_dir, "artists.db")
+    repo = asq.ArtistSqliteRepository(filepath)
+
+    assert repo.get_last_modified() is None
+
+    before = time.time()
+    asq.import_artists(filepath, data_dict['artists'])
+
+    assert before <= repo.get_last_modified() <= time.time()
+
+
+def test_upsert_and_delete_artists(temp_db_file):
+    repo = asq.ArtistSqliteRepository(temp_db_file)
+    version = repo.get_version()
+    artist = dict(data_dict['artists'][0], uuid='0b8a9d2e-5c5e-4a0c-9f2c-3d1f7a8b6c4e', gender='X')
+
+    assert repo.upsert(artist) is True
+    assert repo.get_version() != version
+    assert repo.upsert(dict(artist, age=70), replace=False) is None
+    assert repo.upsert(dict(artist, age=70, latitude=-33.9, longitude=151.2)) is False
+    assert [found.age for found in repo.list(filters={'gender': 'X'})] == [70]
+    assert len(repo.list(filters={'location': london_location})) == 3
+    assert len(repo.list(filters={'location': '-33.9,151.2,1'})) == 1
+
+    assert repo.delete(artist['uuid']) is True
+    assert repo.delete(artist['uuid']) is False
+    assert len(repo.list()) == 4
+    assert len(repo.list(filters={'location': '-33.9,151.2,1'})) == 0
@@ -0,0 +1,139 @@
+import os
+import pytest
+import tempfile
+import shutil
+import json
+
+import numpy as np
+
+from wgp_demo.repositories import artist_dataset as ads
+from wgp_demo.repositories import artist_json_repository as ajr
+from wgp_demo.repositories import artist_snapshot as asn
+
+data_dict = {
+    'artists': [
+        {
+            'uuid': 'f853578c-fc0f-4e65-81b8-566c5dffa35a',
+            'gender': 'F',
+            'age': 39,
+            'longitude': '-0.09998975',
+            'latitude': '51.75436293',
+            'rate': 14.21
+        },
+        {
+            'uuid': 'fe2c3195-aeff-487a-a08f-e0bdc0ec6e9a',
+            'gender': 'M',
+            'age': 66,
+            'longitude': '0.18228006',
+            'latitude': '51.74640997',
+            'rate': 39.5
+        },
+        {
+            'uuid': '913694c6-435a-4366-ba0d-da5334a611b2',
+            'gender': 'M',
+            'age': 60,
+            'longitude': '0.27891577',
+            'latitude': '51.45994069',
+            'rate': 27.77
+        }
+    ]
+}
+
+
+def _as_tuple(artist):
+    return tuple(getattr(artist, name) for name in artist.__slots__)
+
+
+@pytest.fixture
+def temp_empty_dir(request):
+    tempdir = tempfile.mkdtemp()
+
+    def fin():
+        shutil.rmtree(tempdir)
+
+    request.addfinalizer(fin)
+    return tempdir
+
+
+@pytest.fixture
+def temp_json_file(temp_empty_dir):
+    filepath = os.path.join(temp_empty_dir, "artists.json")
+    with open(filepath, 'w') as f:
+        f.write(json.dumps(data_dict))
+
+    return filepath
+
+
+@pytest.fixture
+def temp_snapshot_file(temp_json_file, temp_empty_dir):
+    filepath = os.path.join(temp_empty_dir, "artists.snapshot")
+    asn.compile_snapshot(temp_json_file, filepath)
+
+    return filepath
+
+
+def test_compile_snapshot_returns_the_number_of_artists(temp_json_file, temp_empty_dir):
+    filepath = os.path.join(temp_empty_dir, "artists.snapshot")
+
+    assert asn.compile_snapshot(temp_json_file, filepath) == 3
+    assert asn.is_snapshot(filepath)
+    assert not asn.is_snapshot(temp_json_file)
+
+
+def test_snapshot_contains_the_same_arrays(temp_snapshot_file):
+    dataset = ads.ArtistDataset.from_dict(data_dict)
+    snapshot = asn.read_snapshot(temp_snapshot_file, version='v1')
+
+    assert snapshot.version == 'v1'
+    assert snapshot.genders == dataset.genders
+
+    arrays = dataset.get_arrays()
+    snapshot_arrays = snapshot.get_arrays()
+    assert sorted(snapshot_arrays) == sorted(arrays)
+    for name, array in arrays.items():
+        assert snapshot_arrays[name].dtype == array.dtype
+        assert np.array_equal(snapshot_arrays[name], array)
+
+    assert _as_tuple(snapshot.artist(1)) == _as_tuple(dataset.artist(1))
+
+
+def test_snapshot_arrays_are_read_only(temp_snapshot_file):
+    snapshot = asn.read_snapshot(temp_snapshot_file)
+
+    assert not snapshot.age.flags.writeable
+    assert not snapshot.location_index.order.flags.writeable
+
+
+def test_snapshot_without_artists(temp_empty_dir):
+    filepath = os.path.join(temp_empty_dir, "artists.snapshot")
+    asn.write_snapshot(ads.ArtistDataset.from_dict({'artists': []}), filepath)
+
+    assert len(asn.read_snapshot(filepath)) == 0
+
+
+def test_read_snapshot_rejects_other_files(temp_json_file):
+    with pytest.raises(asn.SnapshotError):
+        asn.read_snapshot(temp_json_file)
+
+
+def test_read_snapshot_rejects_truncated_files(temp_snapshot_file):
+    size = os.path.getsize(temp_snapshot_file)
+    with open(temp_snapshot_file, 'r+b') as f:
+        f.truncate(size - 8)
+
+    with pytest.raises(asn.SnapshotError):
+        asn.read_snapshot(temp_snapshot_file)
+
+
+def test_repository_loads_snapshots(temp_json_file, temp_snapshot_file):
+    json_repo = ajr.ArtistJsonRepository(temp_json_file)
+    snapshot_repo = ajr.ArtistJsonRepository(temp_snapshot_file)
+
+    filters = {'age': '40,70', 'location': '51.5126064,-0.1802461,30'}
+    weights = {'age': 1, 'distance': 2}
+
+    artists = json_repo.list(filters=filters, weights=weights)
+    snapshot_artists = snapshot_repo.list(filters=filters, weights=weights)
+
+    assert len(artists) == 2
+    assert [_as_tuple(a) for a in snapshot_artists] == [_as_tuple(a) for a in artists]
@@ -0,0 +1,56 @@
+import numpy as np
+
+from wgp_demo.repositories import category_index as cai
+
+
+def test_posting_lists():
+    index = cai.CategoryIndex(np.array([0, 1, 1, 1, 0]), 2)
+
+    assert index.count(0) == 2
+    assert list(index.rows(0)) == [0, 4]
+    assert list(index.rows(1)) == [1, 2, 3]
+
+
+def test_bitmaps():
+    index = cai.CategoryIndex(np.array([0, 1, 1, 1, 0]), 2)
+
+    rows = np.array([1, 3, 4])
+
+    assert list(index.bitmap(0)) == [True, False, False, False, True]
+    assert list(rows[index.bitmap(1)[rows]]) == [1, 3]
+
+
+def test_unknown_category():
+    index = cai.CategoryIndex(np.array([0, 1, 1, 1, 0]), 2)
+
+    assert index.count(None) == 0
+    assert list(index.rows(None)) == []
+    assert not index.bitmap(None).any()
+
+
+def assert_same_index(index, expected):
+    assert index.size == expected.size
+    assert [list(bitmap) for bitmap in index.bitmaps] == [list(bitmap) for bitmap in expected.bitmaps]
+    assert [list(rows) for rows in index.posting_lists] == [list(rows) for rows in expected.posting_lists]
+
+
+def test_insert_update_and_delete_match_a_new_index():
+    index = cai.CategoryIndex(np.array([0, 1, 1, 1, 0]), 2)
+
+    assert_same_index(index.insert(5, 1), cai.CategoryIndex(np.array([0, 1, 1, 1, 0, 1]), 2))
+    assert_same_index(index.update(2, 1, 0), cai.CategoryIndex(np.array([0, 1, 0, 1, 0]), 2))
+    assert_same_index(index.delete(1, 1), cai.CategoryIndex(np.array([0, 1, 1, 0]), 2))
+    assert_same_index(index, cai.CategoryIndex(np.array([0, 1, 1, 1, 0]), 2))
+
+
+def test_add_category():
+    index = cai.CategoryIndex(np.array([0, 1, 1, 1, 0]), 2).add_category(1)
+
+    assert_same_index(index, cai.CategoryIndex(np.array([0, 2, 2, 2, 0]), 3))
+    assert index.count(1) == 0
+
+
+def test_remove_category():
+    index = cai.CategoryIndex(np.array([0, 2, 2, 2, 0]), 3).remove_category(1)
+
+    assert_same_index(index, cai.CategoryIndex(np.array([0, 1, 1, 1, 0]), 2))
@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from wgp_demo.repositories import change_log as chl
+
+
+def artist(uuid, age=30):
+    return {'uuid': uuid, 'gender': 'F', 'age': age, 'latitude': 51.5, 'longitude': -0.18, 'rate': 10.0}
+
+
+@pytest.fixture
+def temp_log(request):
+    tempdir = tempfile.mkdtemp()
+
+    def fin():
+        shutil.rmtree(tempdir)
+
+    request.addfinalizer(fin)
+    return chl.ChangeLog(os.path.join(tempdir, 'artists.json.changes'))
+
+
+def test_replay_keeps_replaced_artists_in_place():
+    records = [artist('a'), artist('b'), artist('c')]
+    changes = [chl.upsert(artist('b', 40)), chl.upsert(artist('d')), chl.delete('a'), chl.upsert(artist('e'))]
+
+    replayed = list(chl.replay(iter(records), changes))
+
+    assert [record['uuid'] for record in replayed] == ['b', 'c', 'd', 'e']
+    assert replayed[0]['age'] == 40
+
+
+def test_replay_moves_artists_added_again_to_the_end():
+    records = [artist('a'), artist('b')]
+    changes = [chl.upsert(artist('c')), chl.delete('a'), chl.upsert(artist('d')), chl.upsert(artist('a', 50)),
+               chl.delete('c'), chl.upsert(artist('c')), chl.upsert(artist('d', 60)), chl.delete('x')]
+
+    replayed = list(chl.replay(iter(records), changes))
+
+    assert [record['uuid'] for record in replayed] == ['b', 'd', 'a', 'c']
+    assert [record['age'] for record in replayed] == [30, 60, 50, 30]
+
+
+def test_read_appended_changes(temp_log):
+    assert temp_log.get_signature() is None
+    assert temp_log.read() == ([], 0)
+
+    first_offset = temp_log.append(chl.upsert(artist('a')))[0]
+    offset, inode, mtime = temp_log.append(chl.delete('a'))
+
+    assert temp_log.get_signature() == (inode, offset)
+    assert temp_log.read() == ([chl.upsert(artist('a')), chl.delete('a')], offset)
+    assert temp_log.read(first_offset) == ([chl.delete('a')], offset)
+
+
+def test_read_leaves_a_partial_change(temp_log):
+    offset = temp_log.append(chl.delete('a'))[0]
+    with open(temp_log.filepath, 'a') as f:
+        f.write('{"op": "del')
+
+    assert temp_log.read() == ([chl.delete('a')], offset)
+    assert temp_log.read(offset) == ([], offset)
+
+
+def test_clear(temp_log):
+    temp_log.append(chl.delete('a'))
+
+    with temp_log.lock():
+        temp_log.clear()
+
+    assert temp_log.read() == ([], 0)
+    assert temp_log.get_signature()[1] == 0
@@ -0,0 +1,80 @@
+import numpy as np
+from geopy.distance import great_circle
+
+from wgp_demo.repositories import geo
+
+london = (51.5126064, -0.1802461)
+
+
+def assert_matches_geopy(latitudes, longitudes, latlon):
+    distances = geo.great_circle_miles(latitudes, longitudes, *latlon)
+
+    for latitude, longitude, distance in zip(latitudes, longitudes, distances):
+        expected = great_circle((latitude, longitude), latlon, radius=geo.EARTH_RADIUS_KM).miles
+        assert abs(distance - expected) <= expected * geo.GREAT_CIRCLE_REL_TOLERANCE + geo.GREAT_CIRCLE_ABS_TOLERANCE
+
+
+def test_great_circle_miles_matches_known_distances():
+    distances = geo.great_circle_miles([51.75436293, 51.45994069], [-0.09998975, 0.27891577], *london)
+
+    assert abs(distances[0] - 17.059475921200125) < 1e-6
+    assert abs(distances[1] - 20.093197184470394) < 1e-6
+
+
+def test_great_circle_miles_of_the_same_point_is_zero():
+    distances = geo.great_circle_miles([london[0]], [london[1]], *london)
+
+    assert distances[0] == 0
+
+
+def test_great_circle_miles_matches_geopy():
+    random_state = np.random.RandomState(42)
+    latitudes = random_state.uniform(-90, 90, 500)
+    longitudes = random_state.uniform(-180, 180, 500)
+
+    for latlon in [london, (0, 0), (-89.9, 179.9), (45, -170)]:
+        assert_matches_geopy(latitudes, longitudes, latlon)
+
+
+def test_great_circle_miles_matches_geopy_for_close_and_antipodal_points():
+    latitudes = [london[0] + 1e-9, london[0], -london[0]]
+    longitudes = [london[1], london[1] + 1e-7, london[1] + 180]
+
+    assert_matches_geopy(latitudes, longitudes, london)
+
+
+def _in_boxes(boxes, latitude, longitude):
+    return any(
+        min_lat <= latitude <= max_lat and min_lon <= longitude <= max_lon
+        for min_lat, max_lat, min_lon, max_lon in boxes
+    )
+
+
+def test_bounding_boxes_contain_the_points_within_the_radius():
+    rng = np.random.RandomState(0)
+    latitudes = rng.uniform(-90, 90, 2000)
+    longitudes = rng.uniform(-180, 180, 2000)
+
+    for latlon, radius in [(london, 20), ((0, 179.9), 100), ((-10, -179.5), 500), ((85, 0), 500), (london, 20000)]:
+        boxes = geo.bounding_boxes(latlon[0], latlon[1], radius)
+        distances = geo.great_circle_miles(latitudes, longitudes, *latlon)
+
+        for latitude, longitude in zip(latitudes[distances < radius], longitudes[distances < radius]):
+            assert _in_boxes(boxes, latitude, longitude)
+
+
+def test_bounding_boxes_split_at_the_antimeridian():
+    boxes = geo.bounding_boxes(0, 179.9, 100)
+
+    assert len(boxes) == 2
+    assert boxes[0][2:] == (boxes[0][2], 180.0)
+    assert boxes[1][2] == -180.0
+    assert _in_boxes(boxes, 0, -179.5)
+    assert not _in_boxes(boxes, 0, 0)
+
+
+def test_bounding_boxes_of_small_radius():
+    ((min_lat, max_lat, min_lon, max_lon),) = geo.bounding_boxes(london[0], london[1], 1)
+
+    assert max_lat - min_lat < 0.03
+    assert max_lon - min_lon < 0.05
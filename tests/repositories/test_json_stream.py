@@ -0,0 +1,63 @@
+import io
+import json
+
+import pytest
+
+from wgp_demo.repositories import json_stream as jst
+
+document = {
+    'version': 3,
+    'artists': [
+        {'uuid': 'a', 'age': 39, 'rate': 14.21, 'tags': ['x', {'y': 1}]},
+        {'uuid': 'b', 'age': 66, 'rate': 39.5, 'tags': []},
+        {'uuid': 'c', 'age': 60, 'rate': 27, 'tags': None}
+    ],
+    'source': {'name': 'export', 'artists': ['not', 'this']}
+}
+
+
+def _items(text, key='artists', chunk_size=jst.CHUNK_SIZE):
+    return list(jst.iter_items(io.StringIO(text), key, chunk_size=chunk_size))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 7, 64, jst.CHUNK_SIZE])
+def test_iter_items_across_chunks(chunk_size):
+    text = json.dumps(document, indent=4)
+
+    assert _items(text, chunk_size=chunk_size) == document['artists']
+
+
+def test_iter_items_compact_document():
+    text = json.dumps(document, separators=(',', ':'))
+
+    assert _items(text, chunk_size=5) == document['artists']
+
+
+def test_iter_items_does_not_truncate_numbers_at_chunk_boundaries():
+    assert _items('{"artists": [123456789, 1.5e10]}', chunk_size=3) == [123456789, 1.5e10]
+
+
+def test_iter_items_empty_list():
+    assert _items(' { "artists" : [ ] } ') == []
+
+
+def test_iter_items_missing_key():
+    with pytest.raises(ValueError):
+        _items('{"other": [1, 2]}')
+
+    with pytest.raises(ValueError):
+        _items('{}')
+
+
+@pytest.mark.parametrize('text', [
+    '',
+    '[1, 2]',
+    '{"artists": [{"uuid": "a"}, ',
+    '{"artists": [{"uuid": "a"} {"uuid": "b"}]}',
+    '{"artists": [1, 2]',
+    '{"artists": [1, 2]} []',
+    '{artists: [1, 2]}'
+])
+def test_iter_items_malformed_documents(text):
+    with pytest.raises(ValueError):
+        _items(text, chunk_size=4)
@@ -0,0 +1,30 @@
+from wgp_demo.repositories import query_planner as qp
+
+
+def test_plan_without_filters():
+    plan = qp.QueryPlanner().plan({}, 1000)
+
+    assert plan.driver is None
+    assert plan.filters == []
+
+
+def test_plan_drives_the_query_with_the_most_selective_filter():
+    plan = qp.QueryPlanner().plan({'age': 500, 'rate_max': 20, 'location': 100}, 1000)
+
+    assert plan.driver == 'rate_max'
+    assert sorted(plan.filters) == ['age', 'location', 'rate_max']
+
+
+def test_plan_runs_cheap_selective_filters_before_expensive_ones():
+    plan = qp.QueryPlanner().plan({'gender': 500, 'age': 100, 'location': 300}, 1000)
+
+    assert plan.driver == 'age'
+    assert plan.filters == ['gender', 'location', 'age']
+
+
+def test_plan_runs_expensive_filters_first_if_they_are_selective_enough():
+    planner = qp.QueryPlanner(costs={'gender': 1.0, 'location': 2.0, 'age': 1.0})
+
+    plan = planner.plan({'gender': 900, 'location': 10, 'age': 5}, 1000)
+
+    assert plan.filters == ['location', 'gender', 'age']
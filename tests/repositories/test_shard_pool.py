@@ -0,0 +1,69 @@
+import multiprocessing
+import os
+
+from wgp_demo.repositories import shard_pool as shp
+
+
+def load_state(value):
+    return {'value': value, 'pid': os.getpid()}
+
+
+def add_value(state, task):
+    return state['value'] + task
+
+
+def get_pid(state, task):
+    return os.getpid()
+
+
+def test_shard_ranges_cover_the_rows():
+    assert shp.shard_ranges(10, 3) == [(0, 3), (3, 6), (6, 10)]
+    assert shp.shard_ranges(2, 4) == [(0, 0), (0, 1), (1, 1), (1, 2)]
+    assert shp.shard_ranges(0, 2) == [(0, 0), (0, 0)]
+
+
+def test_map_runs_tasks_in_the_workers_with_the_inherited_state():
+    pool = shp.ShardPool(2, load_state, (100,))
+
+    try:
+        assert pool.map(lambda: {'value': 1}, add_value, [1, 2, 3]) == [2, 3, 4]
+        assert os.getpid() not in pool.map(lambda: {'value': 1}, get_pid, [1, 2])
+    finally:
+        pool.close()
+
+
+def test_map_keeps_the_workers_it_started():
+    pool = shp.ShardPool(2, load_state, (100,))
+
+    try:
+        pids = set(pool.map(lambda: {'value': 1}, get_pid, [1, 2, 3, 4]))
+        # The state is only taken when the workers start
+        assert pool.map(lambda: {'value': 2}, add_value, [0]) == [1]
+        assert len(multiprocessing.active_children()) == 2
+        assert set(pool.map(lambda: {'value': 2}, get_pid, [1, 2, 3, 4])) | pids <= set(
+            process.pid for process in multiprocessing.active_children()
+        )
+    finally:
+        pool.close()
+
+    assert multiprocessing.active_children() == []
+
+
+def test_map_runs_the_tasks_in_the_calling_process_if_the_pool_is_closed():
+    pool = shp.ShardPool(2, load_state, (100,))
+    running_pool = pool._get_pool(lambda: {'value': 1})
+    running_pool.close()
+
+    assert pool.map(lambda: {'value': 5}, add_value, [1, 2]) == [6, 7]
+    assert pool.map(lambda: {'value': 5}, get_pid, [1]) == [os.getpid()]
+
+    pool.close()
+
+
+def test_workers_load_the_state_if_not_inherited():
+    shp._init_worker(-1, load_state, (100,))
+
+    try:
+        assert shp._run_task((add_value, 1)) == 101
+    finally:
+        shp._worker_state = None
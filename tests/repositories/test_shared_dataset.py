@@ -0,0 +1,192 @@
+import os
+import pytest
+import tempfile
+import shutil
+import json
+import multiprocessing
+
+import numpy as np
+
+from wgp_demo.repositories import artist_dataset as ads
+from wgp_demo.repositories import artist_json_repository as ajr
+from wgp_demo.repositories import shared_dataset as sds
+
+pytestmark = pytest.mark.skipif(sds.shared_memory is None, reason='requires multiprocessing.shared_memory')
+
+data_dict = {
+    'artists': [
+        {
+            'uuid': 'f853578c-fc0f-4e65-81b8-566c5dffa35a',
+            'gender': 'F',
+            'age': 39,
+            'longitude': '-0.09998975',
+            'latitude': '51.75436293',
+            'rate': 14.21
+        },
+        {
+            'uuid': 'fe2c3195-aeff-487a-a08f-e0bdc0ec6e9a',
+            'gender': 'M',
+            'age': 66,
+            'longitude': '0.18228006',
+            'latitude': '51.74640997',
+            'rate': 39.5
+        },
+        {
+            'uuid': '913694c6-435a-4366-ba0d-da5334a611b2',
+            'gender': 'M',
+            'age': 60,
+            'longitude': '0.27891577',
+            'latitude': '51.45994069',
+            'rate': 27.77
+        }
+    ]
+}
+
+new_artist = {
+    'uuid': 'eed76e77-55c1-41ce-985d-ca49bf6c0585',
+    'gender': 'M',
+    'age': 48,
+    'longitude': 0.33894476,
+    'latitude': 51.39916678,
+    'rate': 30.44
+}
+
+
+@pytest.fixture
+def temp_empty_dir(request):
+    tempdir = tempfile.mkdtemp()
+
+    def fin():
+        shutil.rmtree(tempdir)
+
+    request.addfinalizer(fin)
+    return tempdir
+
+
+@pytest.fixture
+def temp_json_file(temp_empty_dir):
+    filepath = os.path.join(temp_empty_dir, "artists.json")
+    with open(filepath, 'w') as f:
+        f.write(json.dumps(data_dict))
+
+    return filepath
+
+
+@pytest.fixture
+def shared(request):
+    """Shares datasets for the test, releasing their segments after it."""
+    segments = []
+
+    def share(dataset):
+        segment = sds.share(dataset)
+        segments.append(segment)
+        return segment
+
+    def fin():
+        for segment in segments:
+            sds.release(segment)
+
+    request.addfinalizer(fin)
+    return share
+
+
+def test_attach_returns_the_shared_dataset(shared):
+    dataset = ads.ArtistDataset.from_dict(data_dict, version='v1')
+
+    attached = sds.attach(shared(dataset).name)
+
+    assert attached.version == 'v1'
+    assert attached.genders == dataset.genders
+    arrays = dataset.get_arrays()
+    attached_arrays = attached.get_arrays()
+    assert sorted(attached_arrays) == sorted(arrays)
+    for name, array in arrays.items():
+        assert attached_arrays[name].dtype == array.dtype
+        assert np.array_equal(attached_arrays[name], array)
+
+
+def test_attached_arrays_are_read_only(shared):
+    attached = sds.attach(shared(ads.ArtistDataset.from_dict(data_dict)).name)
+
+    assert not attached.age.flags.writeable
+    assert not attached.location_index.order.flags.writeable
+    assert not attached.rate_index.sorted_values.flags.writeable
+
+
+def test_attached_dataset_can_be_changed_into_a_new_one(shared):
+    dataset = ads.ArtistDataset.from_dict(data_dict)
+    attached = sds.attach(shared(dataset).name)
+
+    changed, created = attached.upsert(dict(new_artist, gender='X'))
+    changed = changed.delete(data_dict['artists'][0]['uuid'])
+
+    assert created is True
+    assert len(attached) == 3
+    assert changed.find(new_artist['uuid']) == 2
+
+
+def _count_artists(name, counts):
+    counts.put(len(sds.attach(name)))
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason='requires fork')
+def test_forked_processes_attach_to_the_dataset(shared):
+    segment = shared(ads.ArtistDataset.from_dict(data_dict))
+    context = multiprocessing.get_context('fork')
+    counts = context.Queue()
+
+    processes = [context.Process(target=_count_artists, args=(segment.name, counts)) for _ in range(2)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert [counts.get(timeout=5) for _ in processes] == [3, 3]
+
+
+def test_attach_to_a_released_dataset_fails():
+    segment = sds.share(ads.ArtistDataset.from_dict(data_dict))
+    sds.release(segment)
+
+    with pytest.raises(FileNotFoundError):
+        sds.attach(segment.name)
+
+
+def test_repository_uses_the_shared_dataset_at_its_version(temp_json_file, shared):
+    version = ajr.ArtistJsonRepository(temp_json_file).data.version
+    # Different artists at the version of the file, to tell the shared dataset from the file
+    segment = shared(ads.ArtistDataset.from_records(data_dict['artists'][:2], version=version))
+
+    repo = ajr.ArtistJsonRepository(temp_json_file, shared_dataset=segment.name)
+
+    assert len(repo.list()) == 2
+    assert repo.shared_dataset == segment.name
+
+
+def test_repository_loads_the_file_if_the_shared_dataset_is_outdated(temp_json_file, shared):
+    segment = shared(ads.ArtistDataset.from_records(data_dict['artists'][:2], version='old'))
+
+    repo = ajr.ArtistJsonRepository(temp_json_file, shared_dataset=segment.name)
+
+    assert len(repo.list()) == 3
+    assert repo.shared_dataset is None
+
+
+def test_repository_loads_the_file_if_the_shared_dataset_is_gone(temp_json_file):
+    segment = sds.share(ads.ArtistDataset.from_dict(data_dict))
+    sds.release(segment)
+
+    repo = ajr.ArtistJsonRepository(temp_json_file, shared_dataset=segment.name)
+
+    assert len(repo.list()) == 3
+    assert repo.shared_dataset is None
+
+
+def test_repository_applies_new_changes_over_the_shared_dataset(temp_json_file, shared):
+    segment = shared(ajr.ArtistJsonRepository(temp_json_file).data)
+    repo = ajr.ArtistJsonRepository(temp_json_file, shared_dataset=segment.name)
+
+    ajr.ArtistJsonRepository(temp_json_file).upsert(new_artist)
+
+    assert [artist.uuid for artist in repo.list()][-1] == new_artist['uuid']
+    assert repo.shared_dataset == segment.name
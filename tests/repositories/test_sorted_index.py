@@ -0,0 +1,61 @@
+import numpy as np
+
+from wgp_demo.repositories import sorted_index as soi
+
+
+def test_range_with_minimum_and_maximum():
+    index = soi.SortedIndex(np.array([39, 66, 60, 48, 39]))
+
+    start, stop = index.range(39, 48)
+
+    assert stop - start == 3
+    assert list(index.rows(start, stop)) == [0, 3, 4]
+
+
+def test_range_with_maximum_only():
+    index = soi.SortedIndex(np.array([14.21, 39.5, 27.77, 30.44]))
+
+    start, stop = index.range(maximum=30.44)
+
+    assert list(index.rows(start, stop)) == [0, 2, 3]
+
+
+def test_range_with_minimum_only():
+    index = soi.SortedIndex(np.array([14.21, 39.5, 27.77, 30.44]))
+
+    start, stop = index.range(minimum=30)
+
+    assert list(index.rows(start, stop)) == [1, 3]
+
+
+def test_empty_range():
+    index = soi.SortedIndex(np.array([39, 66, 60, 48]))
+
+    assert list(index.rows(*index.range(50, 55))) == []
+    assert list(index.rows(*index.range(60, 50))) == []
+
+
+def test_range_matches_a_linear_scan():
+    random_state = np.random.RandomState(42)
+    values = random_state.randint(16, 75, 1000)
+    index = soi.SortedIndex(values)
+
+    for minimum, maximum in [(16, 16), (20, 30), (74, 80), (10, 100)]:
+        expected = np.flatnonzero((values >= minimum) & (values <= maximum))
+        assert list(index.rows(*index.range(minimum, maximum))) == list(expected)
+
+
+def test_insert_update_and_delete_match_a_new_index():
+    values = np.array([39, 66, 60, 48, 39])
+    index = soi.SortedIndex(values)
+
+    inserted = index.insert(5, 48)
+    updated = inserted.update(0, 39, 60)
+    deleted = updated.delete(1, 66)
+
+    assert list(index.order) == list(soi.SortedIndex(values).order)
+    assert list(inserted.order) == list(soi.SortedIndex(np.array([39, 66, 60, 48, 39, 48])).order)
+    assert list(updated.order) == list(soi.SortedIndex(np.array([60, 66, 60, 48, 39, 48])).order)
+    assert list(deleted.order) == list(soi.SortedIndex(np.array([60, 60, 48, 39, 48])).order)
+    assert list(deleted.sorted_values) == [39, 48, 48, 60, 60]
+    assert index.update(0, 39, 39) is index
@@ -0,0 +1,94 @@
+import numpy as np
+
+from wgp_demo.repositories import geo
+from wgp_demo.repositories import spatial_index as spi
+
+
+def random_points(size, seed=42):
+    random_state = np.random.RandomState(seed)
+    return random_state.uniform(-90, 90, size), random_state.uniform(-180, 180, size)
+
+
+def assert_query_contains_all_points_within_radius(index, latitudes, longitudes, latitude, longitude, radius):
+    candidates = index.query(latitude, longitude, radius)
+    distances = geo.great_circle_miles(latitudes, longitudes, latitude, longitude)
+
+    assert set(np.flatnonzero(distances < radius)) <= set(candidates)
+    assert list(candidates) == sorted(candidates)
+
+    return candidates
+
+
+def test_query_returns_only_nearby_candidates():
+    latitudes = np.array([51.75436293, 51.74640997, 40.7127753, -33.8688197])
+    longitudes = np.array([-0.09998975, 0.18228006, -74.0059728, 151.2092955])
+    index = spi.GridIndex(latitudes, longitudes)
+
+    candidates = assert_query_contains_all_points_within_radius(
+        index, latitudes, longitudes, 51.5126064, -0.1802461, 30)
+
+    assert list(candidates) == [0, 1]
+
+
+def test_query_without_candidates():
+    latitudes, longitudes = random_points(100)
+    index = spi.GridIndex(latitudes, longitudes)
+
+    candidates = index.query(0.125, 0.125, 0.1)
+
+    assert len(candidates) == 0
+
+
+def test_query_covers_random_points():
+    latitudes, longitudes = random_points(5000)
+    index = spi.GridIndex(latitudes, longitudes)
+
+    random_state = np.random.RandomState(0)
+    for _ in range(50):
+        latitude, longitude = random_state.uniform(-90, 90), random_state.uniform(-180, 180)
+        radius = random_state.choice([1, 10, 100, 1000, 5000])
+        assert_query_contains_all_points_within_radius(index, latitudes, longitudes, latitude, longitude, radius)
+
+
+def test_query_across_the_antimeridian():
+    latitudes = np.array([10.0, 10.0, 10.0])
+    longitudes = np.array([179.9, -179.9, 0])
+    index = spi.GridIndex(latitudes, longitudes)
+
+    candidates = assert_query_contains_all_points_within_radius(index, latitudes, longitudes, 10, 179.95, 20)
+
+    assert list(candidates) == [0, 1]
+
+
+def test_query_around_a_pole():
+    latitudes = np.array([89.9, 89.9, 80])
+    longitudes = np.array([0, 180, 0])
+    index = spi.GridIndex(latitudes, longitudes)
+
+    candidates = assert_query_contains_all_points_within_radius(index, latitudes, longitudes, 89.95, 90, 50)
+
+    assert list(candidates) == [0, 1]
+
+
+def test_query_with_a_radius_covering_the_earth():
+    latitudes, longitudes = random_points(100)
+    index = spi.GridIndex(latitudes, longitudes)
+
+    assert list(index.query(0, 0, 20000)) == list(range(100))
+
+
+def test_insert_update_and_delete_match_a_new_index():
+    latitudes, longitudes = random_points(100)
+    index = spi.GridIndex(latitudes, longitudes)
+
+    changed = index.insert(100, 51.5, -0.18)
+    changed = changed.update(3, latitudes[3], longitudes[3], -33.9, 151.2)
+    changed = changed.delete(7, latitudes[7], longitudes[7])
+    latitudes = np.delete(np.append(latitudes, 51.5), 7)
+    longitudes = np.delete(np.append(longitudes, -0.18), 7)
+    latitudes[3], longitudes[3] = -33.9, 151.2
+    expected = spi.GridIndex(latitudes, longitudes)
+
+    assert list(changed.order) == list(expected.order)
+    assert list(changed.sorted_cells) == list(expected.sorted_cells)
+    assert list(changed.query(51.5, -0.18, 10)) == list(expected.query(51.5, -0.18, 10))
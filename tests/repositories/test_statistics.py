@@ -0,0 +1,54 @@
+import numpy as np
+
+from wgp_demo.repositories import statistics as sts
+
+
+def test_histogram_estimates_continuous_ranges():
+    values = np.linspace(0, 100, 10001)
+    histogram = sts.Histogram(values)
+
+    assert abs(histogram.estimate_range(maximum=25) - 2500) < 50
+    assert abs(histogram.estimate_range(10, 20) - 1000) < 50
+    assert histogram.estimate_range() == 10001
+    assert histogram.estimate_range(200, 300) == 0
+
+
+def test_histogram_estimates_discrete_ranges():
+    values = np.array([20, 20, 30, 30, 30, 40])
+    histogram = sts.Histogram(values, discrete=True)
+
+    assert abs(histogram.estimate_range(30, 30) - 3) < 1e-9
+    assert abs(histogram.estimate_range(20, 30) - 5) < 1e-9
+    assert histogram.estimate_range(21, 29) == 0
+
+
+def test_histogram_of_equal_values():
+    histogram = sts.Histogram(np.array([14.21, 14.21]))
+
+    assert histogram.estimate_range(maximum=20) == 2
+    assert histogram.estimate_range(maximum=10) == 0
+
+
+def test_histogram_without_values():
+    histogram = sts.Histogram(np.array([]))
+
+    assert histogram.estimate_range(1, 2) == 0
+
+
+def test_histogram_add_and_remove():
+    histogram = sts.Histogram(np.array([20, 20, 30, 30, 30, 40]), discrete=True)
+
+    added = histogram.add(20).add(100)
+    removed = added.remove(30)
+
+    assert abs(added.estimate_range(20, 20) - 3) < 1e-9
+    assert added.estimate_range() == 8
+    assert abs(removed.estimate_range(30, 30) - 2) < 1e-9
+    assert histogram.estimate_range() == 6
+
+
+def test_histogram_without_values_add():
+    histogram = sts.Histogram(np.array([])).add(14.21)
+
+    assert histogram.estimate_range(maximum=20) == 1
+    assert sts.Histogram(np.array([])).remove(14.21).estimate_range() == 0
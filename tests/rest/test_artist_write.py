@@ -0,0 +1,113 @@
+import json
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from wgp_demo.app import create_app
+from wgp_demo.settings import TestConfig
+from wgp_demo.shared import response_object as res
+
+from tests.repositories.test_artist_list_json_repository import data_dict
+
+artist_uuid = '0b8a9d2e-5c5e-4a0c-9f2c-3d1f7a8b6c4e'
+
+artist = {
+    'gender': 'X',
+    'age': 30,
+    'latitude': 51.5,
+    'longitude': -0.15,
+    'rate': 12.5
+}
+
+
+@pytest.fixture
+def write_app(request):
+    tempdir = tempfile.mkdtemp()
+    filepath = os.path.join(tempdir, 'artists.json')
+    with open(filepath, 'w') as f:
+        json.dump(data_dict, f)
+
+    class WriteConfig(TestConfig):
+        JSON_DATA_FILE = filepath
+
+    _app = create_app(WriteConfig)
+
+    def fin():
+        _app.artist_repo.close()
+        shutil.rmtree(tempdir)
+
+    request.addfinalizer(fin)
+    return _app
+
+
+@pytest.fixture
+def write_client(write_app):
+    return write_app.test_client()
+
+
+def send(client, method, uuid, payload):
+    return getattr(client, method)('/artists/' + uuid, data=json.dumps(payload), content_type='application/json')
+
+
+def test_put_adds_then_replaces_an_artist(write_client):
+    created_response = send(write_client, 'put', artist_uuid, artist)
+    replaced_response = send(write_client, 'put', artist_uuid, dict(artist, age=31))
+
+    assert created_response.status_code == 201
+    assert json.loads(created_response.data.decode('UTF-8'))['uuid'] == artist_uuid
+    assert replaced_response.status_code == 200
+    assert json.loads(replaced_response.data.decode('UTF-8'))['age'] == 31
+
+    artists = json.loads(write_client.get('/artists?filter_gender=X').data.decode('UTF-8'))
+    assert [(found['uuid'], found['age']) for found in artists] == [(artist_uuid, 31)]
+
+
+def test_post_does_not_replace_an_artist(write_client):
+    assert send(write_client, 'post', artist_uuid, artist).status_code == 201
+
+    response = send(write_client, 'post', artist_uuid, dict(artist, age=31))
+
+    assert response.status_code == 409
+    assert json.loads(response.data.decode('UTF-8'))['type'] == res.ResponseFailure.CONFLICT_ERROR
+    assert json.loads(write_client.get('/artists?filter_gender=X').data.decode('UTF-8'))[0]['age'] == 30
+
+
+def test_write_with_an_invalid_artist(write_client):
+    response = send(write_client, 'put', artist_uuid, dict(artist, age=-1))
+
+    assert response.status_code == 400
+    assert json.loads(response.data.decode('UTF-8')) == {
+        'type': res.ResponseFailure.PARAMETERS_ERROR,
+        'message': 'age: Is not a non-negative integer'
+    }
+
+
+def test_delete_an_artist(write_client):
+    uuid = data_dict['artists'][0]['uuid']
+
+    response = write_client.delete('/artists/' + uuid)
+
+    assert response.status_code == 204
+    assert response.data == b''
+    assert write_client.get('/artists').headers['X-Total-Count'] == '3'
+    assert write_client.delete('/artists/' + uuid).status_code == 404
+    assert write_client.delete('/artists/cache').status_code == 400
+
+
+def test_writes_change_the_etag_and_the_cached_lists(write_client):
+    response = write_client.get('/artists?filter_gender=X')
+
+    send(write_client, 'put', artist_uuid, artist)
+    changed_response = write_client.get('/artists?filter_gender=X', headers={'If-None-Match': response.headers['ETag']})
+
+    assert json.loads(response.data.decode('UTF-8')) == []
+    assert changed_response.status_code == 200
+    assert len(json.loads(changed_response.data.decode('UTF-8'))) == 1
+
+
+def test_static_routes_are_kept(write_client):
+    assert write_client.get('/artists/cache').status_code == 200
+    assert write_client.post('/artists/batch', data=json.dumps({'queries': []}),
+                             content_type='application/json').status_code == 200
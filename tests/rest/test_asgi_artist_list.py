@@ -0,0 +1,212 @@
+import asyncio
+import gzip
+import json
+import threading
+import time
+
+import mock
+import pytest
+
+from wgp_demo import asgi
+from wgp_demo.shared import response_object as res
+
+
+@pytest.fixture
+def asgi_app(app):
+    _asgi_app = asgi.ArtistAsgiApp(app)
+
+    yield _asgi_app
+
+    _asgi_app.close()
+
+
+async def call(asgi_app, path, query_string=b'', method='GET', headers=None):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': query_string,
+        'headers': headers or []
+    }
+    await asgi_app(scope, receive, send)
+
+    headers = dict((name.decode('latin-1'), value.decode('latin-1')) for name, value in messages[0]['headers'])
+    body = b''.join(message['body'] for message in messages[1:])
+    return messages[0]['status'], headers, body
+
+
+def get(asgi_app, path, query_string=b'', method='GET', headers=None):
+    return asyncio.run(call(asgi_app, path, query_string, method, headers))
+
+
+def test_artist_list_matches_the_flask_endpoint(app, client, asgi_app):
+    status, headers, body = get(asgi_app, '/artists', b'filter_gender=F&filter_age=30,40&weight_age=1&limit=5')
+    response = client.get('/artists?filter_gender=F&filter_age=30,40&weight_age=1&limit=5')
+
+    assert status == 200
+    assert headers['content-type'] == 'application/json'
+    assert headers['x-total-count'] == response.headers['X-Total-Count']
+    assert body == response.data
+
+
+def test_streamed_artist_list_matches_the_flask_endpoint(app, client, asgi_app):
+    app.config['JSON_STREAMING_MIN_ITEMS'] = 10
+
+    status, headers, body = get(asgi_app, '/artists', b'filter_age=30,40&weight_age=1')
+    app.artist_list_cache.clear()
+    response = client.get('/artists?filter_age=30,40&weight_age=1')
+
+    assert status == 200
+    assert len(json.loads(body.decode('UTF-8'))) > 10
+    assert body == response.data
+
+
+def test_artist_list_with_invalid_parameters(asgi_app):
+    status, headers, body = get(asgi_app, '/artists', b'limit=-1')
+
+    assert status == 400
+    assert json.loads(body.decode('UTF-8')) == {
+        'type': res.ResponseFailure.PARAMETERS_ERROR,
+        'message': 'limit: Is not a non-negative integer'
+    }
+
+
+def test_unknown_path_and_method(asgi_app):
+    assert get(asgi_app, '/artist')[0] == 404
+
+    status, headers, body = get(asgi_app, '/artists', method='POST')
+    assert status == 405
+    assert headers['allow'] == 'GET'
+
+
+def test_cors_headers(asgi_app):
+    status, headers, body = get(asgi_app, '/artists', b'limit=1', headers=[(b'origin', b'http://example.com')])
+
+    assert headers['access-control-allow-origin'] == '*'
+    assert headers['access-control-expose-headers'] == 'X-Total-Count'
+
+
+def test_server_timing_and_callback(app, asgi_app):
+    app.config['SERVER_TIMING_HEADER'] = True
+    calls = []
+    app.timing_callback = lambda description, timings: calls.append(description)
+
+    status, headers, body = get(asgi_app, '/artists', b'filter_gender=F&limit=5')
+
+    assert 'repository' in headers['server-timing']
+    assert calls == ['GET /artists?filter_gender=F&limit=5']
+
+
+def test_not_modified_artist_list_has_no_server_timing(app, asgi_app):
+    app.config['SERVER_TIMING_HEADER'] = True
+    status, headers, body = get(asgi_app, '/artists', b'filter_gender=F&limit=5')
+
+    status, not_modified_headers, body = get(asgi_app, '/artists', b'filter_gender=F&limit=5',
+                                             headers=[(b'if-none-match', headers['etag'].encode('latin-1'))])
+
+    assert status == 304
+    assert 'server-timing' not in not_modified_headers
+
+
+def test_queries_run_in_the_executor_within_the_concurrency_limit(app):
+    app.config['ASGI_MAX_CONCURRENT_QUERIES'] = 2
+    asgi_app = asgi.ArtistAsgiApp(app)
+    running = []
+    max_running = []
+    threads = set()
+    lock = threading.Lock()
+
+    def execute(request_object):
+        with lock:
+            running.append(request_object)
+            max_running.append(len(running))
+            threads.add(threading.current_thread())
+        time.sleep(0.05)
+        with lock:
+            running.remove(request_object)
+        return res.ResponseSuccess([])
+
+    async def run_requests():
+        return await asyncio.gather(*[call(asgi_app, '/artists') for _ in range(6)])
+
+    try:
+        with mock.patch('wgp_demo.use_cases.artist_use_cases.ArtistListUseCase') as mock_use_case:
+            mock_use_case().execute.side_effect = execute
+            results = asyncio.run(run_requests())
+    finally:
+        asgi_app.close()
+
+    assert [result[0] for result in results] == [200] * 6
+    assert max(max_running) == 2
+    assert threading.main_thread() not in threads
+
+
+def test_lifespan_closes_the_repository(app, asgi_app):
+    app.artist_repo.close = mock.Mock()
+    messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message['type'])
+
+    asyncio.run(asgi_app({'type': 'lifespan'}, receive, send))
+
+    assert sent == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+    assert app.artist_repo.close.called
+
+
+def test_artist_list_not_modified(asgi_app):
+    status, headers, body = get(asgi_app, '/artists', b'filter_gender=F&limit=5')
+    status, not_modified_headers, body = get(asgi_app, '/artists', b'filter_gender=F&limit=5',
+                                             headers=[(b'if-none-match', headers['etag'].encode('latin-1'))])
+
+    assert status == 304
+    assert body == b''
+    assert not_modified_headers['etag'] == headers['etag']
+    assert 'content-type' not in not_modified_headers
+
+
+def test_artist_list_validator_failure_matches_the_flask_endpoint(app, client, asgi_app):
+    with mock.patch.object(app.artist_repo, 'get_version', side_effect=OSError('No such file')):
+        flask_response = client.get('/artists?filter_gender=F')
+        status, headers, body = get(asgi_app, '/artists', b'filter_gender=F')
+
+    assert status == flask_response.status_code == 500
+    assert headers['content-type'] == 'application/json'
+    assert body == flask_response.data
+
+
+def test_artist_list_etag_is_the_one_of_the_version_listed(app, asgi_app):
+    status, headers, body = get(asgi_app, '/artists', b'filter_gender=F&limit=5')
+
+    # A write between the version check and the listing: the artists are listed from the newer dataset
+    with mock.patch.object(app.artist_repo, 'get_version', return_value='older version'):
+        status, listed_headers, listed_body = get(asgi_app, '/artists', b'filter_gender=F&limit=5')
+
+    assert status == 200
+    assert listed_headers['etag'] == headers['etag']
+    assert listed_body == body
+
+
+def test_compressed_artist_list(asgi_app, client):
+    status, headers, body = get(asgi_app, '/artists', b'filter_gender=F', headers=[(b'accept-encoding', b'gzip')])
+    status, cached_headers, cached_body = get(asgi_app, '/artists', b'filter_gender=F',
+                                              headers=[(b'accept-encoding', b'gzip')])
+
+    assert status == 200
+    assert headers['content-encoding'] == 'gzip'
+    assert headers['vary'] == 'Accept-Encoding'
+    assert gzip.decompress(body) == client.get('/artists?filter_gender=F').data
+    assert cached_headers['content-encoding'] == 'gzip'
+    assert cached_body == body
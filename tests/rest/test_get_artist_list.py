@@ -1,9 +1,11 @@
+import gzip
 import json
 import mock
 
 import pytest
 from flask import Response
 
+from wgp_demo.serializers import artist_serializer as asr
 from wgp_demo.shared import response_object as res
 
 
@@ -57,13 +59,12 @@ def not_empty_response_object(not_empty_artist_list):
     return res.ResponseSuccess(not_empty_artist_list)
 
 
-def test_use_case_correctly_initialized(client, not_empty_response_object):
-    with mock.patch('wgp_demo.repositories.artist_json_repository.ArtistJsonRepository') as mock_repo:
-        with mock.patch('wgp_demo.use_cases.artist_use_cases.ArtistListUseCase') as mock_use_case:
-            mock_use_case().execute.return_value = not_empty_response_object
-            client.get('/artists')
+def test_use_case_correctly_initialized(app, client, not_empty_response_object):
+    with mock.patch('wgp_demo.use_cases.artist_use_cases.ArtistListUseCase') as mock_use_case:
+        mock_use_case().execute.return_value = not_empty_response_object
+        client.get('/artists')
 
-        mock_use_case.assert_called_with(mock_repo())
+    mock_use_case.assert_called_with(app.artist_repo, app.artist_list_cache)
 
 
 def test_artist_list(client, not_empty_response_object):
@@ -92,7 +93,7 @@ def test_empty_artist_list(client, empty_response_object):
 
 
 def test_request_object_initialisation_and_use_without_parameters(client, empty_response_object):
-    internal_request_object = mock.Mock()
+    internal_request_object = mock.Mock(fields=None)
 
     with mock.patch('wgp_demo.use_cases.artist_use_cases.ArtistListUseCase') as mock_use_case:
         mock_use_case().execute.return_value = empty_response_object
@@ -105,7 +106,7 @@ def test_request_object_initialisation_and_use_without_parameters(client, empty_
 
 
 def test_request_object_initialisation_and_use_with_filters(client, empty_response_object):
-    internal_request_object = mock.Mock()
+    internal_request_object = mock.Mock(fields=None)
 
     with mock.patch('wgp_demo.use_cases.artist_use_cases.ArtistListUseCase') as mock_use_case:
         mock_use_case().execute.return_value = empty_response_object
@@ -119,7 +120,7 @@ def test_request_object_initialisation_and_use_with_filters(client, empty_respon
 
 
 def test_request_object_initialisation_and_use_with_weights(client, empty_response_object):
-    internal_request_object = mock.Mock()
+    internal_request_object = mock.Mock(fields=None)
 
     with mock.patch('wgp_demo.use_cases.artist_use_cases.ArtistListUseCase') as mock_use_case:
         mock_use_case().execute.return_value = empty_response_object
@@ -133,7 +134,7 @@ def test_request_object_initialisation_and_use_with_weights(client, empty_respon
 
 
 def test_request_object_initialisation_and_use_with_filters_andweights(client, empty_response_object):
-    internal_request_object = mock.Mock()
+    internal_request_object = mock.Mock(fields=None)
 
     with mock.patch('wgp_demo.use_cases.artist_use_cases.ArtistListUseCase') as mock_use_case:
         mock_use_case().execute.return_value = empty_response_object
@@ -146,3 +147,269 @@ def test_request_object_initialisation_and_use_with_filters_andweights(client, e
         'weights': {'param1': 'value3', 'param2': 'value4'}
     })
     mock_use_case().execute.assert_called_with(internal_request_object)
+
+
+def test_request_object_initialisation_and_use_with_pagination(client, empty_response_object):
+    internal_request_object = mock.Mock(fields=None)
+
+    with mock.patch('wgp_demo.use_cases.artist_use_cases.ArtistListUseCase') as mock_use_case:
+        mock_use_case().execute.return_value = empty_response_object
+        with mock.patch('wgp_demo.use_cases.request_object.ArtistListRequestObject') as mock_request_object:
+            mock_request_object.from_dict.return_value = internal_request_object
+            client.get('/artists?filter_param1=value1&limit=20&offset=40')
+
+    mock_request_object.from_dict.assert_called_with({
+        'filters': {'param1': 'value1'},
+        'weights': {},
+        'limit': '20',
+        'offset': '40'
+    })
+    mock_use_case().execute.assert_called_with(internal_request_object)
+
+
+def test_artist_list_with_invalid_pagination(client):
+    response = client.get('/artists?limit=-1')
+
+    assert response.status_code == 400
+    assert json.loads(response.data.decode('UTF-8'))['message'] == 'limit: Is not a non-negative integer'
+
+
+def test_artist_list_reports_total_count(client):
+    response = client.get('/artists?filter_gender=F&limit=5')
+
+    artists = json.loads(response.data.decode('UTF-8'))
+    assert response.status_code == 200
+    assert len(artists) == 5
+    assert response.headers['X-Total-Count'] == '500'
+
+
+def test_artist_list_cache_stats(client):
+    client.get('/artists?filter_gender=F')
+    client.get('/artists?filter_gender=F')
+
+    response = client.get('/artists/cache')
+
+    stats = json.loads(response.data.decode('UTF-8'))
+    assert response.status_code == 200
+    assert stats['size'] == 1
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+
+
+def test_streamed_artist_list_has_the_same_content(app, client):
+    app.config['JSON_STREAMING_MIN_ITEMS'] = 10
+
+    streamed_response = client.get('/artists?filter_age=30,40&weight_age=1')
+    app.config['JSON_STREAMING_MIN_ITEMS'] = None
+    app.artist_list_cache.clear()
+    response = client.get('/artists?filter_age=30,40&weight_age=1')
+
+    assert streamed_response.status_code == 200
+    assert len(json.loads(streamed_response.data.decode('UTF-8'))) > 10
+    assert streamed_response.data == response.data
+
+
+def test_artist_list_has_no_server_timing_by_default(client):
+    response = client.get('/artists?filter_gender=F&limit=5')
+
+    assert 'Server-Timing' not in response.headers
+
+
+def test_artist_list_server_timing(app, client):
+    app.config['SERVER_TIMING_HEADER'] = True
+
+    response = client.get('/artists?filter_gender=F&filter_age=30,40&limit=5')
+
+    stages = [metric.split(';')[0] for metric in response.headers['Server-Timing'].split(', ')]
+    for stage in ['cache', 'repository', 'load', 'plan', 'select', 'filter_age', 'filter_gender',
+                  'normalize', 'order', 'build', 'serialize']:
+        assert stage in stages
+
+
+def test_not_modified_artist_list_has_no_server_timing(app, client):
+    app.config['SERVER_TIMING_HEADER'] = True
+    etag = client.get('/artists?filter_gender=F&limit=5').headers['ETag']
+
+    response = client.get('/artists?filter_gender=F&limit=5', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert 'Server-Timing' not in response.headers
+
+
+def test_artist_list_timing_callback(app, client):
+    calls = []
+    app.timing_callback = lambda description, timings: calls.append((description, timings.durations))
+
+    response = client.get('/artists?filter_gender=F&limit=5')
+    response.close()
+
+    assert 'Server-Timing' not in response.headers
+    assert len(calls) == 1
+    assert calls[0][0] == 'GET /artists?filter_gender=F&limit=5'
+    assert 'repository' in calls[0][1]
+
+
+def test_artist_list_with_fields(client):
+    response = client.get('/artists?filter_gender=F&limit=5&fields=uuid,distance,global_rank')
+    all_fields_response = client.get('/artists?filter_gender=F&limit=5')
+
+    artists = json.loads(response.data.decode('UTF-8'))
+    assert response.status_code == 200
+    assert [sorted(artist) for artist in artists] == [['distance', 'global_rank', 'uuid']] * 5
+    assert artists == [
+        {'uuid': artist['uuid'], 'distance': artist['distance'], 'global_rank': artist['global_rank']}
+        for artist in json.loads(all_fields_response.data.decode('UTF-8'))
+    ]
+
+
+def test_artist_list_with_all_fields_is_unchanged(app, client):
+    fields = 'global_rank,rate_rank,age_rank,distance_rank,distance,rate,longitude,latitude,age,gender,uuid'
+    response = client.get('/artists?filter_location=51.5126064,-0.1802461,10&weight_distance=1&fields=' + fields)
+    default_response = client.get('/artists?filter_location=51.5126064,-0.1802461,10&weight_distance=1')
+    artists = app.artist_repo.list(filters={'location': '51.5126064,-0.1802461,10'}, weights={'distance': '1'})
+
+    assert response.data == default_response.data
+    assert response.data == json.dumps(artists, cls=asr.ArtistEncoder).encode('utf-8')
+
+
+def test_artist_list_with_invalid_fields(client):
+    response = client.get('/artists?fields=uuid,password')
+
+    assert response.status_code == 400
+    assert json.loads(response.data.decode('UTF-8')) == {
+        'type': res.ResponseFailure.PARAMETERS_ERROR,
+        'message': 'fields: Has unknown fields: password'
+    }
+
+
+def test_artist_list_has_validators(app, client):
+    response = client.get('/artists?filter_gender=F&limit=5')
+
+    assert response.headers['ETag'].startswith('W/"')
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert 'Last-Modified' in response.headers
+    assert client.get('/artists?limit=5&filter_gender=F').headers['ETag'] == response.headers['ETag']
+    assert client.get('/artists?filter_gender=M&limit=5').headers['ETag'] != response.headers['ETag']
+    assert client.get('/artists?filter_gender=F&limit=5&fields=uuid').headers['ETag'] != response.headers['ETag']
+
+
+def test_artist_list_not_modified_does_not_query_the_repository(app, client):
+    etag = client.get('/artists?filter_gender=F&limit=5').headers['ETag']
+
+    with mock.patch.object(app.artist_repo, 'list') as mock_list:
+        response = client.get('/artists?filter_gender=F&limit=5', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+    assert 'Content-Type' not in response.headers
+    assert not mock_list.called
+
+
+def test_artist_list_validator_failure(app, client):
+    with mock.patch.object(app.artist_repo, 'get_version', side_effect=OSError('No such file')):
+        response = client.get('/artists?filter_gender=F')
+
+    assert response.status_code == 500
+    assert json.loads(response.data.decode('UTF-8')) == {
+        'type': res.ResponseFailure.SYSTEM_ERROR,
+        'message': 'OSError: No such file'
+    }
+
+
+def test_artist_list_is_sent_again_when_the_dataset_changes(app, client):
+    response = client.get('/artists?filter_gender=F&limit=5')
+
+    with mock.patch.object(app.artist_repo, 'get_version', return_value='another version'), \
+            mock.patch.object(app.artist_repo.data, 'version', 'another version'):
+        changed_response = client.get('/artists?filter_gender=F&limit=5',
+                                      headers={'If-None-Match': response.headers['ETag']})
+
+    assert changed_response.status_code == 200
+    assert changed_response.data == response.data
+    assert changed_response.headers['ETag'] != response.headers['ETag']
+
+
+def test_artist_list_if_modified_since(client):
+    last_modified = client.get('/artists?limit=1').headers['Last-Modified']
+
+    assert client.get('/artists?limit=1', headers={'If-Modified-Since': last_modified}).status_code == 304
+    assert client.get('/artists?limit=1', headers={
+        'If-Modified-Since': 'Thu, 01 Jan 1970 00:00:00 GMT'}).status_code == 200
+
+
+def test_invalid_artist_list_request_has_no_validators(client):
+    response = client.get('/artists?limit=-1', headers={'If-None-Match': '*'})
+
+    assert response.status_code == 400
+    assert 'ETag' not in response.headers
+
+
+def test_artist_list_is_compressed_for_clients_accepting_gzip(client):
+    response = client.get('/artists?filter_gender=F')
+    gzip_response = client.get('/artists?filter_gender=F', headers={'Accept-Encoding': 'gzip, deflate'})
+
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert gzip_response.headers['Content-Encoding'] == 'gzip'
+    assert gzip_response.headers['X-Total-Count'] == response.headers['X-Total-Count']
+    assert gzip.decompress(gzip_response.data) == response.data
+
+
+def test_small_artist_list_is_not_compressed(client):
+    response = client.get('/artists?filter_gender=F&limit=1&fields=uuid', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in response.headers
+    assert json.loads(response.data.decode('UTF-8'))[0]['uuid']
+
+
+def test_artist_list_compression_disabled(app, client):
+    app.config['GZIP_MIN_SIZE'] = None
+
+    response = client.get('/artists?filter_gender=F', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in response.headers
+    assert 'Vary' not in response.headers
+
+
+def test_compressed_artist_list_is_cached(app, client):
+    app.config['JSON_STREAMING_MIN_ITEMS'] = 10
+    response = client.get('/artists?filter_age=30,40&weight_age=1', headers={'Accept-Encoding': 'gzip'})
+    body = response.data
+
+    with mock.patch.object(app.artist_repo, 'list') as mock_list:
+        cached_response = client.get('/artists?weight_age=1&filter_age=30,40', headers={'Accept-Encoding': 'gzip'})
+
+    assert not mock_list.called
+    assert cached_response.data == body
+    assert cached_response.headers['ETag'] == response.headers['ETag']
+    assert cached_response.headers['X-Total-Count'] == response.headers['X-Total-Count']
+    assert len(app.gzip_cache) == 1
+
+    with mock.patch.object(app.artist_repo, 'get_version', return_value='another version'), \
+            mock.patch.object(app.artist_repo.data, 'version', 'another version'):
+        changed_response = client.get('/artists?filter_age=30,40&weight_age=1', headers={'Accept-Encoding': 'gzip'})
+
+    assert changed_response.headers['ETag'] != response.headers['ETag']
+    assert gzip.decompress(changed_response.data) == gzip.decompress(body)
+
+
+def test_compressed_artist_list_is_cached_under_the_version_it_was_listed_from(app, client):
+    app.config['JSON_STREAMING_MIN_ITEMS'] = 10
+    response = client.get('/artists?filter_age=30,40&weight_age=1', headers={'Accept-Encoding': 'gzip'})
+    etag, body = response.headers['ETag'], response.data
+    app.gzip_cache.clear()
+
+    # A write between the version check and the listing: the artists are listed from the newer dataset
+    with mock.patch.object(app.artist_repo, 'get_version', return_value='older version'):
+        response = client.get('/artists?filter_age=30,40&weight_age=1', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['ETag'] == etag
+    assert response.data == body
+
+    with mock.patch.object(app.artist_repo, 'list') as mock_list:
+        cached_response = client.get('/artists?filter_age=30,40&weight_age=1', headers={'Accept-Encoding': 'gzip'})
+
+    assert not mock_list.called
+    assert cached_response.data == body
+    assert len(app.gzip_cache) == 1
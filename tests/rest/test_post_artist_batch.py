@@ -0,0 +1,87 @@
+import json
+import mock
+
+from wgp_demo.shared import response_object as res
+
+
+def post_batch(client, payload):
+    return client.post('/artists/batch', data=json.dumps(payload), content_type='application/json')
+
+
+def test_batch_use_case_correctly_initialized(app, client):
+    with mock.patch('wgp_demo.use_cases.artist_use_cases.ArtistBatchUseCase') as mock_use_case:
+        mock_use_case().execute.return_value = res.ResponseSuccess([])
+        post_batch(client, {'queries': []})
+
+    mock_use_case.assert_called_with(app.artist_repo, app.artist_list_cache)
+
+
+def test_batch_request_object_gets_string_values(client):
+    internal_request_object = mock.Mock(requests=[])
+
+    with mock.patch('wgp_demo.use_cases.artist_use_cases.ArtistBatchUseCase') as mock_use_case:
+        mock_use_case().execute.return_value = res.ResponseSuccess([])
+        with mock.patch('wgp_demo.use_cases.request_object.ArtistBatchRequestObject') as mock_request_object:
+            mock_request_object.from_dict.return_value = internal_request_object
+            post_batch(client, {'queries': [{'filters': {'age': 30}, 'weights': {'age': 1}, 'limit': 5}]})
+
+    mock_request_object.from_dict.assert_called_with(
+        {'queries': [{'filters': {'age': '30'}, 'weights': {'age': '1'}, 'limit': 5}]})
+    mock_use_case().execute.assert_called_with(internal_request_object)
+
+
+def test_batch_returns_a_result_per_query(client):
+    queries = [
+        {'filters': {'gender': 'F', 'age': '30,40'}, 'weights': {'age': '1'}, 'limit': '5'},
+        {'filters': {'location': '51.5126064,-0.1802461,10'}, 'weights': {'distance': '1'}, 'limit': '3'},
+        {'filters': {'location': '51.5126064,-0.1802461,20'}, 'weights': {'distance': '1'}, 'limit': '3'},
+    ]
+
+    response = post_batch(client, {'queries': queries})
+
+    assert response.status_code == 200
+    results = json.loads(response.data.decode('UTF-8'))
+    assert len(results) == len(queries)
+
+    for query, result in zip(queries, results):
+        parameters = dict(('filter_' + name, value) for name, value in query['filters'].items())
+        parameters.update(('weight_' + name, value) for name, value in query['weights'].items())
+        parameters['limit'] = query['limit']
+        single_response = client.get('/artists', query_string=parameters)
+
+        assert result['artists'] == json.loads(single_response.data.decode('UTF-8'))
+        assert result['total'] >= len(result['artists'])
+
+
+def test_batch_returns_the_fields_of_each_query(client):
+    queries = [
+        {'filters': {'gender': 'F'}, 'limit': 2, 'fields': 'uuid,global_rank'},
+        {'filters': {'gender': 'F'}, 'limit': 2}
+    ]
+
+    response = post_batch(client, {'queries': queries})
+
+    results = json.loads(response.data.decode('UTF-8'))
+    single_response = client.get('/artists', query_string={'filter_gender': 'F', 'limit': 2,
+                                                            'fields': 'global_rank,uuid'})
+    assert results[0]['artists'] == json.loads(single_response.data.decode('UTF-8'))
+    assert [list(artist) for artist in results[0]['artists']] == [['uuid', 'global_rank']] * 2
+    assert len(results[1]['artists'][0]) == 11
+    assert results[0]['total'] == results[1]['total']
+
+
+def test_batch_with_invalid_queries(client):
+    response = post_batch(client, {'queries': [{'limit': '-1'}]})
+
+    assert response.status_code == 400
+    assert json.loads(response.data.decode('UTF-8')) == {
+        'type': res.ResponseFailure.PARAMETERS_ERROR,
+        'message': 'queries.0.limit: Is not a non-negative integer'
+    }
+
+
+def test_batch_without_a_json_body(client):
+    response = client.post('/artists/batch', data='queries')
+
+    assert response.status_code == 400
+    assert json.loads(response.data.decode('UTF-8'))['message'] == 'queries: Is not a list'
@@ -1,4 +1,5 @@
 import json
+import pytest
 
 from wgp_demo.serializers import artist_serializer as asr
 from wgp_demo.domain import models as domod
@@ -53,3 +54,58 @@ def test_serialize_domain_artist_with_ranks():
     """
 
     assert json.loads(json.dumps(artist, cls=asr.ArtistEncoder)) == json.loads(expected_json)
+
+
+def _artists():
+    artist_1 = domod.Artist('f853578c-fc0f-4e65-81b8-566c5dffa35a', gender='F', age=39, longitude='-0.09998975',
+                            latitude='51.75436293', rate=14.21)
+
+    artist_2 = domod.Artist('fe2c3195-aeff-487a-a08f-e0bdc0ec6e9a', gender='M', age=66, longitude='0.18228006',
+                            latitude='51.74640997', rate=39)
+    artist_2.distance = 22.427583701757253
+    artist_2.age_rank = 1
+    artist_2.distance_rank = 0.3333333333333333
+    artist_2.rate_rank = 1e-20
+    artist_2.global_rank = 0.5
+
+    artist_3 = domod.Artist(u'caf\xe9, "quoted"', gender='X, Y', age=0, longitude='0', latitude='-0', rate=float('inf'))
+    artist_3.distance = float('nan')
+
+    return [artist_1, artist_2, artist_3]
+
+
+def test_artist_serializer_matches_the_artist_encoder():
+    artists = _artists()
+
+    assert asr.ArtistSerializer().encode(artists) == json.dumps(artists, cls=asr.ArtistEncoder)
+    assert asr.ArtistSerializer(asr.ArtistSerializer.FIELDS).encode(artists[:2]) == json.dumps(
+        artists[:2], cls=asr.ArtistEncoder)
+    assert asr.ArtistSerializer().encode([]) == '[]'
+
+
+def test_artist_serializer_with_fields():
+    artists = _artists()[:2]
+
+    encoded = asr.ArtistSerializer(['global_rank', 'uuid', 'distance']).encode(artists)
+
+    assert encoded == json.dumps([
+        {'uuid': artist.uuid, 'distance': artist.distance, 'global_rank': artist.global_rank} for artist in artists
+    ])
+
+
+def test_artist_serializer_needs_fields():
+    with pytest.raises(ValueError):
+        asr.ArtistSerializer(['name'])
+
+
+def test_artist_serializer_encodes_other_items_with_the_artist_encoder():
+    items = _artists()[:1] + [{'uuid': 'a'}]
+
+    assert asr.ArtistSerializer(['uuid']).encode(items) == json.dumps(items, cls=asr.ArtistEncoder)
+
+
+def test_artist_serializer_to_dicts_matches_its_encoding():
+    artists = _artists()[:2]
+    serializer = asr.ArtistSerializer(['global_rank', 'uuid', 'distance'])
+
+    assert json.dumps(serializer.to_dicts(artists)) == serializer.encode(artists)
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Test the sharing of the dataset with the workers of a pre-forking server."""
+import json
+import os
+
+import pytest
+
+from wgp_demo import prefork
+from wgp_demo.app import SHARED_DATASET_VARIABLE, create_app
+from wgp_demo.repositories import artist_snapshot as asn
+from wgp_demo.repositories import shared_dataset as sds
+from wgp_demo.settings import TestConfig
+
+pytestmark = pytest.mark.skipif(sds.shared_memory is None, reason='requires multiprocessing.shared_memory')
+
+artists = [
+    {'uuid': 'f853578c-fc0f-4e65-81b8-566c5dffa35a', 'gender': 'F', 'age': 39, 'longitude': -0.09998975,
+     'latitude': 51.75436293, 'rate': 14.21},
+    {'uuid': 'fe2c3195-aeff-487a-a08f-e0bdc0ec6e9a', 'gender': 'M', 'age': 66, 'longitude': 0.18228006,
+     'latitude': 51.74640997, 'rate': 39.5}
+]
+
+
+@pytest.fixture
+def config(tmpdir):
+    filepath = str(tmpdir.join('artists.json'))
+    with open(filepath, 'w') as f:
+        json.dump({'artists': artists}, f)
+
+    class PreforkConfig(TestConfig):
+        JSON_DATA_FILE = filepath
+
+    yield PreforkConfig
+
+    prefork.release_dataset()
+
+
+def test_share_dataset_publishes_the_dataset(config):
+    assert prefork.share_dataset(config) == 2
+
+    name = os.environ[SHARED_DATASET_VARIABLE]
+    app = create_app(config)
+
+    assert app.artist_repo.shared_dataset == name
+    assert app.artist_repo.data.version == sds.attach(name).version
+    assert len(app.artist_repo.list()) == 2
+
+
+def test_share_dataset_again_replaces_the_dataset(config):
+    prefork.share_dataset(config)
+    name = os.environ[SHARED_DATASET_VARIABLE]
+
+    prefork.share_dataset(config)
+
+    assert os.environ[SHARED_DATASET_VARIABLE] != name
+    with pytest.raises(FileNotFoundError):
+        sds.attach(name)
+
+
+def test_release_dataset(config):
+    prefork.share_dataset(config)
+    name = os.environ[SHARED_DATASET_VARIABLE]
+
+    prefork.release_dataset()
+
+    assert SHARED_DATASET_VARIABLE not in os.environ
+    with pytest.raises(FileNotFoundError):
+        sds.attach(name)
+
+
+def test_snapshots_are_not_shared(config, tmpdir):
+    filepath = str(tmpdir.join('artists.snapshot'))
+    asn.compile_snapshot(config.JSON_DATA_FILE, filepath)
+    config.JSON_DATA_FILE = filepath
+
+    assert prefork.share_dataset(config) is None
+    assert SHARED_DATASET_VARIABLE not in os.environ
@@ -50,3 +50,196 @@ def test_build_file_list_request_object_from_dict_with_weights():
 
     assert req.weights == {'a': 2, 'b': 3}
     assert bool(req) is True
+
+
+def test_build_artist_list_request_object_without_pagination():
+    req = ro.ArtistListRequestObject.from_dict({})
+
+    assert req.limit is None
+    assert req.offset is None
+    assert bool(req) is True
+
+
+def test_build_artist_list_request_object_from_dict_with_pagination():
+    req = ro.ArtistListRequestObject.from_dict({'limit': '20', 'offset': '40'})
+
+    assert req.limit == 20
+    assert req.offset == 40
+    assert bool(req) is True
+
+
+def test_build_artist_list_request_object_from_dict_with_invalid_pagination():
+    req = ro.ArtistListRequestObject.from_dict({'limit': '-1', 'offset': 'a'})
+
+    assert bool(req) is False
+    assert req.errors == [
+        {'parameter': 'limit', 'message': 'Is not a non-negative integer'},
+        {'parameter': 'offset', 'message': 'Is not a non-negative integer'}
+    ]
+
+
+def test_artist_list_request_object_cache_key_is_canonical():
+    req1 = ro.ArtistListRequestObject.from_dict({
+        'filters': {'age': '30,40', 'gender': 'F'},
+        'weights': {'age': '1', 'rate': '0'}
+    })
+    req2 = ro.ArtistListRequestObject.from_dict({
+        'filters': {'gender': 'F', 'age': '30,40'},
+        'weights': {'age': '1.0'},
+        'offset': '0'
+    })
+
+    assert req1.cache_key() == req2.cache_key()
+    assert hash(req1.cache_key()) == hash(req2.cache_key())
+
+
+def test_artist_list_request_object_cache_key_depends_on_parameters():
+    req = ro.ArtistListRequestObject.from_dict({'filters': {'gender': 'F'}})
+
+    assert req.cache_key() != ro.ArtistListRequestObject.from_dict({'filters': {'gender': 'M'}}).cache_key()
+    assert req.cache_key() != ro.ArtistListRequestObject.from_dict(
+        {'filters': {'gender': 'F'}, 'weights': {'age': '1'}}).cache_key()
+    assert req.cache_key() != ro.ArtistListRequestObject.from_dict(
+        {'filters': {'gender': 'F'}, 'limit': '10'}).cache_key()
+
+
+def test_build_artist_batch_request_object_from_dict():
+    req = ro.ArtistBatchRequestObject.from_dict({'queries': [
+        {'filters': {'gender': 'F'}, 'weights': {'age': '1'}, 'limit': '5'},
+        {}
+    ]})
+
+    assert bool(req) is True
+    assert len(req.requests) == 2
+    assert req.requests[0].filters == {'gender': 'F'}
+    assert req.requests[0].weights == {'age': '1'}
+    assert req.requests[0].limit == 5
+    assert req.requests[1].filters is None
+
+
+def test_build_artist_batch_request_object_without_queries():
+    req = ro.ArtistBatchRequestObject.from_dict({'queries': None})
+
+    assert bool(req) is False
+    assert req.errors == [{'parameter': 'queries', 'message': 'Is not a list'}]
+
+
+def test_build_artist_batch_request_object_with_too_many_queries():
+    req = ro.ArtistBatchRequestObject.from_dict({'queries': [{}] * (ro.ArtistBatchRequestObject.MAX_QUERIES + 1)})
+
+    assert bool(req) is False
+    assert req.errors == [{'parameter': 'queries', 'message': 'Has more than 100 queries'}]
+
+
+def test_build_artist_batch_request_object_with_invalid_queries():
+    req = ro.ArtistBatchRequestObject.from_dict({'queries': [
+        {'limit': '10'},
+        'gender=F',
+        {'filters': ['gender'], 'offset': '-1'}
+    ]})
+
+    assert bool(req) is False
+    assert req.errors == [
+        {'parameter': 'queries.1', 'message': 'Is not an object'},
+        {'parameter': 'queries.2.filters', 'message': 'Is not an object'},
+        {'parameter': 'queries.2.offset', 'message': 'Is not a non-negative integer'}
+    ]
+
+
+def test_build_artist_list_request_object_with_fields():
+    req = ro.ArtistListRequestObject.from_dict({'fields': 'uuid, distance,global_rank'})
+
+    assert bool(req) is True
+    assert req.fields == ['uuid', 'distance', 'global_rank']
+    assert ro.ArtistListRequestObject.from_dict({}).fields is None
+
+
+def test_build_artist_list_request_object_with_invalid_fields():
+    req = ro.ArtistListRequestObject.from_dict({'fields': 'uuid,name,email'})
+
+    assert bool(req) is False
+    assert req.errors == [{'parameter': 'fields', 'message': 'Has unknown fields: name, email'}]
+
+    req = ro.ArtistListRequestObject.from_dict({'fields': ' , '})
+
+    assert bool(req) is False
+    assert req.errors == [{'parameter': 'fields', 'message': 'Is empty'}]
+
+
+def test_artist_list_request_object_cache_key_does_not_depend_on_fields():
+    req = ro.ArtistListRequestObject.from_dict({'filters': {'gender': 'F'}, 'fields': 'uuid'})
+
+    assert req.cache_key() == ro.ArtistListRequestObject.from_dict({'filters': {'gender': 'F'}}).cache_key()
+
+
+def artist_payload(**values):
+    artist = {
+        'gender': 'F',
+        'age': 39,
+        'latitude': '51.75436293',
+        'longitude': '-0.09998975',
+        'rate': 14.21
+    }
+    artist.update(values)
+    return artist
+
+
+def test_build_artist_write_request_object_from_dict():
+    req = ro.ArtistWriteRequestObject.from_dict({
+        'uuid': 'F853578C-FC0F-4E65-81B8-566C5DFFA35A',
+        'artist': artist_payload(uuid='f853578c-fc0f-4e65-81b8-566c5dffa35a', gender=' F ')
+    })
+
+    assert bool(req) is True
+    assert req.artist == {
+        'uuid': 'f853578c-fc0f-4e65-81b8-566c5dffa35a',
+        'gender': 'F',
+        'age': 39,
+        'latitude': 51.75436293,
+        'longitude': -0.09998975,
+        'rate': 14.21
+    }
+
+
+def test_build_artist_write_request_object_without_artist():
+    req = ro.ArtistWriteRequestObject.from_dict({'uuid': 'f853578c-fc0f-4e65-81b8-566c5dffa35a', 'artist': None})
+
+    assert bool(req) is False
+    assert req.errors == [{'parameter': 'artist', 'message': 'Is not an object'}]
+
+
+def test_build_artist_write_request_object_with_invalid_attributes():
+    req = ro.ArtistWriteRequestObject.from_dict({
+        'uuid': 'f853578c',
+        'artist': artist_payload(gender='', age=39.5, latitude=91, longitude='east', rate=-1)
+    })
+
+    assert bool(req) is False
+    assert req.errors == [
+        {'parameter': 'uuid', 'message': 'Is not a valid UUID'},
+        {'parameter': 'gender', 'message': 'Is not a non-empty string'},
+        {'parameter': 'age', 'message': 'Is not a non-negative integer'},
+        {'parameter': 'latitude', 'message': 'Is not a latitude'},
+        {'parameter': 'longitude', 'message': 'Is not a longitude'},
+        {'parameter': 'rate', 'message': 'Is not a non-negative number'}
+    ]
+
+
+def test_build_artist_write_request_object_with_another_uuid():
+    req = ro.ArtistWriteRequestObject.from_dict({
+        'uuid': 'f853578c-fc0f-4e65-81b8-566c5dffa35a',
+        'artist': artist_payload(uuid='fe2c3195-aeff-487a-a08f-e0bdc0ec6e9a')
+    })
+
+    assert bool(req) is False
+    assert req.errors == [{'parameter': 'uuid', 'message': 'Does not match the uuid of the artist'}]
+
+
+def test_build_artist_delete_request_object_from_dict():
+    req = ro.ArtistDeleteRequestObject.from_dict({'uuid': 'f853578c-fc0f-4e65-81b8-566c5dffa35a'})
+    invalid_req = ro.ArtistDeleteRequestObject.from_dict({'uuid': 'batch'})
+
+    assert bool(req) is True
+    assert req.uuid == 'f853578c-fc0f-4e65-81b8-566c5dffa35a'
+    assert bool(invalid_req) is False
+    assert invalid_req.errors == [{'parameter': 'uuid', 'message': 'Is not a valid UUID'}]
@@ -2,6 +2,7 @@ import mock
 import pytest
 
 from wgp_demo.domain import models as domod
+from wgp_demo.shared import cache
 from wgp_demo.use_cases import request_object as ro
 from wgp_demo.use_cases import artist_use_cases as suc
 
@@ -57,7 +58,7 @@ def test_artist_list_without_parameters(domain_artists):
     response_object = artist_list_use_case.execute(request_object)
 
     assert bool(response_object) is True
-    artist_repo.list.assert_called_with(filters=None, weights=None)
+    artist_repo.list.assert_called_with(filters=None, weights=None, limit=None, offset=None)
 
     assert response_object.value == domain_artists
 
@@ -73,7 +74,7 @@ def test_artist_list_with_filters(domain_artists):
     response_object = artist_list_use_case.execute(request_object)
 
     assert bool(response_object) is True
-    artist_repo.list.assert_called_with(filters=qry_filters, weights=None)
+    artist_repo.list.assert_called_with(filters=qry_filters, weights=None, limit=None, offset=None)
     assert response_object.value == domain_artists
 
 
@@ -88,7 +89,7 @@ def test_artist_list_with_weights(domain_artists):
     response_object = artist_list_use_case.execute(request_object)
 
     assert bool(response_object) is True
-    artist_repo.list.assert_called_with(filters=None, weights=qry_weights)
+    artist_repo.list.assert_called_with(filters=None, weights=qry_weights, limit=None, offset=None)
     assert response_object.value == domain_artists
 
 
@@ -109,10 +110,37 @@ def test_artist_list_with_filters_and_weights(domain_artists):
     response_object = artist_list_use_case.execute(request_object)
 
     assert bool(response_object) is True
-    artist_repo.list.assert_called_with(filters=qry_filters, weights=qry_weights)
+    artist_repo.list.assert_called_with(filters=qry_filters, weights=qry_weights, limit=None, offset=None)
     assert response_object.value == domain_artists
 
 
+def test_artist_list_with_limit_and_offset(domain_artists):
+    artist_repo = mock.Mock()
+    artist_repo.list.return_value = domain_artists[1:3]
+
+    artist_list_use_case = suc.ArtistListUseCase(artist_repo)
+    request_object = ro.ArtistListRequestObject.from_dict({'limit': '2', 'offset': '1'})
+
+    response_object = artist_list_use_case.execute(request_object)
+
+    assert bool(response_object) is True
+    artist_repo.list.assert_called_with(filters=None, weights=None, limit=2, offset=1)
+    assert response_object.value == domain_artists[1:3]
+
+
+def test_artist_list_with_invalid_limit():
+    artist_repo = mock.Mock()
+
+    artist_list_use_case = suc.ArtistListUseCase(artist_repo)
+    request_object = ro.ArtistListRequestObject.from_dict({'limit': 'abc'})
+
+    response_object = artist_list_use_case.execute(request_object)
+
+    assert bool(response_object) is False
+    assert response_object.message == 'limit: Is not a non-negative integer'
+    assert not artist_repo.list.called
+
+
 def test_artist_list_handles_generic_error():
     artist_repo = mock.Mock()
     artist_repo.list.side_effect = Exception
@@ -123,3 +151,148 @@ def test_artist_list_handles_generic_error():
     response_object = artist_list_use_case.execute(request_object)
 
     assert bool(response_object) is False
+
+
+def test_artist_list_with_cache(domain_artists):
+    artist_repo = mock.Mock()
+    artist_repo.list.return_value = domain_artists
+    artist_repo.get_version.return_value = 'v1'
+    artist_list_cache = cache.LRUCache(maxsize=10)
+
+    artist_list_use_case = suc.ArtistListUseCase(artist_repo, artist_list_cache)
+
+    response_object_1 = artist_list_use_case.execute(ro.ArtistListRequestObject.from_dict({'filters': {'a': 5}}))
+    response_object_2 = artist_list_use_case.execute(ro.ArtistListRequestObject.from_dict({'filters': {'a': 5}}))
+
+    assert artist_repo.list.call_count == 1
+    assert response_object_1.value == domain_artists
+    assert response_object_2.value == domain_artists
+    assert artist_list_cache.hits == 1
+    assert artist_list_cache.misses == 1
+
+
+def test_artist_list_cache_is_invalidated_when_the_dataset_changes(domain_artists):
+    artist_repo = mock.Mock()
+    artist_repo.list.return_value = domain_artists
+    artist_repo.get_version.return_value = 'v1'
+    artist_list_cache = cache.LRUCache(maxsize=10)
+
+    artist_list_use_case = suc.ArtistListUseCase(artist_repo, artist_list_cache)
+    artist_list_use_case.execute(ro.ArtistListRequestObject.from_dict({}))
+
+    artist_repo.get_version.return_value = 'v2'
+    artist_list_use_case.execute(ro.ArtistListRequestObject.from_dict({}))
+
+    assert artist_repo.list.call_count == 2
+    assert artist_list_cache.invalidations == 1
+
+
+def test_artist_list_is_not_cached_if_the_dataset_changes_while_listed(domain_artists):
+    artist_repo = mock.Mock()
+    artist_repo.get_version.return_value = 'v1'
+    artist_list_cache = cache.LRUCache(maxsize=10)
+
+    def list_during_a_write(**kwargs):
+        # A write, seen by another request, lands while the artists of v1 are listed
+        artist_repo.get_version.return_value = 'v2'
+        artist_list_cache.set_version('v2')
+        return domod.ArtistList(domain_artists, version='v1')
+
+    artist_repo.list.side_effect = list_during_a_write
+    artist_list_use_case = suc.ArtistListUseCase(artist_repo, artist_list_cache)
+
+    response_object = artist_list_use_case.execute(ro.ArtistListRequestObject.from_dict({}))
+
+    assert response_object.value == domain_artists
+    assert len(artist_list_cache) == 0
+
+    artist_repo.list.side_effect = None
+    artist_repo.list.return_value = domod.ArtistList(domain_artists[1:], version='v2')
+    assert artist_list_use_case.execute(ro.ArtistListRequestObject.from_dict({})).value == domain_artists[1:]
+    assert artist_list_use_case.execute(ro.ArtistListRequestObject.from_dict({})).value == domain_artists[1:]
+    assert artist_repo.list.call_count == 2
+
+
+def test_artist_list_does_not_cache_errors():
+    artist_repo = mock.Mock()
+    artist_repo.list.side_effect = Exception
+    artist_list_cache = cache.LRUCache(maxsize=10)
+
+    artist_list_use_case = suc.ArtistListUseCase(artist_repo, artist_list_cache)
+    response_object = artist_list_use_case.execute(ro.ArtistListRequestObject.from_dict({}))
+
+    assert bool(response_object) is False
+    assert len(artist_list_cache) == 0
+
+
+def test_artist_batch_returns_a_result_per_request(domain_artists):
+    artist_repo = mock.Mock()
+    artist_repo.list_batch.return_value = [domain_artists[:2], domain_artists[2:]]
+
+    artist_batch_use_case = suc.ArtistBatchUseCase(artist_repo)
+    request_object = ro.ArtistBatchRequestObject.from_dict({'queries': [
+        {'filters': {'gender': 'F'}, 'limit': '2'},
+        {'filters': {'gender': 'M'}},
+        {'filters': {'gender': 'F'}, 'limit': '2'}
+    ]})
+
+    response_object = artist_batch_use_case.execute(request_object)
+
+    assert bool(response_object) is True
+    assert response_object.value == [domain_artists[:2], domain_artists[2:], domain_artists[:2]]
+    artist_repo.list_batch.assert_called_with([
+        {'filters': {'gender': 'F'}, 'weights': None, 'limit': 2, 'offset': None},
+        {'filters': {'gender': 'M'}, 'weights': None, 'limit': None, 'offset': None}
+    ])
+
+
+def test_artist_batch_with_cache(domain_artists):
+    artist_repo = mock.Mock()
+    artist_repo.list.return_value = domain_artists[:2]
+    artist_repo.list_batch.return_value = [domain_artists[2:]]
+    artist_repo.get_version.return_value = 'v1'
+    artist_list_cache = cache.LRUCache(maxsize=10)
+
+    suc.ArtistListUseCase(artist_repo, artist_list_cache).execute(
+        ro.ArtistListRequestObject.from_dict({'filters': {'gender': 'F'}}))
+
+    artist_batch_use_case = suc.ArtistBatchUseCase(artist_repo, artist_list_cache)
+    response_object = artist_batch_use_case.execute(ro.ArtistBatchRequestObject.from_dict({'queries': [
+        {'filters': {'gender': 'M'}},
+        {'filters': {'gender': 'F'}}
+    ]}))
+
+    assert response_object.value == [domain_artists[2:], domain_artists[:2]]
+    artist_repo.list_batch.assert_called_with([
+        {'filters': {'gender': 'M'}, 'weights': None, 'limit': None, 'offset': None}
+    ])
+    assert artist_list_cache.get(
+        ro.ArtistListRequestObject.from_dict({'filters': {'gender': 'M'}}).cache_key()) == domain_artists[2:]
+
+
+def test_artist_batch_is_not_cached_if_the_dataset_changes_while_listed(domain_artists):
+    artist_repo = mock.Mock()
+    artist_repo.get_version.return_value = 'v1'
+    artist_list_cache = cache.LRUCache(maxsize=10)
+
+    def list_batch_during_a_write(queries):
+        artist_list_cache.set_version('v2')
+        return [domod.ArtistList(domain_artists, version='v1')]
+
+    artist_repo.list_batch.side_effect = list_batch_during_a_write
+    artist_batch_use_case = suc.ArtistBatchUseCase(artist_repo, artist_list_cache)
+
+    response_object = artist_batch_use_case.execute(ro.ArtistBatchRequestObject.from_dict({'queries': [{}]}))
+
+    assert response_object.value == [domain_artists]
+    assert len(artist_list_cache) == 0
+
+
+def test_artist_batch_handles_generic_error():
+    artist_repo = mock.Mock()
+    artist_repo.list_batch.side_effect = Exception
+
+    artist_batch_use_case = suc.ArtistBatchUseCase(artist_repo)
+    response_object = artist_batch_use_case.execute(ro.ArtistBatchRequestObject.from_dict({'queries': [{}]}))
+
+    assert bool(response_object) is False
@@ -0,0 +1,67 @@
+import mock
+
+from wgp_demo.shared import response_object as res
+from wgp_demo.use_cases import request_object as ro
+from wgp_demo.use_cases import artist_use_cases as suc
+
+artist_uuid = 'f853578c-fc0f-4e65-81b8-566c5dffa35a'
+
+
+def write_request_object():
+    return ro.ArtistWriteRequestObject.from_dict({
+        'uuid': artist_uuid,
+        'artist': {'gender': 'F', 'age': 39, 'latitude': '51.75436293', 'longitude': '-0.09998975', 'rate': 14.21}
+    })
+
+
+def test_artist_write_adds_an_artist():
+    artist_repo = mock.Mock()
+    artist_repo.upsert.return_value = True
+    request_object = write_request_object()
+
+    response_object = suc.ArtistWriteUseCase(artist_repo).execute(request_object)
+
+    assert bool(response_object) is True
+    assert response_object.value.created is True
+    assert response_object.value.artist.uuid == artist_uuid
+    assert response_object.value.artist.latitude == 51.75436293
+    artist_repo.upsert.assert_called_with(request_object.artist, replace=True)
+
+
+def test_artist_write_without_replace_conflicts_with_an_existing_artist():
+    artist_repo = mock.Mock()
+    artist_repo.upsert.return_value = None
+
+    response_object = suc.ArtistWriteUseCase(artist_repo, replace=False).execute(write_request_object())
+
+    assert bool(response_object) is False
+    assert response_object.value == {
+        'type': res.ResponseFailure.CONFLICT_ERROR,
+        'message': 'Artist {} already exists'.format(artist_uuid)
+    }
+    artist_repo.upsert.assert_called_with(mock.ANY, replace=False)
+
+
+def test_artist_write_with_invalid_request():
+    artist_repo = mock.Mock()
+
+    response_object = suc.ArtistWriteUseCase(artist_repo).execute(
+        ro.ArtistWriteRequestObject.from_dict({'uuid': artist_uuid}))
+
+    assert bool(response_object) is False
+    assert response_object.type == res.ResponseFailure.PARAMETERS_ERROR
+    assert not artist_repo.upsert.called
+
+
+def test_artist_delete():
+    artist_repo = mock.Mock()
+    artist_repo.delete.side_effect = [True, False]
+    request_object = ro.ArtistDeleteRequestObject.from_dict({'uuid': artist_uuid})
+
+    response_object = suc.ArtistDeleteUseCase(artist_repo).execute(request_object)
+    missing_response_object = suc.ArtistDeleteUseCase(artist_repo).execute(request_object)
+
+    assert bool(response_object) is True
+    assert bool(missing_response_object) is False
+    assert missing_response_object.type == res.ResponseFailure.RESOURCE_ERROR
+    artist_repo.delete.assert_called_with(artist_uuid)
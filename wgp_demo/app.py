@@ -1,28 +1,105 @@
 # -*- coding: utf-8 -*-
 
 import os
-from flask import Flask
+from flask import Flask, request
 from flask_cors import CORS
 
 from wgp_demo.settings import DevConfig, ProdConfig
+from wgp_demo.shared import cache
+from wgp_demo.shared import http_response as hres
+from wgp_demo.shared import timing
 from wgp_demo.rest import artists
+from wgp_demo.repositories import artist_json_repository as ajr
+from wgp_demo.repositories import artist_sqlite_repository as asq
+
+# Name of the artist dataset shared in memory by the process that forked this one, see wgp_demo/prefork.py
+SHARED_DATASET_VARIABLE = 'WGP_DEMO_SHARED_DATASET'
 
 
 def create_app(config_object=DevConfig):
     """An application factory, as explained here: http://flask.pocoo.org/docs/patterns/appfactories/"""
     app = Flask(__name__)
     app.config.from_object(config_object)
-    CORS(app)
+    CORS(app, expose_headers=[hres.HttpResponse.TOTAL_COUNT_HEADER])
+    register_repositories(app)
+    register_caches(app)
+    register_timing(app)
     register_blueprints(app)
     return app
 
 
+def register_repositories(app):
+    if app.config.get('SQLITE_DATA_FILE'):
+        app.artist_repo = asq.ArtistSqliteRepository(app.config['SQLITE_DATA_FILE'])
+    else:
+        app.artist_repo = ajr.ArtistJsonRepository(
+            app.config['JSON_DATA_FILE'],
+            shards=app.config['ARTIST_LIST_SHARDS'],
+            shard_min_rows=app.config['ARTIST_LIST_SHARD_MIN_ROWS'],
+            changelog_filepath=app.config['ARTIST_CHANGE_LOG_FILE'],
+            compact_min_changes=app.config['ARTIST_CHANGE_LOG_COMPACT_SIZE'],
+            shared_dataset=os.environ.get(SHARED_DATASET_VARIABLE)
+        )
+    return None
+
+
+def register_caches(app):
+    app.artist_list_cache = cache.LRUCache(
+        maxsize=app.config['ARTIST_LIST_CACHE_SIZE'],
+        ttl=app.config['ARTIST_LIST_CACHE_TTL']
+    )
+    app.gzip_cache = cache.LRUCache(maxsize=app.config['GZIP_CACHE_SIZE'])
+    return None
+
+
+def register_timing(app):
+    """Collects the timings of the requests when they are sent in a header or to a callback.
+
+    `app.timing_callback`, if not None, is called with a description of the request and
+    its Timings once the response has been sent.
+    """
+    app.timing_callback = timing.log_timings if app.config['TIMING_LOG'] else None
+
+    @app.before_request
+    def start_timing():
+        if app.config['SERVER_TIMING_HEADER'] or app.timing_callback is not None:
+            timing.start()
+        else:
+            timing.stop()
+
+    @app.after_request
+    def send_timings(response):
+        timings = timing.current()
+        if not timings.enabled:
+            return response
+
+        # Not modified and cached responses may run no stage
+        if app.config['SERVER_TIMING_HEADER'] and timings.durations:
+            response.headers[hres.HttpResponse.SERVER_TIMING_HEADER] = timings.server_timing()
+
+        callback = app.timing_callback
+        description = '{} {}'.format(request.method, request.full_path.rstrip('?'))
+
+        def finish():
+            timing.stop()
+            if callback is not None:
+                callback(description, timings)
+
+        response.call_on_close(finish)
+        return response
+
+    return None
+
+
 def register_blueprints(app):
     app.register_blueprint(artists.blueprint)
     return None
 
 
+def get_config_object():
+    return ProdConfig if os.environ.get('WGP_DEMO_ENV') == 'prod' else DevConfig
+
+
 def create_and_initialize_app():
-    CONFIG = ProdConfig if os.environ.get('WGP_DEMO_ENV') == 'prod' else DevConfig
-    _app = create_app(CONFIG)
+    _app = create_app(get_config_object())
     return _app
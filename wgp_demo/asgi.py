@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""ASGI entry point of the artist search API.
+
+GET /artists answers with the same contract as the Flask endpoint, using the
+repository, the cache and the configuration of a Flask application. The event loop
+only parses the requests and sends the responses: the use case and the JSON
+encoding run in a thread pool, at most ASGI_MAX_CONCURRENT_QUERIES at a time, so
+that a process keeps accepting connections and serving idle keep-alive clients
+while queries are computed.
+"""
+import asyncio
+import json
+from concurrent import futures
+from urllib.parse import parse_qsl
+
+from wgp_demo.app import create_and_initialize_app
+from wgp_demo.rest import artists
+from wgp_demo.serializers import artist_serializer as asr
+from wgp_demo.shared import http_response as hres
+from wgp_demo.shared import timing
+from wgp_demo.use_cases import artist_use_cases as auc
+from wgp_demo.use_cases import request_object as ro
+
+
+def _get_args(query_string):
+    """Returns the arguments of a query string, with the first value of repeated ones as Flask does."""
+    args = {}
+    for name, value in parse_qsl(query_string.decode('latin-1'), keep_blank_values=True):
+        args.setdefault(name, value)
+
+    return args
+
+
+class ArtistAsgiApp(object):
+    """An ASGI application serving the artists of a Flask application."""
+
+    def __init__(self, app):
+        self.app = app
+        self.max_queries = app.config['ASGI_MAX_CONCURRENT_QUERIES']
+        self.executor = futures.ThreadPoolExecutor(max_workers=self.max_queries)
+
+        # Created in the event loop by the first request
+        self._semaphore = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def close(self):
+        """Waits for the running queries and releases the resources of the repository."""
+        self.executor.shutdown(wait=True)
+        close = getattr(self.app.artist_repo, 'close', None)
+        if close is not None:
+            close()
+
+    async def _run(self, function, *args):
+        """Runs a function in the thread pool, within the limit of concurrent queries."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_queries)
+
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def _http(self, scope, send):
+        if scope['path'] != '/artists':
+            await self._send_error(send, 404, 'Not Found')
+            return
+
+        if scope['method'] != 'GET':
+            await self._send_error(send, 405, 'Method Not Allowed', [(b'allow', b'GET')])
+            return
+
+        request_headers = dict((name.decode('latin-1'), value.decode('latin-1')) for name, value in scope['headers'])
+        response, timings = await self._run(self._list_artists, scope['query_string'], request_headers)
+
+        headers = [
+            (name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in response.headers.items()
+        ]
+        if timings.enabled and self.app.config['SERVER_TIMING_HEADER'] and timings.durations:
+            headers.append((b'server-timing', timings.server_timing().encode('latin-1')))
+        if 'origin' in request_headers:
+            headers.append((b'access-control-allow-origin', b'*'))
+            headers.append((b'access-control-expose-headers', hres.HttpResponse.TOTAL_COUNT_HEADER.encode('latin-1')))
+
+        await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+
+        if response.status_code == 304:
+            await send({'type': 'http.response.body', 'body': b''})
+        elif response.is_streamed:
+            # The chunks of a streamed body are encoded in the thread pool too
+            chunks = response.iter_encoded()
+            while True:
+                chunk = await self._run(next, chunks, None)
+                if chunk is None:
+                    break
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        else:
+            await send({'type': 'http.response.body', 'body': response.get_data()})
+
+        callback = self.app.timing_callback
+        if timings.enabled and callback is not None:
+            query_string = scope['query_string'].decode('latin-1')
+            callback('GET /artists' + ('?' + query_string if query_string else ''), timings)
+
+    def _list_artists(self, query_string, request_headers):
+        """Runs the use case in a thread of the pool, returning the Flask response and its timings.
+
+        Unexpected errors are answered with a system error, as the Flask endpoint does.
+        """
+        if self.app.config['SERVER_TIMING_HEADER'] or self.app.timing_callback is not None:
+            timing.start()
+
+        try:
+            response = self._get_response(query_string, request_headers)
+        except Exception as exc:
+            response = artists.system_error_response(exc)
+        finally:
+            timings = timing.stop()
+
+        return response, timings
+
+    def _get_response(self, query_string, request_headers):
+        request_object = ro.ArtistListRequestObject.from_dict(artists.get_list_parameters(_get_args(query_string)))
+        serializer = asr.ArtistSerializer(getattr(request_object, 'fields', None))
+
+        etag = last_modified = None
+        if request_object:
+            etag, last_modified = artists.get_validators(self.app.artist_repo, request_object)
+            if hres.is_not_modified(etag, last_modified, request_headers.get('if-none-match'),
+                                    request_headers.get('if-modified-since')):
+                return hres.not_modified(etag, last_modified)
+
+            response = artists.get_cached_gzip_response(self.app, etag, request_headers.get('accept-encoding'))
+            if response is not None:
+                return response
+
+        use_case = auc.ArtistListUseCase(self.app.artist_repo, self.app.artist_list_cache)
+        response_object = use_case.execute(request_object)
+        etag, last_modified = artists.get_result_validators(self.app.artist_repo, request_object, response_object,
+                                                            etag, last_modified)
+        response = hres.HttpResponse(response_object).json(
+            asr.ArtistEncoder,
+            stream_min_items=self.app.config['JSON_STREAMING_MIN_ITEMS'],
+            items_encoder=serializer.encode_items,
+            etag=etag,
+            last_modified=last_modified
+        )
+
+        return artists.compress_response(self.app, response, etag, request_headers.get('accept-encoding'))
+
+    async def _send_error(self, send, status, message, headers=None):
+        body = json.dumps({'message': message}).encode('utf-8')
+        headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode('ascii'))] + (
+            headers or []
+        )
+
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def create_and_initialize_asgi_app():
+    return ArtistAsgiApp(create_and_initialize_app())
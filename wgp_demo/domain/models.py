@@ -6,6 +6,12 @@ class DomainModel(ppld.DomainModel):
 
 
 class Artist(object):
+    # One artist is built for every returned row, slots avoid a per-instance __dict__
+    __slots__ = (
+        'uuid', 'gender', 'age', 'latitude', 'longitude', 'rate',
+        'distance', 'distance_rank', 'age_rank', 'rate_rank', 'global_rank'
+    )
+
     def __init__(self, uuid, gender, age, latitude, longitude, rate):
         self.uuid = uuid
         self.gender = gender
@@ -34,3 +40,15 @@ class Artist(object):
 
 
 DomainModel.register(Artist)
+
+
+class ArtistList(list):
+    """A page of artists, along with the total number of artists matching the query.
+
+    `version` is the version of the dataset the artists were listed from, if known.
+    """
+
+    def __init__(self, artists=(), total=None, version=None):
+        super(ArtistList, self).__init__(artists)
+        self.total = len(self) if total is None else total
+        self.version = version
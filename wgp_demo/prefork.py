@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Loading of the artists once for all the workers of a pre-forking server, e.g. gunicorn.
+
+share_dataset(), called by the master process before it forks the workers (see
+gunicorn.conf.py), loads the JSON data file with its change log into shared memory
+and publishes the name of the segment in the SHARED_DATASET_VARIABLE environment
+variable, inherited by the workers. Their repositories attach to the segment
+instead of loading the file: the artists are in memory once, whatever the number
+of workers. A worker loads its own dataset only once the data file or the change
+log no longer match the shared dataset, e.g. after a compaction.
+"""
+import logging
+import os
+
+from wgp_demo.app import SHARED_DATASET_VARIABLE, get_config_object
+from wgp_demo.repositories import artist_json_repository as ajr
+from wgp_demo.repositories import artist_snapshot as asn
+from wgp_demo.repositories import shared_dataset as sds
+
+logger = logging.getLogger(__name__)
+
+# The segment shared by this process
+_segment = None
+
+
+def share_dataset(config_object=None):
+    """Shares the artists served by the configuration with the processes forked next.
+
+    The segment shared by a previous call is released once the new one is ready.
+    Returns the number of artists shared, None if the artists are not served from a
+    JSON data file: SQLite databases and snapshots are shared through the page cache.
+    """
+    global _segment
+    config = config_object or get_config_object()
+
+    if config.SQLITE_DATA_FILE or asn.is_snapshot(config.JSON_DATA_FILE):
+        release_dataset()
+        return None
+
+    repository = ajr.ArtistJsonRepository(
+        config.JSON_DATA_FILE, changelog_filepath=config.ARTIST_CHANGE_LOG_FILE, compact_min_changes=None
+    )
+    segment = sds.share(repository.data)
+
+    release_dataset()
+    _segment = segment
+    os.environ[SHARED_DATASET_VARIABLE] = segment.name
+    logger.info("Shared %d artists of %s in %s", len(repository.data), config.JSON_DATA_FILE, segment.name)
+
+    return len(repository.data)
+
+
+def release_dataset():
+    """Removes the segment shared by share_dataset(), the processes using it keep it until they exit."""
+    global _segment
+    os.environ.pop(SHARED_DATASET_VARIABLE, None)
+
+    segment, _segment = _segment, None
+    if segment is not None:
+        sds.release(segment)
@@ -0,0 +1,292 @@
+import itertools
+
+import numpy as np
+
+from wgp_demo.domain import models as domod
+from wgp_demo.repositories import category_index as cai
+from wgp_demo.repositories import sorted_index as soi
+from wgp_demo.repositories import spatial_index as spi
+from wgp_demo.repositories import statistics as sts
+
+
+class ArtistDataset(object):
+    """Columnar, read-only storage of the artists.
+
+    Every attribute is kept in a NumPy array indexed by row, genders are stored as
+    small integer codes into the `genders` table. Domain models are built only for
+    the rows a query returns. The lookup structures and the statistics used by the
+    filters are built when the dataset is created, unless they are given already
+    built. `version` identifies the data the dataset was loaded from. The columns
+    are read-only arrays, so that no query can change them under the others.
+
+    upsert() and delete() return a new dataset with the change applied, leaving this
+    one untouched for the queries still running on it: the arrays they change are
+    copied, the lookup structures are updated for the changed row instead of being
+    built again.
+    """
+
+    COLUMNS = ['uuid', 'gender_code', 'age', 'latitude', 'longitude', 'rate']
+
+    # Number of records converted to arrays at once by from_records()
+    RECORDS_CHUNK_SIZE = 1 << 13
+
+    INDEXES = {
+        'gender_index': cai.CategoryIndex,
+        'age_index': soi.SortedIndex,
+        'rate_index': soi.SortedIndex,
+        'location_index': spi.GridIndex,
+        'age_histogram': sts.Histogram,
+        'rate_histogram': sts.Histogram
+    }
+
+    def __init__(self, uuid, gender_code, genders, age, latitude, longitude, rate, version=None, indexes=None):
+        self.version = version
+        self.uuid = uuid
+        self.gender_code = gender_code
+        self.genders = tuple(genders)
+        self.age = age
+        self.latitude = latitude
+        self.longitude = longitude
+        self.rate = rate
+
+        for name in self.COLUMNS:
+            getattr(self, name).flags.writeable = False
+
+        if indexes is None:
+            indexes = self._build_indexes()
+
+        for name in self.INDEXES:
+            setattr(self, name, indexes[name])
+
+    def _build_indexes(self):
+        return {
+            'gender_index': cai.CategoryIndex(self.gender_code, len(self.genders)),
+            'age_index': soi.SortedIndex(self.age),
+            'rate_index': soi.SortedIndex(self.rate),
+            'location_index': spi.GridIndex(self.latitude, self.longitude),
+            'age_histogram': sts.Histogram(self.age, discrete=True),
+            'rate_histogram': sts.Histogram(self.rate)
+        }
+
+    def get_arrays(self):
+        """Returns every array of the dataset, columns and indexes, by name."""
+        arrays = dict((name, getattr(self, name)) for name in self.COLUMNS)
+
+        for name in self.INDEXES:
+            for array_name, array in getattr(self, name).get_arrays().items():
+                arrays['{}.{}'.format(name, array_name)] = array
+
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, genders, version=None):
+        """Builds a dataset from the arrays returned by get_arrays(), without rebuilding the indexes."""
+        indexes = {}
+        for name, index_class in cls.INDEXES.items():
+            prefix = name + '.'
+            index_arrays = dict(
+                (array_name[len(prefix):], array) for array_name, array in arrays.items()
+                if array_name.startswith(prefix)
+            )
+            indexes[name] = index_class.from_arrays(index_arrays)
+
+        columns = dict((name, arrays[name]) for name in cls.COLUMNS)
+
+        return cls(genders=genders, version=version, indexes=indexes, **columns)
+
+    @classmethod
+    def from_dict(cls, adict, version=None):
+        return cls.from_records(adict['artists'], version=version)
+
+    @classmethod
+    def from_records(cls, records, version=None, indexes=None):
+        """Builds a dataset from an iterable of artist dictionaries.
+
+        Records are converted to arrays RECORDS_CHUNK_SIZE at a time, so an iterator
+        parsing a large file never has more than a chunk of them alive as Python objects.
+        """
+        genders = {}
+        chunks = dict((name, []) for name in cls.COLUMNS)
+
+        records = iter(records)
+        while True:
+            batch = list(itertools.islice(records, cls.RECORDS_CHUNK_SIZE))
+            for name, chunk in cls._convert_records(batch, genders).items():
+                chunks[name].append(chunk)
+
+            if len(batch) < cls.RECORDS_CHUNK_SIZE:
+                break
+
+        # Codes follow the order in which genders were found, the table is sorted
+        sorted_genders = sorted(genders)
+        code_type = np.min_scalar_type(max(len(genders) - 1, 0))
+        recode = np.zeros(len(genders), dtype=code_type)
+        for gender, code in genders.items():
+            recode[code] = sorted_genders.index(gender)
+
+        # Columns are concatenated one at a time, releasing their chunks
+        columns = {}
+        for name in cls.COLUMNS:
+            columns[name] = np.concatenate(chunks.pop(name))
+
+        columns['gender_code'] = recode[columns['gender_code']]
+
+        return cls(genders=sorted_genders, version=version, indexes=indexes, **columns)
+
+    @staticmethod
+    def _convert_records(records, genders):
+        """Converts a list of artist dictionaries to column arrays, adding new genders to `genders`."""
+        gender_code = [genders.setdefault(str(artist['gender']), len(genders)) for artist in records]
+
+        return {
+            'uuid': np.array([artist['uuid'].encode('utf-8') for artist in records], dtype=bytes),
+            'gender_code': np.array(gender_code, dtype=np.min_scalar_type(max(len(genders) - 1, 0))),
+            'age': np.array([artist['age'] for artist in records], dtype=np.int64),
+            'latitude': np.array([artist['latitude'] for artist in records], dtype=object).astype(np.float64),
+            'longitude': np.array([artist['longitude'] for artist in records], dtype=object).astype(np.float64),
+            'rate': np.array([artist['rate'] for artist in records], dtype=np.float64)
+        }
+
+    def __len__(self):
+        return len(self.age)
+
+    def find(self, uuid):
+        """Returns the row of the artist `uuid`, None if there is none."""
+        rows = np.flatnonzero(self.uuid == uuid.encode('utf-8'))
+        return int(rows[0]) if len(rows) else None
+
+    def iter_records(self):
+        """Yields the artists as dictionaries, in row order."""
+        for row in range(len(self)):
+            yield {
+                'uuid': self.uuid[row].decode('utf-8'),
+                'gender': self.genders[self.gender_code[row]],
+                'age': int(self.age[row]),
+                'latitude': float(self.latitude[row]),
+                'longitude': float(self.longitude[row]),
+                'rate': float(self.rate[row])
+            }
+
+    def _get_parts(self):
+        columns = dict((name, getattr(self, name)) for name in self.COLUMNS)
+        indexes = dict((name, getattr(self, name)) for name in self.INDEXES)
+        return columns, indexes
+
+    def _add_gender(self, gender):
+        """Returns a copy of the dataset whose gender table has `gender`, keeping it sorted."""
+        genders = sorted(self.genders + (gender,))
+        code = genders.index(gender)
+
+        columns, indexes = self._get_parts()
+        gender_code = self.gender_code.astype(np.min_scalar_type(len(genders) - 1))
+        gender_code[gender_code >= code] += 1
+        columns['gender_code'] = gender_code
+        indexes['gender_index'] = self.gender_index.add_category(code)
+
+        return ArtistDataset(genders=genders, version=self.version, indexes=indexes, **columns)
+
+    def _remove_gender(self, code):
+        """Returns a copy of the dataset without the gender `code`, which no artist has anymore."""
+        genders = self.genders[:code] + self.genders[code + 1:]
+
+        columns, indexes = self._get_parts()
+        gender_code = self.gender_code.astype(np.min_scalar_type(max(len(genders) - 1, 0)))
+        gender_code[gender_code > code] -= 1
+        columns['gender_code'] = gender_code
+        indexes['gender_index'] = self.gender_index.remove_category(code)
+
+        return ArtistDataset(genders=genders, version=self.version, indexes=indexes, **columns)
+
+    def _without_gender_if_empty(self, code):
+        """Returns the dataset without the gender `code` if no artist has it, as if loaded from its artists."""
+        return self._remove_gender(code) if not self.gender_index.count(code) else self
+
+    def upsert(self, record, version=None):
+        """Returns a dataset where the artist dictionary `record` is added or replaces the artist with its uuid.
+
+        A replaced artist keeps its row, a new one is added as the last row. Returns the
+        new dataset, at `version`, and whether the artist was added. A gender no artist
+        has anymore is removed.
+        """
+        gender = str(record['gender'])
+        dataset = self if gender in self.genders else self._add_gender(gender)
+
+        genders = dict((name, code) for code, name in enumerate(dataset.genders))
+        values = dict((name, column[0]) for name, column in self._convert_records([record], genders).items())
+        row = dataset.find(record['uuid'])
+        created = row is None
+        columns, indexes = dataset._get_parts()
+
+        if created:
+            row = len(dataset)
+            for name in self.COLUMNS:
+                columns[name] = np.append(columns[name], values[name])
+
+            indexes['gender_index'] = dataset.gender_index.insert(row, values['gender_code'])
+            indexes['age_index'] = dataset.age_index.insert(row, values['age'])
+            indexes['rate_index'] = dataset.rate_index.insert(row, values['rate'])
+            indexes['location_index'] = dataset.location_index.insert(row, values['latitude'], values['longitude'])
+            indexes['age_histogram'] = dataset.age_histogram.add(values['age'])
+            indexes['rate_histogram'] = dataset.rate_histogram.add(values['rate'])
+        else:
+            old_values = dict((name, columns[name][row]) for name in self.COLUMNS)
+            for name in self.COLUMNS:
+                if old_values[name] != values[name]:
+                    columns[name] = columns[name].copy()
+                    columns[name][row] = values[name]
+
+            indexes['gender_index'] = dataset.gender_index.update(
+                row, old_values['gender_code'], values['gender_code']
+            )
+            indexes['age_index'] = dataset.age_index.update(row, old_values['age'], values['age'])
+            indexes['rate_index'] = dataset.rate_index.update(row, old_values['rate'], values['rate'])
+            indexes['location_index'] = dataset.location_index.update(
+                row, old_values['latitude'], old_values['longitude'], values['latitude'], values['longitude']
+            )
+            indexes['age_histogram'] = dataset.age_histogram.remove(old_values['age']).add(values['age'])
+            indexes['rate_histogram'] = dataset.rate_histogram.remove(old_values['rate']).add(values['rate'])
+
+        changed = ArtistDataset(genders=dataset.genders, version=version, indexes=indexes, **columns)
+        if not created and old_values['gender_code'] != values['gender_code']:
+            changed = changed._without_gender_if_empty(int(old_values['gender_code']))
+
+        return changed, created
+
+    def delete(self, uuid, version=None):
+        """Returns a dataset, at `version`, without the artist `uuid`, None if there is no such artist.
+
+        The following rows move up by one. A gender no artist has anymore is removed.
+        """
+        row = self.find(uuid)
+        if row is None:
+            return None
+
+        columns, indexes = self._get_parts()
+        for name in self.COLUMNS:
+            columns[name] = np.delete(columns[name], row)
+
+        indexes['gender_index'] = self.gender_index.delete(row, self.gender_code[row])
+        indexes['age_index'] = self.age_index.delete(row, self.age[row])
+        indexes['rate_index'] = self.rate_index.delete(row, self.rate[row])
+        indexes['location_index'] = self.location_index.delete(row, self.latitude[row], self.longitude[row])
+        indexes['age_histogram'] = self.age_histogram.remove(self.age[row])
+        indexes['rate_histogram'] = self.rate_histogram.remove(self.rate[row])
+
+        deleted = ArtistDataset(genders=self.genders, version=version, indexes=indexes, **columns)
+        return deleted._without_gender_if_empty(int(self.gender_code[row]))
+
+    def get_gender_code(self, gender):
+        try:
+            return self.genders.index(gender)
+        except ValueError:
+            return None
+
+    def artist(self, row):
+        return domod.Artist(
+            uuid=self.uuid[row].decode('utf-8'),
+            gender=self.genders[self.gender_code[row]],
+            age=int(self.age[row]),
+            latitude=float(self.latitude[row]),
+            longitude=float(self.longitude[row]),
+            rate=float(self.rate[row])
+        )
@@ -1,166 +1,584 @@
+import collections
+import contextlib
+import copy
 import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
 
-from geopy.distance import great_circle
+import numpy as np
 
-from wgp_demo.domain import models as domod
+from wgp_demo.repositories import artist_dataset as ads
+from wgp_demo.repositories import artist_ranking as ark
+from wgp_demo.repositories import artist_snapshot as asn
+from wgp_demo.repositories import change_log as chl
+from wgp_demo.repositories import json_stream as jst
+from wgp_demo.repositories import query_planner as qp
+from wgp_demo.repositories import shard_pool as shp
+from wgp_demo.repositories import shared_dataset as sds
+from wgp_demo.shared import timing
 
 
-class ArtistJsonRepository(object):
-    def __init__(self, filepath):
-        with open(filepath) as f:
-            data = f.read()
+logger = logging.getLogger(__name__)
 
-        self.data = json.loads(data)
-        self.ranks = ['age', 'distance', 'rate']
-
-    def _compute_distance(self, artist, latlon):
-        artist_latlon = (artist.latitude, artist.longitude)
-
-        return great_circle(artist_latlon, latlon).miles
-
-    def _normalize_data(self, data):
-        if None in data or len(data) == 0:
-            return data
-
-        min_data = min(data)
-        max_data = max(data)
-
-        norm = max_data - min_data
-        if norm == 0:
-            return [1] * len(data)
+# Queries whose driving filter selects fewer candidate rows run in the calling process
+SHARD_MIN_ROWS = 200000
+
+# The change log of a data file is the data file followed by this suffix, unless given
+CHANGE_LOG_SUFFIX = '.changes'
+
+# Changes in the log that start its compaction into the data file
+COMPACT_MIN_CHANGES = 1000
+
+
+class CentreDistances(object):
+    """Distances from the centres of the location filters of a batch of queries.
+
+    For every centre the distances of the rows within the largest radius queried
+    around it are computed once, for all the queries sharing it.
+    """
+
+    def __init__(self, dataset, radii, compute_distances):
+        self._distances = {}
+        for latlon, radius in radii.items():
+            rows = dataset.location_index.query(latlon[0], latlon[1], radius)
+            distances = compute_distances(dataset.latitude[rows], dataset.longitude[rows], latlon)
+            self._distances[latlon] = (rows, distances)
+
+    def __contains__(self, latlon):
+        return latlon in self._distances
+
+    def within(self, latlon, radius):
+        """Returns the sorted rows closer than `radius` to the centre `latlon`, with their distances."""
+        rows, distances = self._distances[latlon]
+        mask = distances < radius
+        return rows[mask], distances[mask]
+
+    def get(self, latlon, rows):
+        """Returns the distances of the given rows from the centre `latlon`, infinite if not computed."""
+        centre_rows, distances = self._distances[latlon]
+        if len(centre_rows) == 0:
+            return np.full(len(rows), np.inf)
+
+        positions = np.minimum(np.searchsorted(centre_rows, rows), len(centre_rows) - 1)
+        return np.where(centre_rows[positions] == rows, distances[positions], np.inf)
+
+
+def _load_shard_state(filepath, changelog_filepath):
+    return ArtistJsonRepository(filepath, changelog_filepath=changelog_filepath, compact_min_changes=None)
+
+
+def _run_shard(repository, task):
+    if repository.data.version != task[0]:
+        # The dataset changed since the process started, the changes are in the files
+        repository.reload_if_changed()
+    return repository._filter_shard(repository.data, *task)
+
+
+def _write_json_file(filepath, records):
+    """Writes artist dictionaries to a JSON data file, through a temporary file renamed over it."""
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write('{"artists": [')
+            for index, record in enumerate(records):
+                f.write((',\n' if index else '\n') + json.dumps(record))
+            f.write('\n]}\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+        getattr(os, 'replace', os.rename)(temp_path, filepath)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+
+@contextlib.contextmanager
+def _no_lock():
+    yield
+
+
+class ArtistJsonRepository(ark.ArtistRanking):
+    """A repository keeping the artists of a JSON file, or of its snapshot, in memory.
+
+    With `shards` > 1 (0 for one per CPU) the filters of the queries selecting at
+    least `shard_min_rows` candidates run in a pool of as many processes, each on a
+    contiguous shard of the rows; the results are merged and ranked by the calling
+    process, identical to the ones of a query run by it.
+
+    upsert() and delete() change the dataset in memory and append the change to the
+    change log `changelog_filepath`, whose changes are applied over the data file
+    when it is loaded. Other processes serving the same files apply the changes they
+    find appended to the log on their next query. Once the log holds
+    `compact_min_changes` changes (None never) a background thread compacts it: the
+    dataset is written to the data file and the log is emptied. Writes, and loads,
+    wait for a running compaction.
 
-        return [(d - min_data) / norm for d in data]
+    `shared_dataset` is the name of a dataset shared in memory by another process
+    (see shared_dataset), used instead of loading the files while it is at the
+    version of the data file and of the log; changes appended to the log later are
+    applied over it.
+    """
 
-    def _normalize_artist_ranks(self, artist_list):
-        normalized_datasets = []
-
-        for rank in self.ranks:
-            attr = rank + '_rank'
-            normalized_datasets.append(self._normalize_data([getattr(artist, attr) for artist in artist_list]))
-
-        for artist, age_rank, distance_rank, rate_rank in zip(artist_list, *normalized_datasets):
-            artist.age_rank = age_rank
-            artist.distance_rank = distance_rank
-            artist.rate_rank = rate_rank
-
-    def _filter_by_age(self, _filters, artist_list):
-        if 'age' not in _filters:
-            return artist_list
+    def __init__(self, filepath, shards=1, shard_min_rows=SHARD_MIN_ROWS, changelog_filepath=None,
+                 compact_min_changes=COMPACT_MIN_CHANGES, shared_dataset=None):
+        self.filepath = filepath
+        self.shared_dataset = shared_dataset
+        self.change_log = chl.ChangeLog(changelog_filepath or filepath + CHANGE_LOG_SUFFIX)
+        self.compact_min_changes = compact_min_changes
+        self.ranks = ['age', 'distance', 'rate']
 
+        self.planner = qp.QueryPlanner()
+        self._filter_functions = {
+            'gender': self._filter_by_gender,
+            'age': self._filter_by_age,
+            'location': self._filter_by_distance,
+            'rate_max': self._filter_by_rate
+        }
+
+        self._lock = threading.Lock()
+        self._compaction = None
+        self._file_signature = None
+        self._log_state = None
+        self._log_changes = 0
+        self._last_modified = None
+        self.data = None
+        with self._get_log_lock():
+            self._update()
+
+        self.shards = shards or multiprocessing.cpu_count()
+        self.shard_min_rows = shard_min_rows
+        self.shard_pool = shp.ShardPool(
+            self.shards, _load_shard_state, (filepath, self.change_log.filepath)
+        ) if self.shards > 1 else None
+
+    def close(self):
+        """Waits for a running compaction and stops the shard processes, started again if needed."""
+        compaction = self._compaction
+        if compaction is not None:
+            compaction.join()
+
+        if self.shard_pool is not None:
+            self.shard_pool.close()
+
+    def _get_file_signature(self):
+        stat = os.stat(self.filepath)
+        mtime = getattr(stat, 'st_mtime_ns', stat.st_mtime)
+        return (stat.st_ino, mtime, stat.st_size)
+
+    def _get_version(self, file_signature, log_offset):
+        version = '-'.join(str(value) for value in file_signature)
+        return version + '+{}'.format(log_offset) if log_offset else version
+
+    def _get_log_lock(self):
+        # Without a log there are no changes to keep consistent with the data file
+        return self.change_log.lock() if self.change_log.get_signature() is not None else _no_lock()
+
+    def _get_shared_dataset(self, version):
+        """Returns the shared dataset if it is at `version`, else None and it is not used anymore."""
         try:
-            age_min_str, age_max_str = _filters['age'].split(',')
-        except ValueError:
-            age_min_str = age_max_str = _filters['age']
-
-        age_min = int(age_min_str)
-        age_max = int(age_max_str)
-        avg_age = age_min + float(age_max - age_min) / 2
-
-        _artist_list = []
-        for artist in artist_list:
-            if age_max >= artist.age >= age_min:
-                artist.age_rank = avg_age - abs(artist.age - avg_age)
-                _artist_list.append(artist)
-
-        return _artist_list
-
-    def _filter_by_distance(self, _filters, artist_list):
-        if 'location' in _filters:
-            latitude, longitude, radius = _filters['location'].split(',')
-
-            latlon = (float(latitude), float(longitude))
-            radius = float(radius)
-
-            _artist_list = []
-            for artist in artist_list:
-                distance = self._compute_distance(artist, latlon)
-
-                if distance < radius:
-                    if distance == 0:
-                        distance += 10e-5
-                    artist.distance_rank = 1 / distance
-                    artist.distance = distance
-                    _artist_list.append(artist)
-
-            artist_list = _artist_list
-
-        return artist_list
-
-    def _filter_by_rate(self, _filters, artist_list):
-        if 'rate_max' in _filters:
-            _artist_list = []
-            for artist in artist_list:
-                if artist.rate <= float(_filters['rate_max']):
-                    artist.rate_rank = abs(float(_filters['rate_max']) - artist.rate)
-                    _artist_list.append(artist)
-
-            artist_list = _artist_list
-
-        return artist_list
+            dataset = sds.attach(self.shared_dataset)
+        except (OSError, ValueError) as exc:
+            logger.warning(
+                "Cannot attach the shared dataset %s, loading %s: %s", self.shared_dataset, self.filepath, exc
+            )
+            dataset = None
+
+        if dataset is None or dataset.version != version:
+            # The files changed since it was shared, it cannot be at their version anymore
+            self.shared_dataset = None
+            return None
+
+        return dataset
+
+    def _load(self, file_signature, changes, log_offset):
+        """Loads the data file, either a JSON file or a snapshot compiled by artist_snapshot, applying the changes."""
+        version = self._get_version(file_signature, log_offset)
+
+        if self.shared_dataset is not None:
+            dataset = self._get_shared_dataset(version)
+            if dataset is not None:
+                return dataset
+
+        if asn.is_snapshot(self.filepath):
+            dataset = asn.read_snapshot(self.filepath, version=version)
+            if not changes:
+                return dataset
+            return ads.ArtistDataset.from_records(chl.replay(dataset.iter_records(), changes), version=version)
+
+        with open(self.filepath) as f:
+            return ads.ArtistDataset.from_records(
+                chl.replay(jst.iter_items(f, 'artists'), changes), version=version
+            )
+
+    @staticmethod
+    def _apply(dataset, change, version):
+        if change['op'] == chl.UPSERT:
+            return dataset.upsert(change['artist'], version=version)[0]
+
+        return dataset.delete(change['uuid'], version=version) or dataset
+
+    def _update(self):
+        """Brings the dataset up to date with the data file and the change log.
+
+        Changes appended to the log since the last update are applied to the current
+        dataset; if the data file or the log was replaced, the data file is loaded
+        again with all the changes. The caller holds the lock and the one of the log.
+        Returns True if the dataset changed.
+        """
+        file_signature = self._get_file_signature()
+        log_signature = self.change_log.get_signature()
+        if file_signature == self._file_signature and log_signature == self._log_state:
+            return False
+
+        log_inode = log_signature[0] if log_signature is not None else None
+        # Without a log when the dataset was loaded, the one created since then is all new changes
+        known_inode, known_offset = self._log_state or (None, 0)
+        if (self.data is not None and file_signature == self._file_signature and log_signature is not None and
+                known_inode in (None, log_inode) and log_signature[1] > known_offset):
+            changes, log_offset = self.change_log.read(known_offset)
+            if not changes:
+                # The last change is still being written
+                return False
+
+            dataset = self.data
+            version = self._get_version(file_signature, log_offset)
+            for change in changes:
+                dataset = self._apply(dataset, change, version)
+            log_changes = self._log_changes + len(changes)
+        else:
+            changes, log_offset = self.change_log.read() if log_signature is not None else ([], 0)
+            dataset = self._load(file_signature, changes, log_offset)
+            log_changes = len(changes)
+
+        self.data = dataset
+        self._file_signature = file_signature
+        self._log_state = (log_inode, log_offset) if log_signature is not None else None
+        self._log_changes = log_changes
+        self._last_modified = max(self._get_timestamp(file_signature[1]), self.change_log.get_last_modified() or 0)
+
+        return True
+
+    def reload_if_changed(self):
+        """Reloads the data file if its inode, mtime or size changed since the last load.
+
+        Changes appended to the change log meanwhile are applied to the dataset. The
+        new dataset is built aside and then swapped in with a single assignment, so
+        concurrent calls to list() keep working on the snapshot they started with. If the
+        file cannot be parsed (e.g. it is being rewritten in place) the current dataset
+        is kept and the reload is attempted again on the next call.
+        """
+        if (self._get_file_signature() == self._file_signature and
+                self.change_log.get_signature() == self._log_state):
+            return False
+
+        with self._lock:
+            try:
+                with self._get_log_lock():
+                    return self._update()
+            except ValueError as exc:
+                logger.warning("Cannot reload %s, keeping the current dataset: %s", self.filepath, exc)
+                return False
+
+    def get_version(self):
+        """Returns the version of the current dataset, reloading it first if the file changed."""
+        self.reload_if_changed()
+        return self.data.version
+
+    @staticmethod
+    def _get_timestamp(mtime):
+        # Nanoseconds where the platform gives them
+        return mtime / 1e9 if isinstance(mtime, int) else mtime
+
+    def get_last_modified(self):
+        """Returns the modification time of the data file, or of the change log if later, as a timestamp."""
+        return self._last_modified
+
+    def _write(self, change, get_dataset):
+        """Applies a change to the up to date dataset and appends it to the change log.
+
+        `get_dataset(dataset)` returns the changed dataset along with the result of the
+        write, or None to leave the dataset as it is. Returns the result.
+        """
+        with self._lock:
+            with self.change_log.lock():
+                self._update()
+
+                changed = get_dataset(self.data)
+                if changed is None:
+                    return None
+                dataset, result = changed
+
+                log_offset, log_inode, log_mtime = self.change_log.append(change)
+                # Not yet seen by any query
+                dataset.version = self._get_version(self._file_signature, log_offset)
+
+                self.data = dataset
+                self._log_state = (log_inode, log_offset)
+                self._log_changes += 1
+                self._last_modified = max(self._last_modified, log_mtime)
+
+        self._compact_if_needed()
+        return result
+
+    def upsert(self, artist, replace=True):
+        """Adds the artist dictionary `artist`, or replaces the artist with its uuid if `replace`.
+
+        Returns True if the artist was added, False if it replaced another one, None if
+        there is one and `replace` is false.
+        """
+        def get_dataset(dataset):
+            if not replace and dataset.find(artist['uuid']) is not None:
+                return None
+            return dataset.upsert(artist)
+
+        return self._write(chl.upsert(artist), get_dataset)
+
+    def delete(self, uuid):
+        """Deletes the artist `uuid`, returning False if there is no such artist."""
+        def get_dataset(dataset):
+            deleted = dataset.delete(uuid)
+            return (deleted, True) if deleted is not None else None
+
+        return self._write(chl.delete(uuid), get_dataset) or False
+
+    def _compact_if_needed(self):
+        if self.compact_min_changes is None or self._log_changes < self.compact_min_changes:
+            return
+
+        with self._lock:
+            if self._compaction is not None and self._compaction.is_alive():
+                return
+            self._compaction = threading.Thread(target=self._compact_in_background, name='artist-compaction')
+            self._compaction.daemon = True
+            self._compaction.start()
+
+    def _compact_in_background(self):
+        try:
+            self.compact()
+        except Exception:
+            logger.exception("Cannot compact the changes of %s", self.filepath)
+
+    def compact(self):
+        """Writes the dataset, with the changes of the log, to the data file and empties the log.
+
+        The data file keeps its format, JSON or snapshot; in a JSON file the artists no
+        change touched keep their values as written. Returns the number of changes
+        compacted.
+        """
+        with self._lock:
+            with self.change_log.lock():
+                self._update()
+                if not self._log_changes:
+                    return 0
+
+                if asn.is_snapshot(self.filepath):
+                    asn.write_snapshot(self.data, self.filepath)
+                else:
+                    # The artists no change touched are written back as they are in the file
+                    changes = self.change_log.read()[0]
+                    with open(self.filepath) as f:
+                        _write_json_file(self.filepath, chl.replay(jst.iter_items(f, 'artists'), changes))
+                self.change_log.clear()
+
+                # The dataset is the content of the new data file, it is not loaded again but
+                # takes its version, the one of a dataset loaded from it
+                compacted, self._log_changes = self._log_changes, 0
+                self._file_signature = self._get_file_signature()
+                self._log_state = (self.change_log.get_signature()[0], 0)
+                dataset = copy.copy(self.data)
+                dataset.version = self._get_version(self._file_signature, 0)
+                self.data = dataset
+                self._last_modified = max(self._last_modified, self._get_timestamp(self._file_signature[1]))
+
+        return compacted
+
+    def _get_gender_code(self, _filters, dataset):
+        return dataset.get_gender_code(_filters['gender'])
+
+    def _estimate_filters(self, _filters, dataset):
+        """Returns the estimated number of rows matching each filter of the query."""
+        estimates = {}
 
-    def _filter_by_gender(self, _filters, artist_list):
         if 'gender' in _filters:
-            artist_list = [artist for artist in artist_list if artist.gender == _filters['gender']]
-
-        return artist_list
-
-    def _compute_global_rank(self, artist, weights_dict):
-        weighted_ranks = []
-
-        for rank in self.ranks:
-            artist_rank = getattr(artist, rank + "_rank")
-            weighted_ranks.append(artist_rank * weights_dict[rank])
-
-        artist.global_rank = sum(weighted_ranks)
-
-    def _order_by_rank(self, weights_dict, artist_list):
-        for artist in artist_list:
-            self._compute_global_rank(artist, weights_dict)
-
-        global_ranks = [artist.global_rank for artist in artist_list]
-        normalized_global_ranks = self._normalize_data(global_ranks)
-
-        for artist, normalized_global_rank in zip(artist_list, normalized_global_ranks):
-            artist.global_rank = normalized_global_rank
-
-        sorted_artists_by_global_rank = sorted(artist_list, key=lambda x: x.global_rank, reverse=True)
+            estimates['gender'] = dataset.gender_index.count(self._get_gender_code(_filters, dataset))
 
-        return sorted_artists_by_global_rank
+        if 'age' in _filters:
+            estimates['age'] = dataset.age_histogram.estimate_range(*self._get_age_range(_filters))
 
-    def list(self, filters=None, weights=None):
-        if filters is not None:
-            _filters = filters
-        else:
-            _filters = {}
+        if 'rate_max' in _filters:
+            estimates['rate_max'] = dataset.rate_histogram.estimate_range(maximum=self._get_rate_max(_filters))
 
-        if weights is not None:
-            _weights = weights
+        if 'location' in _filters:
+            latlon, radius = self._get_location(_filters)
+            estimates['location'] = dataset.location_index.count(latlon[0], latlon[1], radius) * qp.CAP_TO_BOX_RATIO
+
+        return estimates
+
+    def _select_candidates(self, _filters, dataset, driver, start=None, stop=None):
+        """Selects the candidate rows of a query through the index of its driving filter.
+
+        Only the rows in [start, stop) are selected if a range is given.
+        """
+        if driver == 'gender':
+            rows = dataset.gender_index.rows(self._get_gender_code(_filters, dataset))
+        elif driver == 'age':
+            rows = dataset.age_index.rows(*dataset.age_index.range(*self._get_age_range(_filters)))
+        elif driver == 'rate_max':
+            rows = dataset.rate_index.rows(*dataset.rate_index.range(maximum=self._get_rate_max(_filters)))
+        elif driver == 'location':
+            latlon, radius = self._get_location(_filters)
+            rows = dataset.location_index.query(latlon[0], latlon[1], radius)
         else:
-            _weights = {}
-
-        self._normalize_weights(_weights)
-
-        artist_list = [domod.Artist.from_dict(artist) for artist in self.data['artists']]
-        artist_list = self._filter_by_age(_filters, artist_list)
-        artist_list = self._filter_by_distance(_filters, artist_list)
-        artist_list = self._filter_by_rate(_filters, artist_list)
-        artist_list = self._filter_by_gender(_filters, artist_list)
-
-        self._normalize_artist_ranks(artist_list)
-
-        artist_list = self._order_by_rank(_weights, artist_list)
-
-        return artist_list
-
-    def _normalize_weights(self, _weights):
-        for key, value in _weights.items():
-            _weights[key] = float(value)
-
-        for rank in self.ranks:
-            if rank not in _weights:
-                _weights[rank] = 0
-
-        norm = sum(_weights.values())
-        if norm == 0:
-            for rank in self.ranks:
-                _weights[rank] = 1
+            rows = np.arange(len(dataset))
+
+        if start is not None:
+            rows = rows[np.searchsorted(rows, start):np.searchsorted(rows, stop)]
+
+        return ark.ArtistSelection(rows, self.ranks)
+
+    def _filter_by_gender(self, _filters, dataset, selection):
+        if 'gender' not in _filters:
+            return
+
+        gender_code = self._get_gender_code(_filters, dataset)
+        selection.take(dataset.gender_index.bitmap(gender_code)[selection.rows])
+
+    def list(self, filters=None, weights=None, limit=None, offset=None):
+        _filters, _weights = self._get_query_arguments(filters, weights)
+
+        with timing.stage('load'):
+            self.reload_if_changed()
+
+        return self._list_dataset(self.data, _filters, _weights, limit, offset)
+
+    def list_batch(self, queries):
+        """Runs a batch of queries on the same dataset, returning their results in the same order.
+
+        `queries` are dictionaries of list() arguments. Distances from a centre shared by
+        the location filters of several queries are computed once for all of them; each
+        query is otherwise planned and filtered on its own, as by list().
+        """
+        arguments = [
+            self._get_query_arguments(query.get('filters'), query.get('weights')) +
+            (query.get('limit'), query.get('offset'))
+            for query in queries
+        ]
+
+        with timing.stage('load'):
+            self.reload_if_changed()
+        dataset = self.data
+
+        radii = collections.defaultdict(list)
+        for _filters, _weights, limit, offset in arguments:
+            if 'location' in _filters:
+                latlon, radius = self._get_location(_filters)
+                radii[latlon].append(radius)
+
+        shared_radii = dict(
+            (latlon, max(centre_radii)) for latlon, centre_radii in radii.items() if len(centre_radii) > 1
+        )
+        with timing.stage('distances'):
+            shared_distances = CentreDistances(dataset, shared_radii, self._compute_distances)
+
+        return [
+            self._list_dataset(dataset, _filters, _weights, limit, offset, shared_distances)
+            for _filters, _weights, limit, offset in arguments
+        ]
+
+    def _list_dataset(self, dataset, _filters, _weights, limit=None, offset=None, shared_distances=None):
+        latlon = None
+        if shared_distances is not None and 'location' in _filters:
+            latlon, radius = self._get_location(_filters)
+            if latlon not in shared_distances:
+                latlon = None
+
+        with timing.stage('plan'):
+            estimates = self._estimate_filters(_filters, dataset)
+            plan = self.planner.plan(estimates, len(dataset))
+
+        if self.shard_pool is not None and latlon is None:
+            candidates = estimates[plan.driver] if plan.driver is not None else len(dataset)
+            if candidates >= self.shard_min_rows:
+                sharded = self._filter_shards(dataset, _filters, plan)
+                if sharded is not None:
+                    selection, bounds = sharded
+                    return self._rank_artists(_weights, dataset, selection, limit, offset, bounds)
+
+        filters = plan.filters
+        with timing.stage('select'):
+            if plan.driver == 'location' and latlon is not None:
+                # The shared distances select exactly the rows of the location filter
+                rows, distances = shared_distances.within(latlon, radius)
+                selection = ark.ArtistSelection(rows, self.ranks)
+                self._filter_by_distance(_filters, dataset, selection, distances)
+                filters = [name for name in filters if name != 'location']
+            else:
+                selection = self._select_candidates(_filters, dataset, plan.driver)
+
+        for name in filters:
+            with timing.stage('filter_' + name):
+                if name == 'location' and latlon is not None:
+                    distances = shared_distances.get(latlon, selection.rows)
+                    self._filter_by_distance(_filters, dataset, selection, distances)
+                else:
+                    self._filter_functions[name](_filters, dataset, selection)
+
+        return self._rank_artists(_weights, dataset, selection, limit, offset)
+
+    def _filter_shards(self, dataset, _filters, plan):
+        """Runs the filters of a query on the shards of the dataset in the shard processes.
+
+        Returns the merged selection with the bounds of its ranks, or None if the shards
+        could not run on this version of the dataset.
+        """
+        tasks = [
+            (dataset.version, _filters, plan, start, stop)
+            for start, stop in shp.shard_ranges(len(dataset), self.shards)
+        ]
+
+        with timing.stage('shards'):
+            results = self.shard_pool.map(self._get_shard_state, _run_shard, tasks)
+
+        if results is None or None in results:
+            return None
+
+        with timing.stage('merge'):
+            selection = ark.ArtistSelection.concatenate([result[0] for result in results], self.ranks)
+            bounds = self._merge_rank_bounds([result[1] for result in results])
+
+        return selection, bounds
+
+    def _get_shard_state(self):
+        """Returns a copy of the repository for the shard processes, at the current dataset.
+
+        The copy has a lock of its own, not held when the processes are forked. It
+        never writes to the files, it only follows them.
+        """
+        with self._lock:
+            repository = copy.copy(self)
+
+        repository._lock = threading.Lock()
+        repository._compaction = None
+        repository.compact_min_changes = None
+        repository.shards = 1
+        repository.shard_pool = None
+        return repository
+
+    def _filter_shard(self, dataset, version, _filters, plan, start, stop):
+        """Runs the filters of a query on the rows in [start, stop), in a shard process.
+
+        Returns the selection with the bounds of its ranks, or None if the dataset is
+        not at `version`.
+        """
+        if dataset.version != version:
+            return None
+
+        selection = self._select_candidates(_filters, dataset, plan.driver, start, stop)
+        for name in plan.filters:
+            self._filter_functions[name](_filters, dataset, selection)
+
+        return selection, self._get_rank_bounds(selection)
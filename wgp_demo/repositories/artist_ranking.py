@@ -0,0 +1,297 @@
+import numpy as np
+
+from wgp_demo.domain import models as domod
+from wgp_demo.repositories import geo
+from wgp_demo.shared import timing
+
+
+class ArtistSelection(object):
+    """The rows of the dataset selected by a query, along with their ranks.
+
+    Ranks and distances are either arrays aligned with `rows` or a single value
+    shared by every selected artist. A selection belongs to a single query: the
+    dataset it selects from is only read, so that queries can run on it at once.
+    """
+
+    def __init__(self, rows, ranks):
+        self.rows = rows
+        self.ranks = dict((rank, 0) for rank in ranks)
+        self.distance = None
+        self.global_rank = None
+
+    @staticmethod
+    def _take(value, index):
+        if isinstance(value, np.ndarray):
+            return value[index]
+        return value
+
+    def take(self, index):
+        """Keeps the rows selected by a boolean mask, an array of positions or a slice."""
+        self.rows = self.rows[index]
+        self.distance = self._take(self.distance, index)
+        self.global_rank = self._take(self.global_rank, index)
+        for rank, value in self.ranks.items():
+            self.ranks[rank] = self._take(value, index)
+
+    @classmethod
+    def concatenate(cls, selections, ranks):
+        """Returns the selection of the rows of consecutive selections, with their ranks and distances."""
+        selection = cls(np.concatenate([part.rows for part in selections]), ranks)
+        selection.distance = cls._concatenate([part.distance for part in selections])
+        for rank in ranks:
+            selection.ranks[rank] = cls._concatenate([part.ranks[rank] for part in selections])
+
+        return selection
+
+    @staticmethod
+    def _concatenate(values):
+        # Values computed by a filter are arrays in every selection, the others are the same value
+        if isinstance(values[0], np.ndarray):
+            return np.concatenate(values)
+        return values[0]
+
+    def get_values(self, value):
+        """Returns the values of a rank or of the distances for every selected row, as a list."""
+        if isinstance(value, np.ndarray):
+            return value.astype(float).tolist()
+        return [value] * len(self.rows)
+
+
+class ArtistRanking(object):
+    """Filtering and ranking of the artists of an ArtistDataset, shared by the repositories.
+
+    Filters and ranks work on the columns of the dataset for the rows of an
+    ArtistSelection; the class using it must set `ranks`. Neither the dataset nor
+    the arguments of a query are changed, so that a dataset can serve many threads at once.
+    """
+
+    def _get_query_arguments(self, filters, weights):
+        # Copies, the weights are normalized in place
+        if filters is not None:
+            _filters = dict(filters)
+        else:
+            _filters = {}
+
+        if weights is not None:
+            _weights = dict(weights)
+        else:
+            _weights = {}
+
+        self._normalize_weights(_weights)
+
+        return _filters, _weights
+
+    def _compute_distances(self, latitudes, longitudes, latlon):
+        return geo.great_circle_miles(latitudes, longitudes, *latlon)
+
+    def _normalize_data(self, data, bounds=None):
+        """Scales the data between 0 and 1, given its minimum and maximum in `bounds` if already known."""
+        if not isinstance(data, np.ndarray):
+            # The same value is shared by every artist
+            return 1
+
+        if len(data) == 0:
+            return data
+
+        if bounds is not None:
+            min_data, max_data = bounds
+        else:
+            min_data = data.min()
+            max_data = data.max()
+
+        norm = max_data - min_data
+        if norm == 0:
+            return 1
+
+        return (data - min_data) / norm
+
+    def _normalize_artist_ranks(self, selection, bounds=None):
+        for rank in self.ranks:
+            selection.ranks[rank] = self._normalize_data(selection.ranks[rank], (bounds or {}).get(rank))
+
+    def _get_rank_bounds(self, selection):
+        """Returns the minimum and maximum of every rank of the selection, None if not an array or empty."""
+        bounds = {}
+        for rank in self.ranks:
+            data = selection.ranks[rank]
+            if isinstance(data, np.ndarray) and len(data):
+                bounds[rank] = (data.min(), data.max())
+            else:
+                bounds[rank] = None
+
+        return bounds
+
+    def _merge_rank_bounds(self, bounds_list):
+        """Returns the bounds of the ranks of the union of selections, given their own bounds."""
+        bounds = {}
+        for rank in self.ranks:
+            rank_bounds = [rank_bound[rank] for rank_bound in bounds_list if rank_bound[rank] is not None]
+            if rank_bounds:
+                bounds[rank] = (min(low for low, high in rank_bounds), max(high for low, high in rank_bounds))
+            else:
+                bounds[rank] = None
+
+        return bounds
+
+    def _get_age_range(self, _filters):
+        try:
+            age_min_str, age_max_str = _filters['age'].split(',')
+        except ValueError:
+            age_min_str = age_max_str = _filters['age']
+
+        return int(age_min_str), int(age_max_str)
+
+    def _get_rate_max(self, _filters):
+        return float(_filters['rate_max'])
+
+    def _filter_by_age(self, _filters, dataset, selection):
+        if 'age' not in _filters:
+            return
+
+        age_min, age_max = self._get_age_range(_filters)
+        avg_age = age_min + float(age_max - age_min) / 2
+
+        ages = dataset.age[selection.rows]
+        selection.take((ages >= age_min) & (ages <= age_max))
+
+        ages = dataset.age[selection.rows]
+        selection.ranks['age'] = avg_age - np.abs(ages - avg_age)
+
+    def _get_location(self, _filters):
+        latitude, longitude, radius = _filters['location'].split(',')
+
+        return (float(latitude), float(longitude)), float(radius)
+
+    def _filter_by_distance(self, _filters, dataset, selection, distances=None):
+        """Keeps the rows within the radius of the location filter.
+
+        `distances` are the distances of the selected rows, if already known.
+        """
+        if 'location' not in _filters:
+            return
+
+        latlon, radius = self._get_location(_filters)
+
+        if distances is None:
+            distances = self._compute_distances(
+                dataset.latitude[selection.rows], dataset.longitude[selection.rows], latlon
+            )
+        mask = distances < radius
+        selection.take(mask)
+
+        distances = distances[mask]
+        distances[distances == 0] += 10e-5
+        selection.ranks['distance'] = 1 / distances
+        selection.distance = distances
+
+    def _filter_by_rate(self, _filters, dataset, selection):
+        if 'rate_max' not in _filters:
+            return
+
+        rate_max = self._get_rate_max(_filters)
+
+        rates = dataset.rate[selection.rows]
+        mask = rates <= rate_max
+        selection.take(mask)
+
+        selection.ranks['rate'] = np.abs(rate_max - rates[mask])
+
+    def _compute_global_rank(self, selection, weights_dict):
+        global_rank = 0
+
+        for rank in self.ranks:
+            global_rank = global_rank + selection.ranks[rank] * weights_dict[rank]
+
+        selection.global_rank = global_rank
+
+    def _get_page_order(self, global_rank, start, stop):
+        """Returns the positions of the artists in [start, stop) when ordered by descending rank.
+
+        Artists with the same rank keep their file order. When the page does not reach
+        the end of the list only the first `stop` ranks are selected (in linear time)
+        and sorted.
+        """
+        keys = -global_rank
+
+        if stop is None or stop >= len(keys):
+            return np.argsort(keys, kind='stable')[start:stop]
+
+        if stop <= start:
+            return np.array([], dtype=np.intp)
+
+        threshold = np.partition(keys, stop - 1)[stop - 1]
+        before = np.flatnonzero(keys < threshold)
+        tied = np.flatnonzero(keys == threshold)[:stop - len(before)]
+
+        candidates = np.concatenate((before, tied))
+        return candidates[np.argsort(keys[candidates], kind='stable')][start:stop]
+
+    def _order_by_rank(self, weights_dict, selection, limit=None, offset=None):
+        self._compute_global_rank(selection, weights_dict)
+        selection.global_rank = self._normalize_data(selection.global_rank)
+
+        start = offset or 0
+        stop = start + limit if limit is not None else None
+
+        if isinstance(selection.global_rank, np.ndarray):
+            selection.take(self._get_page_order(selection.global_rank, start, stop))
+        else:
+            selection.take(slice(start, stop))
+
+    def _build_artists(self, dataset, selection):
+        """Builds new artists for the selected rows, with the ranks and distances of the query."""
+        artist_list = []
+
+        columns = zip(
+            selection.rows.tolist(),
+            selection.get_values(selection.distance),
+            selection.get_values(selection.ranks['age']),
+            selection.get_values(selection.ranks['distance']),
+            selection.get_values(selection.ranks['rate']),
+            selection.get_values(selection.global_rank)
+        )
+        for row, distance, age_rank, distance_rank, rate_rank, global_rank in columns:
+            artist = dataset.artist(row)
+            artist.distance = distance
+            artist.age_rank = age_rank
+            artist.distance_rank = distance_rank
+            artist.rate_rank = rate_rank
+            artist.global_rank = global_rank
+            artist_list.append(artist)
+
+        return artist_list
+
+    def _normalize_weights(self, _weights):
+        for key, value in _weights.items():
+            _weights[key] = float(value)
+
+        for rank in self.ranks:
+            if rank not in _weights:
+                _weights[rank] = 0
+
+        norm = sum(_weights.values())
+        if norm == 0:
+            for rank in self.ranks:
+                _weights[rank] = 1
+
+    def list_batch(self, queries):
+        """Runs a batch of queries one by one, returning their results in the same order.
+
+        `queries` are dictionaries of list() arguments.
+        """
+        return [self.list(**query) for query in queries]
+
+    def _rank_artists(self, _weights, dataset, selection, limit=None, offset=None, bounds=None):
+        """Ranks the filtered selection and returns the requested page of artists.
+
+        `bounds` are the bounds of the ranks of the selection, if already known.
+        """
+        with timing.stage('normalize'):
+            self._normalize_artist_ranks(selection, bounds)
+
+        total = len(selection.rows)
+        with timing.stage('order'):
+            self._order_by_rank(_weights, selection, limit, offset)
+
+        with timing.stage('build'):
+            return domod.ArtistList(self._build_artists(dataset, selection), total, dataset.version)
@@ -0,0 +1,169 @@
+"""Binary columnar snapshots of the artist dataset.
+
+A snapshot stores every array of an ArtistDataset, columns and indexes, so that
+it can be opened with mmap and used as is: loading costs a few page mappings and
+the pages are shared, through the OS page cache, by every process opening the
+same file.
+
+Layout (little-endian):
+
+* header, HEADER_SIZE bytes: magic, format version, row count and size of the
+  table of contents
+* table of contents: UTF-8 JSON with the gender table and, for every array, its
+  name, dtype, shape and absolute offset in the file
+* arrays, each one starting at an offset multiple of ALIGNMENT. Columns have a
+  fixed width: the uuids are stored as a table of fixed-width byte strings.
+
+The same layout is used to share a dataset in memory (see shared_dataset).
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from wgp_demo.repositories import artist_dataset as ads
+from wgp_demo.repositories import json_stream as jst
+
+MAGIC = b'WGPARTST'
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct('<8sIQQ')
+HEADER_SIZE = 64
+ALIGNMENT = 64
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def is_snapshot(filepath):
+    with open(filepath, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def get_layout(dataset, version=None):
+    """Returns the header and the table of contents of a snapshot of the dataset, with its arrays and size.
+
+    The arrays, by name, are contiguous and little-endian, the entries of the table of
+    contents give their absolute offsets. `version`, if given, is stored in the table
+    of contents.
+    """
+    arrays = dataset.get_arrays()
+
+    entries = []
+    offset = 0
+    for name in sorted(arrays):
+        array = np.ascontiguousarray(arrays[name])
+        arrays[name] = array.astype(array.dtype.newbyteorder('<'), copy=False)
+        entries.append({
+            'name': name,
+            'dtype': arrays[name].dtype.str,
+            'shape': list(array.shape),
+            'offset': offset
+        })
+        offset = _align(offset + array.nbytes)
+
+    contents = {'genders': list(dataset.genders)}
+    if version is not None:
+        contents['version'] = version
+
+    # Offsets depend on the size of the table of contents, which depends on the offsets
+    toc_size = 0
+    while True:
+        data_offset = _align(HEADER_SIZE + toc_size)
+        toc_entries = [dict(entry, offset=entry['offset'] + data_offset) for entry in entries]
+        toc = json.dumps(dict(contents, arrays=toc_entries)).encode('utf-8')
+        if len(toc) <= toc_size:
+            break
+        toc_size = len(toc)
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(dataset), len(toc)).ljust(HEADER_SIZE, b'\0')
+    return header + toc.ljust(toc_size, b' '), toc_entries, arrays, data_offset + offset
+
+
+def write_snapshot(dataset, filepath):
+    """Writes the dataset to a snapshot file.
+
+    The snapshot is written to a temporary file which is then renamed, so a
+    repository watching `filepath` never sees a partially written snapshot.
+    """
+    head, toc_entries, arrays, size = get_layout(dataset)
+
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(head)
+
+            for entry in toc_entries:
+                f.write(b'\0' * (entry['offset'] - f.tell()))
+                f.write(arrays[entry['name']].tobytes())
+
+        getattr(os, 'replace', os.rename)(temp_path, filepath)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+
+def read_buffer(buf, name, version=None):
+    """Returns the ArtistDataset of the snapshot in `buf`, whose arrays are views of the buffer.
+
+    `name` designates the buffer in errors. The version is the one stored in the
+    snapshot unless `version` is given.
+    """
+    if len(buf) < HEADER_SIZE:
+        raise SnapshotError('{} is too short to be an artist snapshot'.format(name))
+
+    magic, format_version, row_count, toc_size = HEADER.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise SnapshotError('{} is not an artist snapshot'.format(name))
+    if format_version != FORMAT_VERSION:
+        raise SnapshotError('Unsupported artist snapshot format version {}'.format(format_version))
+
+    toc = json.loads(bytes(buf[HEADER_SIZE:HEADER_SIZE + toc_size]).decode('utf-8'))
+
+    arrays = {}
+    for entry in toc['arrays']:
+        dtype = np.dtype(entry['dtype'])
+        count = int(np.prod(entry['shape'], dtype=np.int64))
+        if entry['offset'] + count * dtype.itemsize > len(buf):
+            raise SnapshotError('{} is truncated'.format(name))
+
+        array = np.frombuffer(buf, dtype=dtype, count=count, offset=entry['offset'])
+        arrays[entry['name']] = array.reshape(entry['shape'])
+
+    if version is None:
+        version = toc.get('version')
+
+    dataset = ads.ArtistDataset.from_arrays(arrays, toc['genders'], version=version)
+    if len(dataset) != row_count:
+        raise SnapshotError('{} has {} rows instead of {}'.format(name, len(dataset), row_count))
+
+    return dataset
+
+
+def read_snapshot(filepath, version=None):
+    """Opens a snapshot file as an ArtistDataset whose arrays are read-only views of the mapped file."""
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < HEADER_SIZE:
+            raise SnapshotError('{} is too short to be an artist snapshot'.format(filepath))
+
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    return read_buffer(buf, filepath, version)
+
+
+def compile_snapshot(json_filepath, snapshot_filepath):
+    """Compiles an artists JSON file into a snapshot, returning the number of artists."""
+    with open(json_filepath) as f:
+        dataset = ads.ArtistDataset.from_records(jst.iter_items(f, 'artists'))
+
+    write_snapshot(dataset, snapshot_filepath)
+    return len(dataset)
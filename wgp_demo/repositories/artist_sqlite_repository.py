@@ -0,0 +1,260 @@
+import itertools
+import sqlite3
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from wgp_demo.repositories import artist_dataset as ads
+from wgp_demo.repositories import artist_ranking as ark
+from wgp_demo.repositories import geo
+from wgp_demo.shared import timing
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS artists ('
+    ' id INTEGER PRIMARY KEY, uuid TEXT NOT NULL UNIQUE, gender TEXT NOT NULL,'
+    ' age INTEGER NOT NULL, latitude REAL NOT NULL, longitude REAL NOT NULL, rate REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS artists_age ON artists (age)',
+    'CREATE INDEX IF NOT EXISTS artists_rate ON artists (rate)',
+    'CREATE INDEX IF NOT EXISTS artists_gender ON artists (gender)',
+    'CREATE VIRTUAL TABLE IF NOT EXISTS artists_location USING rtree'
+    ' (id, min_latitude, max_latitude, min_longitude, max_longitude)',
+    'CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT NOT NULL)'
+]
+
+SELECT_ARTISTS = 'SELECT uuid, gender, age, latitude, longitude, rate FROM artists'
+
+# Rows inserted by each executemany() call of import_artists()
+INSERT_CHUNK_SIZE = 10000
+
+# The query results are scanned by the ranking, they need no index
+NO_INDEXES = dict.fromkeys(ads.ArtistDataset.INDEXES)
+
+
+def _connect(filepath):
+    # Connections are used by a single thread, but close() may run in any thread
+    connection = sqlite3.connect(filepath, check_same_thread=False)
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+def _create_schema(connection):
+    for statement in SCHEMA:
+        connection.execute(statement)
+
+
+def _set_version(connection):
+    connection.executemany(
+        'INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)',
+        [('version', uuid.uuid4().hex), ('modified', repr(time.time()))]
+    )
+
+
+def import_artists(filepath, records):
+    """Replaces the artists stored in the SQLite database `filepath`, creating it if needed.
+
+    `records` is an iterable of artist dictionaries, inserted in order in a single
+    transaction. Returns the number of artists.
+    """
+    connection = _connect(filepath)
+    count = 0
+
+    try:
+        with connection:
+            _create_schema(connection)
+            connection.execute('DELETE FROM artists')
+            connection.execute('DELETE FROM artists_location')
+
+            records = iter(records)
+            while True:
+                batch = list(itertools.islice(records, INSERT_CHUNK_SIZE))
+                if not batch:
+                    break
+
+                rows = [
+                    (count + index + 1, artist['uuid'], str(artist['gender']), int(artist['age']),
+                     float(artist['latitude']), float(artist['longitude']), float(artist['rate']))
+                    for index, artist in enumerate(batch)
+                ]
+                connection.executemany(
+                    'INSERT INTO artists (id, uuid, gender, age, latitude, longitude, rate)'
+                    ' VALUES (?, ?, ?, ?, ?, ?, ?)', rows
+                )
+                connection.executemany(
+                    'INSERT INTO artists_location VALUES (?, ?, ?, ?, ?)',
+                    ((row[0], row[4], row[4], geo.normalize_longitude(row[5]), geo.normalize_longitude(row[5]))
+                     for row in rows)
+                )
+                count += len(batch)
+
+            _set_version(connection)
+    finally:
+        connection.close()
+
+    return count
+
+
+class ArtistSqliteRepository(ark.ArtistRanking):
+    """A repository storing the artists in a SQLite database.
+
+    Gender, age and rate filters are answered by B-tree indexes, the location filter
+    by an R*Tree of the positions through the bounding boxes of the circle. Only the
+    rows matching in SQL are loaded, to compute exact distances and rank them.
+    Each thread uses its own connection, opened on first use.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.ranks = ['age', 'distance', 'rate']
+
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+        with self._get_connection() as connection:
+            _create_schema(connection)
+
+    def _get_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = _connect(self.filepath)
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+
+        return connection
+
+    def close(self):
+        """Closes the connections of every thread."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+
+        for connection in connections:
+            connection.close()
+
+        self._local = threading.local()
+
+    def _get_metadata(self, key):
+        row = self._get_connection().execute('SELECT value FROM metadata WHERE key = ?', (key,)).fetchone()
+        return row['value'] if row is not None else None
+
+    def get_version(self):
+        return self._get_metadata('version')
+
+    def get_last_modified(self):
+        """Returns the time of the last import, as a timestamp."""
+        modified = self._get_metadata('modified')
+        return float(modified) if modified is not None else None
+
+    def upsert(self, artist, replace=True):
+        """Adds the artist dictionary `artist`, or replaces the artist with its uuid if `replace`.
+
+        Returns True if the artist was added, False if it replaced another one, None if
+        there is one and `replace` is false.
+        """
+        values = (str(artist['gender']), int(artist['age']), float(artist['latitude']), float(artist['longitude']),
+                  float(artist['rate']))
+        latitude, longitude = values[2], geo.normalize_longitude(values[3])
+
+        connection = self._get_connection()
+        with connection:
+            # Taking the write lock first, the artist cannot be added by another connection meanwhile
+            connection.execute('BEGIN IMMEDIATE')
+            row = connection.execute('SELECT id FROM artists WHERE uuid = ?', (artist['uuid'],)).fetchone()
+            if row is not None and not replace:
+                return None
+
+            if row is None:
+                artist_id = connection.execute(
+                    'INSERT INTO artists (uuid, gender, age, latitude, longitude, rate) VALUES (?, ?, ?, ?, ?, ?)',
+                    (artist['uuid'],) + values
+                ).lastrowid
+                connection.execute('INSERT INTO artists_location VALUES (?, ?, ?, ?, ?)',
+                                   (artist_id, latitude, latitude, longitude, longitude))
+            else:
+                connection.execute(
+                    'UPDATE artists SET gender = ?, age = ?, latitude = ?, longitude = ?, rate = ? WHERE id = ?',
+                    values + (row['id'],)
+                )
+                connection.execute(
+                    'UPDATE artists_location SET min_latitude = ?, max_latitude = ?, min_longitude = ?,'
+                    ' max_longitude = ? WHERE id = ?', (latitude, latitude, longitude, longitude, row['id'])
+                )
+
+            _set_version(connection)
+
+        return row is None
+
+    def delete(self, uuid):
+        """Deletes the artist `uuid`, returning False if there is no such artist."""
+        connection = self._get_connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            row = connection.execute('SELECT id FROM artists WHERE uuid = ?', (uuid,)).fetchone()
+            if row is None:
+                return False
+
+            connection.execute('DELETE FROM artists WHERE id = ?', (row['id'],))
+            connection.execute('DELETE FROM artists_location WHERE id = ?', (row['id'],))
+            _set_version(connection)
+
+        return True
+
+    def _get_conditions(self, _filters):
+        """Returns the SQL conditions of the query, along with their parameters."""
+        conditions = []
+        parameters = []
+
+        if 'gender' in _filters:
+            conditions.append('gender = ?')
+            parameters.append(_filters['gender'])
+
+        if 'age' in _filters:
+            conditions.append('age BETWEEN ? AND ?')
+            parameters.extend(self._get_age_range(_filters))
+
+        if 'rate_max' in _filters:
+            conditions.append('rate <= ?')
+            parameters.append(self._get_rate_max(_filters))
+
+        if 'location' in _filters:
+            latlon, radius = self._get_location(_filters)
+            boxes = geo.bounding_boxes(latlon[0], latlon[1], radius)
+            conditions.append('id IN ({})'.format(' UNION ALL '.join(
+                ['SELECT id FROM artists_location WHERE max_latitude >= ? AND min_latitude <= ?'
+                 ' AND max_longitude >= ? AND min_longitude <= ?'] * len(boxes)
+            )))
+            for min_latitude, max_latitude, min_longitude, max_longitude in boxes:
+                parameters.extend([min_latitude, max_latitude, min_longitude, max_longitude])
+
+        return conditions, parameters
+
+    def list(self, filters=None, weights=None, limit=None, offset=None):
+        _filters, _weights = self._get_query_arguments(filters, weights)
+
+        conditions, parameters = self._get_conditions(_filters)
+        query = SELECT_ARTISTS
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY id'
+
+        with timing.stage('query'):
+            connection = self._get_connection()
+            with connection:
+                # The version is read in the transaction reading the artists
+                connection.execute('BEGIN')
+                version = self._get_metadata('version')
+                cursor = connection.execute(query, parameters)
+                dataset = ads.ArtistDataset.from_records(cursor, version=version, indexes=NO_INDEXES)
+
+        # Gender, age and rate conditions are exact, the filters compute their ranks
+        selection = ark.ArtistSelection(np.arange(len(dataset)), self.ranks)
+        with timing.stage('filter_age'):
+            self._filter_by_age(_filters, dataset, selection)
+        with timing.stage('filter_location'):
+            self._filter_by_distance(_filters, dataset, selection)
+        with timing.stage('filter_rate_max'):
+            self._filter_by_rate(_filters, dataset, selection)
+
+        return self._rank_artists(_weights, dataset, selection, limit, offset)
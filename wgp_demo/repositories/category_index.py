@@ -0,0 +1,117 @@
+import numpy as np
+
+
+class CategoryIndex(object):
+    """Partitions the rows by the code of a categorical attribute.
+
+    Every category has a posting list, the sorted array of its rows, and a bitmap,
+    a boolean array over the whole dataset. Posting lists are used to start a query
+    from the rows of a category, bitmaps to check the category of rows already
+    selected by other filters.
+    """
+
+    def __init__(self, codes, categories_number):
+        self.size = len(codes)
+        self.bitmaps = [codes == code for code in range(categories_number)]
+        self.posting_lists = [np.flatnonzero(bitmap) for bitmap in self.bitmaps]
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        index = cls.__new__(cls)
+        index.size = arrays['bitmaps'].shape[1]
+        index.bitmaps = list(arrays['bitmaps'])
+        offsets = arrays['posting_list_offsets']
+        index.posting_lists = [arrays['posting_lists'][start:stop] for start, stop in zip(offsets[:-1], offsets[1:])]
+        return index
+
+    def get_arrays(self):
+        offsets = np.cumsum([0] + [len(posting_list) for posting_list in self.posting_lists])
+
+        return {
+            'bitmaps': np.array(self.bitmaps, dtype=bool).reshape(len(self.bitmaps), self.size),
+            'posting_lists': np.concatenate(self.posting_lists or [np.array([], dtype=np.intp)]).astype(np.intp),
+            'posting_list_offsets': offsets.astype(np.int64)
+        }
+
+    def _copy(self, bitmaps, posting_lists):
+        index = self.__class__.__new__(self.__class__)
+        index.size = len(bitmaps[0]) if bitmaps else self.size
+        index.bitmaps = bitmaps
+        index.posting_lists = posting_lists
+        return index
+
+    def insert(self, row, code):
+        """Returns a copy of the index with the new last row `row` of category `code`."""
+        bitmaps = [np.append(bitmap, index == code) for index, bitmap in enumerate(self.bitmaps)]
+        posting_lists = list(self.posting_lists)
+        posting_lists[code] = np.append(posting_lists[code], row)
+
+        index = self._copy(bitmaps, posting_lists)
+        index.size = self.size + 1
+        return index
+
+    def update(self, row, old_code, code):
+        """Returns a copy of the index where `row` moved from category `old_code` to `code`.
+
+        Only the bitmaps and the posting lists of both categories are copied.
+        """
+        if old_code == code:
+            return self
+
+        bitmaps = list(self.bitmaps)
+        posting_lists = list(self.posting_lists)
+        for category, value in [(old_code, False), (code, True)]:
+            bitmaps[category] = bitmaps[category].copy()
+            bitmaps[category][row] = value
+
+        old_posting_list = posting_lists[old_code]
+        posting_lists[old_code] = np.delete(old_posting_list, np.searchsorted(old_posting_list, row))
+        posting_lists[code] = np.insert(posting_lists[code], np.searchsorted(posting_lists[code], row), row)
+
+        return self._copy(bitmaps, posting_lists)
+
+    def delete(self, row, code):
+        """Returns a copy of the index without `row`, of category `code`, the following rows moving up by one."""
+        bitmaps = [np.delete(bitmap, row) for bitmap in self.bitmaps]
+        posting_lists = []
+        for category, posting_list in enumerate(self.posting_lists):
+            if category == code:
+                posting_list = np.delete(posting_list, np.searchsorted(posting_list, row))
+            posting_lists.append(posting_list - (posting_list > row))
+
+        index = self._copy(bitmaps, posting_lists)
+        index.size = self.size - 1
+        return index
+
+    def add_category(self, code):
+        """Returns a copy of the index with a new empty category `code`, the following codes increasing by one."""
+        bitmaps = list(self.bitmaps)
+        bitmaps.insert(code, np.zeros(self.size, dtype=bool))
+        posting_lists = list(self.posting_lists)
+        posting_lists.insert(code, np.array([], dtype=np.intp))
+
+        return self._copy(bitmaps, posting_lists)
+
+    def remove_category(self, code):
+        """Returns a copy of the index without the empty category `code`, the following codes decreasing by one."""
+        bitmaps = list(self.bitmaps)
+        del bitmaps[code]
+        posting_lists = list(self.posting_lists)
+        del posting_lists[code]
+
+        return self._copy(bitmaps, posting_lists)
+
+    def count(self, code):
+        if code is None:
+            return 0
+        return len(self.posting_lists[code])
+
+    def rows(self, code):
+        if code is None:
+            return np.array([], dtype=np.intp)
+        return self.posting_lists[code]
+
+    def bitmap(self, code):
+        if code is None:
+            return np.zeros(self.size, dtype=bool)
+        return self.bitmaps[code]
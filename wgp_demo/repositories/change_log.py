@@ -0,0 +1,156 @@
+"""An append-only log of the changes made to the artists of a data file.
+
+Every change is a line of JSON, either {"op": "upsert", "artist": {...}} or
+{"op": "delete", "uuid": "..."}, appended with a single write. A reader keeps the
+offset of the end of the last complete line it applied and later reads only what
+follows it. Processes sharing the log serialise their writes, and the compaction
+of the log into the data file, with lock(), an exclusive lock on a file next to it.
+"""
+import contextlib
+import json
+import os
+
+try:
+    import fcntl
+except ImportError:
+    # Without file locks the log can only be written by a single process
+    fcntl = None
+
+UPSERT = 'upsert'
+DELETE = 'delete'
+
+
+def upsert(artist):
+    return {'op': UPSERT, 'artist': artist}
+
+
+def delete(uuid):
+    return {'op': DELETE, 'uuid': uuid}
+
+
+def _get_outcome(operations, present):
+    """Returns where an artist ends after its operations, given whether it was `present` in the data file.
+
+    None if it keeps its row, False if it is deleted, else the index of the change
+    that last added it, its place among the added artists.
+    """
+    place = None
+    for index, op in operations:
+        if op == UPSERT and not present:
+            present, place = True, index
+        elif op == DELETE and present:
+            present, place = False, None
+
+    return place if present else False
+
+
+def replay(records, changes):
+    """Yields the artist dictionaries `records` with the `changes` applied.
+
+    Artists are in the rows ArtistDataset.upsert() and delete() would give them: a
+    replaced artist keeps its place, an added one follows the others.
+    """
+    operations = {}
+    final = {}
+    for index, change in enumerate(changes):
+        if change['op'] == UPSERT:
+            uuid = change['artist']['uuid']
+            final[uuid] = change['artist']
+        else:
+            uuid = change['uuid']
+        operations.setdefault(uuid, []).append((index, change['op']))
+
+    added = []
+    for record in records:
+        uuid = record['uuid']
+        if uuid not in operations:
+            yield record
+            continue
+
+        place = _get_outcome(operations.pop(uuid), True)
+        if place is None:
+            yield final[uuid]
+        elif place is not False:
+            added.append((place, uuid))
+
+    for uuid, uuid_operations in operations.items():
+        place = _get_outcome(uuid_operations, False)
+        if place is not False:
+            added.append((place, uuid))
+
+    for place, uuid in sorted(added):
+        yield final[uuid]
+
+
+class ChangeLog(object):
+    """The change log `filepath`, created by the first change appended to it."""
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+
+    def get_signature(self):
+        """Returns the inode and the size of the log, None if there is no log."""
+        try:
+            stat = os.stat(self.filepath)
+        except OSError:
+            return None
+
+        return stat.st_ino, stat.st_size
+
+    def get_last_modified(self):
+        """Returns the modification time of the log, as a timestamp, None if there is no log."""
+        try:
+            return os.stat(self.filepath).st_mtime
+        except OSError:
+            return None
+
+    @contextlib.contextmanager
+    def lock(self):
+        """Holds the exclusive lock of the log, shared by every process."""
+        if fcntl is None:
+            yield
+            return
+
+        with open(self.filepath + '.lock', 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def read(self, offset=0):
+        """Returns the changes following `offset`, along with the offset of their end.
+
+        A last line being written, without its end of line yet, is left for the next read.
+        """
+        try:
+            with open(self.filepath, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except (IOError, OSError):
+            return [], offset
+
+        end = data.rfind(b'\n') + 1
+        changes = [json.loads(line.decode('utf-8')) for line in data[:end].splitlines() if line.strip()]
+        return changes, offset + end
+
+    def append(self, change):
+        """Appends a change, returning the offset of the end of the log, its inode and its modification time.
+
+        The caller must hold lock().
+        """
+        line = (json.dumps(change, sort_keys=True) + '\n').encode('utf-8')
+        fd = os.open(self.filepath, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+            os.fsync(fd)
+            stat = os.fstat(fd)
+        finally:
+            os.close(fd)
+
+        return stat.st_size, stat.st_ino, stat.st_mtime
+
+    def clear(self):
+        """Empties the log, once its changes are in the data file. The caller must hold lock()."""
+        with open(self.filepath, 'wb') as f:
+            os.fsync(f.fileno())
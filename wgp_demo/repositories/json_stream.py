@@ -0,0 +1,123 @@
+"""Incremental parsing of large JSON documents.
+
+The document is read a chunk at a time and only the value being decoded is kept
+in memory, so a list of millions of records can be consumed one record at a time.
+"""
+import json
+import re
+
+# Number of characters read from the file at a time
+CHUNK_SIZE = 1 << 16
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class _Reader(object):
+    def __init__(self, f, chunk_size):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+
+        # Drop what has already been decoded before growing the buffer
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+
+        self.buffer += chunk
+        return True
+
+    def peek(self):
+        """Skips whitespace and returns the next character, or '' at the end of the file."""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError('Expecting {!r} instead of {!r}'.format(char, found or 'end of file'))
+
+        self.pos += 1
+
+    def skip(self, char):
+        """Consumes the next character if it is `char`, returning whether it was."""
+        if self.peek() != char:
+            return False
+
+        self.pos += 1
+        return True
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                # The value may continue in the next chunk
+                if self._fill():
+                    continue
+                raise
+
+            # Numbers and literals at the end of the buffer may be truncated
+            if end == len(self.buffer) and self._fill():
+                continue
+
+            self.pos = end
+            return value
+
+
+def iter_items(f, key, chunk_size=CHUNK_SIZE):
+    """Yields one by one the items of the list stored under `key` in the JSON object read from `f`.
+
+    Other members of the object are parsed and discarded. ValueError is raised if the
+    document is malformed or has no such list, possibly after some items were yielded.
+    """
+    reader = _Reader(f, chunk_size)
+    found = False
+
+    reader.expect('{')
+    if not reader.skip('}'):
+        while True:
+            if reader.peek() != '"':
+                raise ValueError('Expecting a property name')
+
+            name = reader.value()
+            reader.expect(':')
+
+            if name == key and not found:
+                found = True
+                reader.expect('[')
+                if not reader.skip(']'):
+                    while True:
+                        yield reader.value()
+                        if not reader.skip(','):
+                            break
+                    reader.expect(']')
+            else:
+                reader.value()
+
+            if not reader.skip(','):
+                break
+        reader.expect('}')
+
+    if reader.peek():
+        raise ValueError('Extra data after the JSON document')
+
+    if not found:
+        raise ValueError('The JSON document has no {!r} list'.format(key))
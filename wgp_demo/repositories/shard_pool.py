@@ -0,0 +1,100 @@
+"""A pool of worker processes running a query on contiguous shards of a dataset.
+
+Workers need the dataset they query. Where processes can be forked the pool is
+created by the process holding it, and the workers inherit it: the arrays are
+shared with the parent until either of them writes to them, which the queries
+never do. Elsewhere the workers load the state themselves. The pool is started
+once: the tasks carry what the workers need to check their state is current, and
+the workers bring it up to date themselves, so that a change of the dataset does
+not fork new processes.
+"""
+import multiprocessing
+import threading
+
+# The states of the pools being started, by pool id, inherited by the workers they fork
+_states = {}
+
+# The state of the pool of a worker process
+_worker_state = None
+
+
+def shard_ranges(size, shards):
+    """Splits `size` rows into `shards` contiguous [start, stop) ranges of almost the same length."""
+    return [(size * index // shards, size * (index + 1) // shards) for index in range(shards)]
+
+
+def _get_context():
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+def _init_worker(pool_id, loader, loader_args):
+    global _worker_state
+    state = _states.get(pool_id)
+    if state is None:
+        # Not forked by the process holding the state
+        state = loader(*loader_args)
+    _worker_state = state
+
+
+def _run_task(arguments):
+    function, task = arguments
+    return function(_worker_state, task)
+
+
+class ShardPool(object):
+    """Runs functions of a state on the shards of a dataset, in `processes` worker processes.
+
+    The workers are forked with the state returned by `get_state()` when the pool
+    starts; `loader(*loader_args)` returns the state in the workers that cannot
+    inherit it, e.g. replacing a worker that died.
+    """
+
+    def __init__(self, processes, loader, loader_args=()):
+        self.processes = processes
+        self.loader = loader
+        self.loader_args = loader_args
+
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _get_pool(self, get_state):
+        with self._lock:
+            if self._pool is None:
+                _states[id(self)] = get_state()
+                try:
+                    self._pool = _get_context().Pool(
+                        self.processes, _init_worker, (id(self), self.loader, self.loader_args)
+                    )
+                finally:
+                    # The workers are forked by Pool(), later ones load their state
+                    _states.pop(id(self), None)
+
+            return self._pool
+
+    def map(self, get_state, function, tasks):
+        """Returns the results of `function(state, task)` for every task, computed by the workers.
+
+        If the pool is closed meanwhile the tasks run in the calling process, on the
+        state returned by `get_state()`.
+        """
+        pool = self._get_pool(get_state)
+
+        try:
+            result = pool.map_async(_run_task, [(function, task) for task in tasks], chunksize=1)
+        except ValueError:
+            # The pool is not running anymore
+            state = get_state()
+            return [function(state, task) for task in tasks]
+
+        return result.get()
+
+    def close(self):
+        """Stops the worker processes, started again by the next call to map()."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+
+        if pool is not None:
+            pool.terminate()
+            pool.join()
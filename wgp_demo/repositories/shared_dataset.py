@@ -0,0 +1,90 @@
+"""Artist datasets in shared memory, loaded once and used by many processes.
+
+share() copies every array of a dataset, columns and indexes, into a single
+multiprocessing.shared_memory segment laid out as a snapshot (see artist_snapshot),
+along with the version of the dataset. attach() opens the segment by its name, in
+any process, as a dataset whose arrays are read-only views of it: the data is in
+memory once for the whole host, however many processes use it, and being outside
+of the Python heap its pages are never copied by reference counting or garbage
+collection in a forked process.
+
+The process calling share() owns the segment and removes it with release(), the
+processes attached to it keep their mappings until they exit.
+"""
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python < 3.8
+    shared_memory = None
+    _SharedMemory = object
+else:
+    _SharedMemory = shared_memory.SharedMemory
+
+from wgp_demo.repositories import artist_snapshot as asn
+
+# The segments attached by this process, by name, mapped as long as it runs: the
+# datasets returned by attach() may be used by any thread meanwhile
+_attached = {}
+
+
+class _AttachedSegment(_SharedMemory):
+    # Datasets of the segment may be in use until the process exits, closing it
+    # before they are released would fail: the mapping is released with them
+    def __del__(self):
+        pass
+
+
+def _check_support():
+    if shared_memory is None:
+        raise RuntimeError('Sharing datasets in memory requires Python 3.8 or later')
+
+
+def share(dataset):
+    """Copies the dataset into a new shared memory segment, returned as a SharedMemory object."""
+    _check_support()
+
+    head, toc_entries, arrays, size = asn.get_layout(dataset, dataset.version)
+    segment = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    try:
+        segment.buf[:len(head)] = head
+        for entry in toc_entries:
+            array = arrays[entry['name']]
+            view = np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf, offset=entry['offset'])
+            view[...] = array
+            del view
+    except Exception:
+        release(segment)
+        raise
+
+    return segment
+
+
+def release(segment):
+    """Closes and removes a segment created by share(); the processes attached to it can still use it."""
+    segment.close()
+    segment.unlink()
+
+
+def _open(name):
+    try:
+        # Only the process that created the segment removes it
+        return _AttachedSegment(name=name, track=False)
+    except TypeError:
+        # Python < 3.13, the segment is registered to the resource tracker of the process
+        return _AttachedSegment(name=name)
+
+
+def attach(name):
+    """Returns the dataset shared in the segment `name`, at the version it was shared with.
+
+    Raises FileNotFoundError if there is no such segment.
+    """
+    _check_support()
+
+    segment = _attached.get(name)
+    if segment is None:
+        segment = _attached.setdefault(name, _open(name))
+
+    return asn.read_buffer(segment.buf.toreadonly(), 'shared dataset {}'.format(name))
@@ -0,0 +1,84 @@
+import numpy as np
+
+
+def find_position(order, sorted_values, row, value):
+    """Returns the position of `row`, of the given value, in rows sorted by value and then by row."""
+    start = int(np.searchsorted(sorted_values, value, 'left'))
+    stop = int(np.searchsorted(sorted_values, value, 'right'))
+    return start + int(np.searchsorted(order[start:stop], row))
+
+
+def insert_row(order, sorted_values, row, value):
+    """Returns copies of `order` and `sorted_values` with `row`, of the given value, inserted at its position."""
+    position = find_position(order, sorted_values, row, value)
+    return np.insert(order, position, row), np.insert(sorted_values, position, value)
+
+
+def delete_row(order, sorted_values, row, value, renumber=True):
+    """Returns copies of `order` and `sorted_values` without `row`, of the given value.
+
+    With `renumber` the following rows move up by one, as when the row is deleted
+    from the dataset.
+    """
+    position = find_position(order, sorted_values, row, value)
+    order = np.delete(order, position)
+    if renumber:
+        order[order > row] -= 1
+
+    return order, np.delete(sorted_values, position)
+
+
+class SortedIndex(object):
+    """A sorted permutation of the rows by the value of an attribute.
+
+    The rows whose value lies in a range are a contiguous slice of `order`, found
+    with two binary searches. Rows of equal values are sorted by row, so that the
+    position of a row is found with binary searches too when it changes.
+    """
+
+    def __init__(self, values):
+        self.order = np.argsort(values, kind='stable')
+        self.sorted_values = values[self.order]
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        index = cls.__new__(cls)
+        index.order = arrays['order']
+        index.sorted_values = arrays['sorted_values']
+        return index
+
+    def get_arrays(self):
+        return {'order': self.order, 'sorted_values': self.sorted_values}
+
+    def _copy(self, order, sorted_values):
+        return self.from_arrays({'order': order, 'sorted_values': sorted_values})
+
+    def insert(self, row, value):
+        """Returns a copy of the index with the new last row `row` of the given value."""
+        return self._copy(*insert_row(self.order, self.sorted_values, row, value))
+
+    def update(self, row, old_value, value):
+        """Returns a copy of the index where the value of `row` changed from `old_value`."""
+        if old_value == value:
+            return self
+
+        order, sorted_values = delete_row(self.order, self.sorted_values, row, old_value, renumber=False)
+        return self._copy(*insert_row(order, sorted_values, row, value))
+
+    def delete(self, row, value):
+        """Returns a copy of the index without `row`, of the given value, the following rows moving up by one."""
+        return self._copy(*delete_row(self.order, self.sorted_values, row, value))
+
+    def __len__(self):
+        return len(self.order)
+
+    def range(self, minimum=None, maximum=None):
+        """Returns the (start, stop) slice of `order` of the rows with minimum <= value <= maximum."""
+        start = 0 if minimum is None else int(np.searchsorted(self.sorted_values, minimum, 'left'))
+        stop = len(self) if maximum is None else int(np.searchsorted(self.sorted_values, maximum, 'right'))
+
+        return start, max(start, stop)
+
+    def rows(self, start, stop):
+        """Returns the rows of a slice of `order`, sorted by row."""
+        return np.sort(self.order[start:stop])
@@ -0,0 +1,137 @@
+import math
+
+import numpy as np
+
+from wgp_demo.repositories import geo
+from wgp_demo.repositories import sorted_index as soi
+
+
+class GridIndex(object):
+    """A latitude/longitude grid bucket index.
+
+    Rows are sorted by the id of the grid cell that contains them, so the rows of
+    consecutive cells of a latitude band are a contiguous slice of `order` that can
+    be found with a binary search. A radius query visits only the cells covering the
+    bounding box of the spherical cap around the query point.
+    """
+
+    def __init__(self, latitudes, longitudes, cell_size=0.25):
+        self._set_cell_size(cell_size)
+
+        cells = self._get_lat_cell(latitudes) * self.lon_cells + self._get_lon_cell(longitudes)
+        self.order = np.argsort(cells, kind='stable')
+        self.sorted_cells = cells[self.order]
+
+    def _set_cell_size(self, cell_size):
+        self.cell_size = float(cell_size)
+        self.lat_cells = int(math.ceil(180 / self.cell_size))
+        self.lon_cells = int(math.ceil(360 / self.cell_size))
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        index = cls.__new__(cls)
+        index._set_cell_size(arrays['cell_size'][0])
+        index.order = arrays['order']
+        index.sorted_cells = arrays['sorted_cells']
+        return index
+
+    def get_arrays(self):
+        return {
+            'cell_size': np.array([self.cell_size]),
+            'order': self.order,
+            'sorted_cells': self.sorted_cells
+        }
+
+    def _get_cell(self, latitude, longitude):
+        return int(self._get_lat_cell(latitude)) * self.lon_cells + int(self._get_lon_cell(longitude))
+
+    def _copy(self, order, sorted_cells):
+        return self.from_arrays(dict(self.get_arrays(), order=order, sorted_cells=sorted_cells))
+
+    def insert(self, row, latitude, longitude):
+        """Returns a copy of the index with the new last row `row` at the given position."""
+        return self._copy(*soi.insert_row(self.order, self.sorted_cells, row, self._get_cell(latitude, longitude)))
+
+    def update(self, row, old_latitude, old_longitude, latitude, longitude):
+        """Returns a copy of the index where `row` moved from (old_latitude, old_longitude)."""
+        old_cell = self._get_cell(old_latitude, old_longitude)
+        cell = self._get_cell(latitude, longitude)
+        if old_cell == cell:
+            return self
+
+        order, sorted_cells = soi.delete_row(self.order, self.sorted_cells, row, old_cell, renumber=False)
+        return self._copy(*soi.insert_row(order, sorted_cells, row, cell))
+
+    def delete(self, row, latitude, longitude):
+        """Returns a copy of the index without `row`, at the given position, the following rows moving up by one."""
+        return self._copy(*soi.delete_row(self.order, self.sorted_cells, row, self._get_cell(latitude, longitude)))
+
+    def _get_lat_cell(self, latitudes):
+        cells = np.floor((np.asarray(latitudes, dtype=np.float64) + 90) / self.cell_size).astype(np.int64)
+        return np.clip(cells, 0, self.lat_cells - 1)
+
+    def _get_lon_cell(self, longitudes):
+        cells = np.floor(np.mod(np.asarray(longitudes, dtype=np.float64) + 180, 360) / self.cell_size).astype(np.int64)
+        return np.clip(cells, 0, self.lon_cells - 1)
+
+    def _get_lon_cell_ranges(self, latitude, longitude, angular_radius):
+        """Returns the ranges of longitude cells covered by the cap, as (first, last) pairs."""
+        full_range = [(0, self.lon_cells - 1)]
+
+        lat_radius = math.degrees(angular_radius)
+        if abs(latitude) + lat_radius >= 90:
+            # The cap contains a pole
+            return full_range
+
+        sin_half_width = math.sin(angular_radius) / math.cos(math.radians(latitude))
+        if sin_half_width >= 1:
+            return full_range
+
+        half_width = math.degrees(math.asin(sin_half_width)) + geo.BOUNDING_MARGIN
+        if 2 * half_width >= 360 - self.cell_size:
+            return full_range
+
+        first = int(self._get_lon_cell(longitude - half_width))
+        last = int(self._get_lon_cell(longitude + half_width))
+        if first <= last:
+            return [(first, last)]
+
+        # The box crosses the antimeridian
+        return [(first, self.lon_cells - 1), (0, last)]
+
+    def _get_slices(self, latitude, longitude, radius):
+        """Returns the (start, stop) slices of `order` covering the bounding box of the cap."""
+        angular_radius = radius * geo.KM_PER_MILE / geo.EARTH_RADIUS_KM
+        if angular_radius >= math.pi:
+            return [(0, len(self.order))]
+
+        lat_radius = math.degrees(angular_radius) + geo.BOUNDING_MARGIN
+        first_lat_cell = int(self._get_lat_cell(latitude - lat_radius))
+        last_lat_cell = int(self._get_lat_cell(latitude + lat_radius))
+        lon_cell_ranges = self._get_lon_cell_ranges(latitude, longitude, angular_radius)
+
+        slices = []
+        for lat_cell in range(first_lat_cell, last_lat_cell + 1):
+            for first_lon_cell, last_lon_cell in lon_cell_ranges:
+                start = np.searchsorted(self.sorted_cells, lat_cell * self.lon_cells + first_lon_cell, 'left')
+                stop = np.searchsorted(self.sorted_cells, lat_cell * self.lon_cells + last_lon_cell, 'right')
+                if stop > start:
+                    slices.append((int(start), int(stop)))
+
+        return slices
+
+    def count(self, latitude, longitude, radius):
+        """Returns the number of rows query() would return, without collecting them."""
+        return sum(stop - start for start, stop in self._get_slices(latitude, longitude, radius))
+
+    def query(self, latitude, longitude, radius):
+        """Returns the sorted rows that may be within `radius` miles from the given point.
+
+        The result is a superset of the rows within the radius, exact distances must
+        still be checked by the caller.
+        """
+        slices = self._get_slices(latitude, longitude, radius)
+        if not slices:
+            return np.array([], dtype=self.order.dtype)
+
+        return np.sort(np.concatenate([self.order[start:stop] for start, stop in slices]))
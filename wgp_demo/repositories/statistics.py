@@ -0,0 +1,76 @@
+import numpy as np
+
+
+class Histogram(object):
+    """An equi-width histogram of a numeric attribute, used to estimate range selectivity.
+
+    Values are assumed to be uniformly spread inside every bin. The values of a
+    discrete attribute are taken as unit wide intervals centred on each integer.
+    """
+
+    def __init__(self, values, bins=64, discrete=False):
+        self.size = len(values)
+        self.discrete = discrete
+
+        if self.size == 0:
+            self.counts, self.edges = np.zeros(0, dtype=np.int64), np.zeros(1)
+        elif discrete:
+            value_range = (values.min() - 0.5, values.max() + 0.5)
+            self.counts, self.edges = np.histogram(values, bins=min(bins, int(np.ptp(values)) + 1), range=value_range)
+        else:
+            self.counts, self.edges = np.histogram(values, bins=bins)
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        histogram = cls.__new__(cls)
+        histogram.discrete = bool(arrays['discrete'][0])
+        histogram.counts = arrays['counts']
+        histogram.edges = arrays['edges']
+        histogram.size = int(histogram.counts.sum())
+        return histogram
+
+    def get_arrays(self):
+        return {'counts': self.counts, 'edges': self.edges, 'discrete': np.array([self.discrete])}
+
+    def _add(self, value, count):
+        counts = self.counts.copy()
+        bin_index = min(max(int(np.searchsorted(self.edges, value, 'right')) - 1, 0), len(counts) - 1)
+        counts[bin_index] = max(counts[bin_index] + count, 0)
+
+        return self.from_arrays({'counts': counts, 'edges': self.edges, 'discrete': np.array([self.discrete])})
+
+    def add(self, value):
+        """Returns a copy of the histogram counting one more `value`, in the nearest bin if out of its range.
+
+        The bins are not changed: estimates drift as values are added and removed,
+        until the histogram is built again with the dataset.
+        """
+        if len(self.counts) == 0:
+            return Histogram(np.array([value]), discrete=self.discrete)
+
+        return self._add(value, 1)
+
+    def remove(self, value):
+        """Returns a copy of the histogram counting one `value` less."""
+        if len(self.counts) == 0:
+            return self
+
+        return self._add(value, -1)
+
+    def estimate_range(self, minimum=None, maximum=None):
+        """Estimates the number of values with minimum <= value <= maximum."""
+        if self.size == 0:
+            return 0.0
+
+        if self.discrete:
+            minimum = None if minimum is None else minimum - 0.5
+            maximum = None if maximum is None else maximum + 0.5
+
+        lower = self.edges[:-1]
+        upper = self.edges[1:]
+        start = lower if minimum is None else np.maximum(lower, minimum)
+        stop = upper if maximum is None else np.minimum(upper, maximum)
+
+        covered = np.clip(stop - start, 0, None) / (upper - lower)
+
+        return float(np.sum(self.counts * covered))
@@ -1,10 +1,8 @@
-import os
-
-from flask import Blueprint, request, current_app
+from flask import Blueprint, Response, request, current_app, jsonify
 
 from wgp_demo.shared import http_response as hres
+from wgp_demo.shared import response_object as res
 
-from wgp_demo.repositories import artist_json_repository as ajr
 from wgp_demo.serializers import artist_serializer as asr
 from wgp_demo.use_cases import artist_use_cases as auc
 from wgp_demo.use_cases import request_object as ro
@@ -13,23 +11,189 @@ from wgp_demo.use_cases import request_object as ro
 blueprint = Blueprint('artist', __name__)
 
 
-@blueprint.route('/artists', methods=['GET'])
-def artists():
+def get_list_parameters(args):
+    """Returns the parameters of an artist list request given the arguments of its query string."""
     qrystr_params = {
         'filters': {},
         'weights': {}
     }
 
-    for arg, values in request.args.items():
+    for arg, values in args.items():
         if arg.startswith('filter_'):
             qrystr_params['filters'][arg.replace('filter_', '')] = values
         elif arg.startswith('weight_'):
             qrystr_params['weights'][arg.replace('weight_', '')] = values
+        elif arg in ('limit', 'offset', 'fields'):
+            qrystr_params[arg] = values
+
+    return qrystr_params
+
+
+def get_validators(artist_repo, request_object, version=None):
+    """Returns the ETag and the Last-Modified timestamp of the response to a valid artist list request.
+
+    The ETag depends on the version of the dataset, the current one unless given, the
+    canonical query and the fields, so that it changes whenever the response could.
+    Both are None if the repository has no version.
+    """
+    if version is None:
+        version = artist_repo.get_version()
+    if version is None:
+        return None, None
+
+    etag = hres.make_etag(version, request_object.cache_key(), request_object.fields)
+    return etag, artist_repo.get_last_modified()
+
+
+def system_error_response(exc):
+    """Builds the JSON response of an unexpected error, the one of a use case failing with `exc`."""
+    return hres.HttpResponse(
+        res.ResponseFailure.build_system_error("{}: {}".format(exc.__class__.__name__, "{}".format(exc)))
+    ).json()
+
+
+def get_result_validators(artist_repo, request_object, response_object, etag, last_modified):
+    """Returns the validators of the response to an artist list request once its result is known.
+
+    A write may have changed the dataset since `etag` was computed: the validators are
+    then the ones of the version the artists were listed from.
+    """
+    version = getattr(response_object.value, 'version', None) if response_object else None
+    if version is None or etag is None or etag == hres.make_etag(version, request_object.cache_key(),
+                                                                    request_object.fields):
+        return etag, last_modified
+
+    return get_validators(artist_repo, request_object, version)
+
+
+def get_cached_gzip_response(app, etag, accept_encoding):
+    """Returns the compressed response cached for the ETag of an artist list request, None if there is none.
+
+    None too if the client does not accept gzip or compression is disabled.
+    """
+    if app.config['GZIP_MIN_SIZE'] is None or not hres.accepts_gzip(accept_encoding):
+        return None
+
+    return hres.cached_gzip_response(app.gzip_cache, etag)
+
+
+def compress_response(app, response, etag, accept_encoding):
+    """Compresses an artist list response as configured, caching the compressed body by ETag."""
+    if app.config['GZIP_MIN_SIZE'] is None:
+        return response
+
+    return hres.compress(
+        response,
+        accept_encoding,
+        min_size=app.config['GZIP_MIN_SIZE'],
+        level=app.config['GZIP_LEVEL'],
+        cache=app.gzip_cache,
+        cache_key=etag
+    )
+
+
+@blueprint.route('/artists', methods=['GET'])
+def artists():
+    request_object = ro.ArtistListRequestObject.from_dict(get_list_parameters(request.args))
+    serializer = asr.ArtistSerializer(getattr(request_object, 'fields', None))
+
+    etag = last_modified = None
+    if request_object:
+        # Clients holding the current response get a 304 before the query runs
+        try:
+            etag, last_modified = get_validators(current_app.artist_repo, request_object)
+        except Exception as exc:
+            return system_error_response(exc)
+        if hres.is_not_modified(etag, last_modified, request.headers.get('If-None-Match'),
+                                request.headers.get('If-Modified-Since')):
+            return hres.not_modified(etag, last_modified)
+
+        # Hot queries are sent as they were compressed, without running them
+        response = get_cached_gzip_response(current_app, etag, request.headers.get('Accept-Encoding'))
+        if response is not None:
+            return response
+
+    use_case = auc.ArtistListUseCase(current_app.artist_repo, current_app.artist_list_cache)
+    response_object = use_case.execute(request_object)
+    etag, last_modified = get_result_validators(current_app.artist_repo, request_object, response_object, etag,
+                                                last_modified)
+    response = hres.HttpResponse(response_object).json(
+        asr.ArtistEncoder,
+        stream_min_items=current_app.config['JSON_STREAMING_MIN_ITEMS'],
+        items_encoder=serializer.encode_items,
+        etag=etag,
+        last_modified=last_modified
+    )
+
+    return compress_response(current_app, response, etag, request.headers.get('Accept-Encoding'))
+
+
+def _get_batch_query(query):
+    """Converts the filter and weight values of a batch query to strings, as in a query string."""
+    if not isinstance(query, dict):
+        return query
+
+    query = dict(query)
+    for name in ['filters', 'weights']:
+        if isinstance(query.get(name, None), dict):
+            query[name] = dict((key, str(value)) for key, value in query[name].items())
+
+    return query
+
+
+@blueprint.route('/artists/batch', methods=['POST'])
+def artists_batch():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        payload = {}
+
+    queries = payload.get('queries', None)
+    if isinstance(queries, list):
+        queries = [_get_batch_query(query) for query in queries]
+
+    request_object = ro.ArtistBatchRequestObject.from_dict({'queries': queries})
+
+    use_case = auc.ArtistBatchUseCase(current_app.artist_repo, current_app.artist_list_cache)
+    response_object = use_case.execute(request_object)
+    if response_object:
+        response_object = res.ResponseSuccess(asr.batch_results(
+            response_object.value, [query.fields for query in request_object.requests]
+        ))
+
+    return hres.HttpResponse(response_object).json(asr.ArtistEncoder)
+
+
+@blueprint.route('/artists/<artist_uuid>', methods=['POST', 'PUT'])
+def artist_write(artist_uuid):
+    """Adds an artist with PUT or POST, or replaces it with PUT, answering with the artist written."""
+    request_object = ro.ArtistWriteRequestObject.from_dict({
+        'uuid': artist_uuid,
+        'artist': request.get_json(silent=True)
+    })
+
+    use_case = auc.ArtistWriteUseCase(current_app.artist_repo, replace=request.method == 'PUT')
+    response_object = use_case.execute(request_object)
+
+    status = 200
+    if response_object:
+        status = 201 if response_object.value.created else 200
+        response_object = res.ResponseSuccess(response_object.value.artist)
+
+    return hres.HttpResponse(response_object).json(asr.ArtistEncoder, status=status)
+
+
+@blueprint.route('/artists/<artist_uuid>', methods=['DELETE'])
+def artist_delete(artist_uuid):
+    request_object = ro.ArtistDeleteRequestObject.from_dict({'uuid': artist_uuid})
 
-    request_object = ro.ArtistListRequestObject.from_dict(qrystr_params)
+    use_case = auc.ArtistDeleteUseCase(current_app.artist_repo)
+    response_object = use_case.execute(request_object)
+    if response_object:
+        return Response(status=204)
 
-    repo = ajr.ArtistJsonRepository(current_app.config['JSON_DATA_FILE'])
-    use_case = auc.ArtistListUseCase(repo)
-    return hres.HttpResponse(use_case.execute(request_object)).json(asr.ArtistEncoder)
+    return hres.HttpResponse(response_object).json()
 
 
+@blueprint.route('/artists/cache', methods=['GET'])
+def artists_cache():
+    return jsonify(current_app.artist_list_cache.stats())
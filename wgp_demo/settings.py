@@ -10,6 +10,46 @@ class Config(object):
     PROJECT_ROOT = os.path.abspath(os.path.join(APP_DIR, os.pardir))
     JSON_DATA_FILE = os.path.join(os.path.abspath(os.path.dirname(__file__)), '../artists.json')
 
+    # SQLite database created by `manage.py import_sqlite`. When set, artists are served from it
+    # instead of JSON_DATA_FILE.
+    SQLITE_DATA_FILE = None
+
+    # Processes running the filters of the queries on shards of the JSON dataset, 0 for one per CPU
+    # and 1 to run them in the request process. Queries whose driving filter selects fewer
+    # candidates than ARTIST_LIST_SHARD_MIN_ROWS always run in the request process.
+    ARTIST_LIST_SHARDS = 1
+    ARTIST_LIST_SHARD_MIN_ROWS = 200000
+
+    # Log of the changes made to the artists of the JSON data file through /artists/<uuid>, by
+    # default the data file followed by .changes. Once it holds ARTIST_CHANGE_LOG_COMPACT_SIZE
+    # changes it is compacted into the data file in the background, None disables compaction.
+    ARTIST_CHANGE_LOG_FILE = None
+    ARTIST_CHANGE_LOG_COMPACT_SIZE = 1000
+
+    # Results of /artists queries, 0 disables the cache. The TTL is in seconds, None means no expiration.
+    ARTIST_LIST_CACHE_SIZE = 512
+    ARTIST_LIST_CACHE_TTL = None
+
+    # /artists responses with at least this number of artists are streamed, None disables streaming
+    JSON_STREAMING_MIN_ITEMS = 500
+
+    # /artists responses of at least GZIP_MIN_SIZE bytes, and streamed ones, are sent gzip encoded
+    # to the clients accepting it, None disables compression. The compressed bodies of the last
+    # GZIP_CACHE_SIZE queries are kept to be sent again without running them, 0 disables the cache.
+    GZIP_MIN_SIZE = 1024
+    GZIP_LEVEL = 6
+    GZIP_CACHE_SIZE = 64
+
+    # Queries run at the same time by the ASGI application (wgp_demo/asgi.py), in as many threads;
+    # further requests wait for one of them to finish.
+    ASGI_MAX_CONCURRENT_QUERIES = 4
+
+    # Durations of the stages of each request, sent in a Server-Timing header and/or logged
+    # by the wgp_demo.shared.timing logger (INFO level). Streamed bodies are encoded after
+    # the headers are sent, so their serialisation time is only logged.
+    SERVER_TIMING_HEADER = False
+    TIMING_LOG = False
+
 
 class ProdConfig(Config):
     """Production configuration."""
@@ -0,0 +1,96 @@
+import collections
+import threading
+import time
+
+
+class LRUCache(object):
+    """A thread-safe, bounded, least recently used cache with an optional time to live.
+
+    The cache is bound to a version of the data its values were computed from:
+    setting a different version drops every entry. Hits, misses, evictions,
+    expirations and invalidations are counted to help sizing it.
+    """
+
+    def __init__(self, maxsize, ttl=None, timer=time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = None
+
+        self._timer = timer
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def set_version(self, version):
+        with self._lock:
+            if version == self.version:
+                return
+
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self.version = version
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, expires_at = self._entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+
+            if expires_at is not None and expires_at <= self._timer():
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries[key] = (value, expires_at)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, version=None):
+        """Stores `value` under `key`.
+
+        With a `version`, the version of the data the value was computed from, the value
+        is stored only if the cache is at that version: a value computed from data
+        changed meanwhile is dropped.
+        """
+        if self.maxsize <= 0:
+            return
+
+        expires_at = self._timer() + self.ttl if self.ttl else None
+
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+
+            self._entries.pop(key, None)
+            self._entries[key] = (value, expires_at)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
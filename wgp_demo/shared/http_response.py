@@ -1,31 +1,235 @@
+import hashlib
 import json
+import zlib
 from flask import Response
+from werkzeug import http
 
 from wgp_demo.shared import response_object as res
+from wgp_demo.shared import timing
 
 
 class HttpResponse(object):
     STATUS_CODES = {
         res.ResponseFailure.RESOURCE_ERROR: 404,
         res.ResponseFailure.PARAMETERS_ERROR: 400,
-        res.ResponseFailure.SYSTEM_ERROR: 500
+        res.ResponseFailure.SYSTEM_ERROR: 500,
+        res.ResponseFailure.CONFLICT_ERROR: 409
     }
 
+    TOTAL_COUNT_HEADER = 'X-Total-Count'
+
+    SERVER_TIMING_HEADER = 'Server-Timing'
+
+    STREAM_CHUNK_SIZE = 100
+
     def __init__(self, response_object):
         self._response_object = response_object
 
-    def json(self, encoder=None):
+    def json(self, encoder=None, stream_min_items=None, items_encoder=None, etag=None, last_modified=None,
+             status=200):
+        """Builds a JSON Flask response.
+
+        Successful responses whose value is a list of at least `stream_min_items` items
+        are streamed: the JSON array is encoded and sent in chunks of STREAM_CHUNK_SIZE
+        items, producing the same bytes json.dumps() would.
+
+        `items_encoder`, if given, is used instead of `encoder` for the items of
+        successful list responses: a function returning the JSON encodings of a list of
+        items.
+
+        Successful responses have the given `status` and carry the validators given,
+        a weak `etag` and the `last_modified` timestamp, for conditional requests.
+        """
         if self._response_object:
-            return Response(json.dumps(self._get_successful_response_value(), cls=encoder),
+            value = self._get_successful_response_value()
+
+            if stream_min_items is not None and isinstance(value, list) and len(value) >= stream_min_items:
+                # The body is encoded after the headers are sent, out of the request stages
+                body = timing.iter_stage('serialize', self._iter_json_list(value, encoder, items_encoder))
+            else:
+                with timing.stage('serialize'):
+                    if items_encoder is not None and isinstance(value, list):
+                        body = '[' + ', '.join(items_encoder(value)) + ']'
+                    else:
+                        body = json.dumps(value, cls=encoder)
+
+            headers = self._get_successful_response_headers()
+            headers.update(validator_headers(etag, last_modified))
+
+            return Response(body,
                             mimetype='application/json',
-                            status=200)
+                            headers=headers,
+                            status=status)
         else:
             return Response(json.dumps(self._get_failure_response_value(), cls=encoder),
                             mimetype='application/json',
                             status=self.STATUS_CODES[self._response_object.type])
 
+    def _iter_json_list(self, values, encoder=None, items_encoder=None):
+        if items_encoder is not None:
+            for start in range(0, len(values), self.STREAM_CHUNK_SIZE):
+                chunk = ', '.join(items_encoder(values[start:start + self.STREAM_CHUNK_SIZE]))
+                yield ('[' if start == 0 else ', ') + chunk
+            yield ']' if values else '[]'
+            return
+
+        json_encoder = (encoder or json.JSONEncoder)()
+
+        chunk = ['[']
+        for index, value in enumerate(values):
+            if index > 0:
+                chunk.append(', ')
+            chunk.append(json_encoder.encode(value))
+
+            if len(chunk) >= 2 * self.STREAM_CHUNK_SIZE:
+                yield ''.join(chunk)
+                chunk = []
+
+        chunk.append(']')
+        yield ''.join(chunk)
+
     def _get_failure_response_value(self):
         return self._response_object.value
 
     def _get_successful_response_value(self):
         return self._response_object.value
+
+    def _get_successful_response_headers(self):
+        headers = {}
+
+        total = getattr(self._response_object.value, 'total', None)
+        if total is not None:
+            headers[self.TOTAL_COUNT_HEADER] = str(total)
+
+        return headers
+
+
+def make_etag(*parts):
+    """Returns an entity tag identifying a representation given the values it depends on."""
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def is_not_modified(etag, last_modified, if_none_match=None, if_modified_since=None):
+    """Tells if the client already holds the representation, given its conditional request headers.
+
+    If-None-Match, compared with weak comparison, is used when sent, If-Modified-Since
+    otherwise. `last_modified` is a timestamp, both validators may be None.
+    """
+    if if_none_match is not None:
+        return etag is not None and http.parse_etags(if_none_match).contains_weak(etag)
+
+    if if_modified_since is not None and last_modified is not None:
+        since = http.parse_date(if_modified_since)
+        # HTTP dates have a resolution of one second
+        return since is not None and int(last_modified) <= since.timestamp()
+
+    return False
+
+
+def validator_headers(etag, last_modified):
+    """Returns the headers sending a weak `etag` and the `last_modified` timestamp."""
+    headers = {}
+
+    if etag is not None:
+        headers['ETag'] = http.quote_etag(etag, weak=True)
+    if last_modified is not None:
+        headers['Last-Modified'] = http.http_date(int(last_modified))
+    if headers:
+        # Responses with validators are revalidated by the clients before being reused
+        headers['Cache-Control'] = 'no-cache'
+
+    return headers
+
+
+def not_modified(etag=None, last_modified=None):
+    """Builds the empty 304 Flask response telling the client to reuse its representation."""
+    response = Response(status=304, headers=validator_headers(etag, last_modified))
+    # There is no body to describe
+    del response.headers['Content-Type']
+    return response
+
+
+def accepts_gzip(accept_encoding):
+    """Tells if an Accept-Encoding header value accepts gzip encoded responses."""
+    return accept_encoding is not None and http.parse_accept_header(accept_encoding).quality('gzip') > 0
+
+
+def _gzip_compressor(level):
+    # A window of 16 + 15 bits writes gzip headers
+    return zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+def _get_cached_headers(response):
+    return [(name, value) for name, value in response.headers.items() if name != 'Content-Length']
+
+
+def _iter_gzip(chunks, level, store=None):
+    timings = timing.current()
+    compressor = _gzip_compressor(level)
+    parts = []
+
+    for chunk in chunks:
+        if not isinstance(chunk, bytes):
+            chunk = chunk.encode('utf-8')
+        with timings.stage('compress'):
+            part = compressor.compress(chunk)
+        if part:
+            parts.append(part)
+            yield part
+
+    with timings.stage('compress'):
+        part = compressor.flush()
+    parts.append(part)
+    yield part
+
+    if store is not None:
+        store(b''.join(parts))
+
+
+def compress(response, accept_encoding, min_size=0, level=6, cache=None, cache_key=None):
+    """Compresses the body of a successful Flask response with gzip if the client accepts it.
+
+    Bodies shorter than `min_size` bytes are left as they are, streamed bodies are
+    compressed while they are sent. With a `cache` the compressed body is kept under
+    `cache_key`, along with the headers, to be sent again by cached_gzip_response().
+    """
+    if response.status_code != 200 or 'Content-Encoding' in response.headers:
+        return response
+
+    if not response.is_streamed and response.content_length < min_size:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if not accepts_gzip(accept_encoding):
+        return response
+
+    response.headers['Content-Encoding'] = 'gzip'
+    store = None
+    if cache is not None and cache_key is not None:
+        headers = _get_cached_headers(response)
+
+        def store(body):
+            cache.set(cache_key, (body, headers))
+
+    if response.is_streamed:
+        response.headers.pop('Content-Length', None)
+        response.response = _iter_gzip(response.response, level, store)
+    else:
+        with timing.stage('compress'):
+            compressor = _gzip_compressor(level)
+            body = compressor.compress(response.get_data()) + compressor.flush()
+        response.set_data(body)
+        if store is not None:
+            store(body)
+
+    return response
+
+
+def cached_gzip_response(cache, cache_key):
+    """Builds the Flask response of a body compressed by compress() under `cache_key`, None if not cached."""
+    cached = cache.get(cache_key) if cache is not None and cache_key is not None else None
+    if cached is None:
+        return None
+
+    body, headers = cached
+    return Response(body, headers=headers, status=200)
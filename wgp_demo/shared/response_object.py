@@ -12,6 +12,7 @@ class ResponseFailure(object):
     RESOURCE_ERROR = 'ResourceError'
     PARAMETERS_ERROR = 'ParametersError'
     SYSTEM_ERROR = 'SystemError'
+    CONFLICT_ERROR = 'ConflictError'
 
     def __init__(self, type_, message):
         self.type = type_
@@ -39,6 +40,10 @@ class ResponseFailure(object):
     def build_system_error(cls, message=None):
         return cls(cls.SYSTEM_ERROR, message)
 
+    @classmethod
+    def build_conflict_error(cls, message=None):
+        return cls(cls.CONFLICT_ERROR, message)
+
     @classmethod
     def build_parameters_error(cls, message=None):
         return cls(cls.PARAMETERS_ERROR, message)
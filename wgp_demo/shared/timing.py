@@ -0,0 +1,144 @@
+"""Timing of the stages of a request.
+
+Code that wants to be measured wraps its stages with `timing.stage(name)`. Times
+are collected only between start() and stop(), called by the application around
+each request: otherwise stage() returns a shared no-op context manager, so that
+disabled timings cost a thread-local lookup per stage.
+"""
+import collections
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_timer = getattr(time, 'perf_counter', time.time)
+
+
+class _Stage(object):
+    __slots__ = ('_timings', '_name', '_start')
+
+    def __init__(self, timings, name):
+        self._timings = timings
+        self._name = name
+
+    def __enter__(self):
+        self._start = _timer()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._timings.add(self._name, _timer() - self._start)
+
+
+class _NullStage(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+class Timings(object):
+    """The durations, in seconds, of the stages of a request, in the order they started.
+
+    A stage entered more than once accumulates its durations.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.durations = collections.OrderedDict()
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def add(self, name, duration):
+        self.durations[name] = self.durations.get(name, 0) + duration
+
+    def server_timing(self):
+        """Returns the value of a Server-Timing header, with durations in milliseconds."""
+        return ', '.join('{};dur={:.3f}'.format(name, duration * 1000) for name, duration in self.durations.items())
+
+
+class NullTimings(object):
+    """Timings that do not record anything."""
+
+    enabled = False
+    durations = {}
+
+    _stage = _NullStage()
+
+    def stage(self, name):
+        return self._stage
+
+    def add(self, name, duration):
+        pass
+
+    def server_timing(self):
+        return ''
+
+
+NULL_TIMINGS = NullTimings()
+
+
+class _Local(threading.local):
+    # A class attribute, so that threads that never started timings find it without a lookup error
+    timings = NULL_TIMINGS
+
+
+_local = _Local()
+
+
+def start():
+    """Starts collecting the timings of the current thread, returning them."""
+    _local.timings = Timings()
+    return _local.timings
+
+
+def stop():
+    """Stops collecting the timings of the current thread, returning them."""
+    timings = _local.timings
+    _local.timings = NULL_TIMINGS
+    return timings
+
+
+def current():
+    return _local.timings
+
+
+def stage(name):
+    """Returns a context manager measuring the stage `name` in the timings of the current thread."""
+    return _local.timings.stage(name)
+
+
+def iter_stage(name, iterable, timings=None):
+    """Returns an iterator over `iterable` measuring the time taken to produce its items as the stage `name`.
+
+    The time is added to `timings`, by default the timings of the current thread when
+    iter_stage() is called, even if the items are consumed later or by another thread.
+    """
+    if timings is None:
+        timings = current()
+
+    if not timings.enabled:
+        return iter(iterable)
+
+    return _iter_stage(name, iter(iterable), timings)
+
+
+def _iter_stage(name, iterator, timings):
+    while True:
+        with timings.stage(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+
+        yield item
+
+
+def log_timings(description, timings):
+    """A timing callback that logs the timings of a request."""
+    logger.info('%s %s', description, timings.server_timing())
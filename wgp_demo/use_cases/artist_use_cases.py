@@ -1,14 +1,117 @@
+import collections
+
+from wgp_demo.domain import models as domod
 from wgp_demo.shared import response_object as ro
+from wgp_demo.shared import timing
 from wgp_demo.shared import use_case as uc
 
 
 class ArtistListUseCase(uc.UseCase):
-    def __init__(self, artist_repo):
+    def __init__(self, artist_repo, cache=None):
         self.artist_repo = artist_repo
+        self.cache = cache
+
+    def _list_artists(self, request_object):
+        with timing.stage('repository'):
+            return self.artist_repo.list(
+                filters=request_object.filters,
+                weights=request_object.weights,
+                limit=request_object.limit,
+                offset=request_object.offset
+            )
 
     def process_request(self, request_object):
-        domain_artists = self.artist_repo.list(
-            filters=request_object.filters,
-            weights=request_object.weights
-        )
+        if self.cache is None:
+            return ro.ResponseSuccess(self._list_artists(request_object))
+
+        with timing.stage('cache'):
+            self.cache.set_version(self.artist_repo.get_version())
+
+            cache_key = request_object.cache_key()
+            domain_artists = self.cache.get(cache_key)
+
+        if domain_artists is None:
+            domain_artists = self._list_artists(request_object)
+            # Not cached if the dataset changed while the artists were listed
+            self.cache.set(cache_key, domain_artists, getattr(domain_artists, 'version', None))
+
         return ro.ResponseSuccess(domain_artists)
+
+
+class ArtistBatchUseCase(uc.UseCase):
+    """Answers a batch of artist list requests, with one result per request in the same order.
+
+    Cached results are reused and the others are requested from the repository in one
+    call, identical requests only once.
+    """
+
+    def __init__(self, artist_repo, cache=None):
+        self.artist_repo = artist_repo
+        self.cache = cache
+
+    def process_request(self, request_object):
+        requests = request_object.requests
+        results = [None] * len(requests)
+
+        if self.cache is not None:
+            with timing.stage('cache'):
+                self.cache.set_version(self.artist_repo.get_version())
+                for index, request in enumerate(requests):
+                    results[index] = self.cache.get(request.cache_key())
+
+        missing = collections.OrderedDict()
+        for index, request in enumerate(requests):
+            if results[index] is None:
+                missing.setdefault(request.cache_key(), []).append(index)
+
+        if missing:
+            queries = [requests[indexes[0]] for indexes in missing.values()]
+            with timing.stage('repository'):
+                artist_lists = self.artist_repo.list_batch([
+                    {'filters': request.filters, 'weights': request.weights,
+                     'limit': request.limit, 'offset': request.offset}
+                    for request in queries
+                ])
+
+            for (cache_key, indexes), artist_list in zip(missing.items(), artist_lists):
+                if self.cache is not None:
+                    self.cache.set(cache_key, artist_list, getattr(artist_list, 'version', None))
+                for index in indexes:
+                    results[index] = artist_list
+
+        return ro.ResponseSuccess(results)
+
+
+# The artist written by ArtistWriteUseCase, and whether it was added
+ArtistWrite = collections.namedtuple('ArtistWrite', ['artist', 'created'])
+
+
+class ArtistWriteUseCase(uc.UseCase):
+    """Adds an artist, or replaces the artist with its uuid.
+
+    Without `replace` an existing artist is left as it is and the request fails with
+    a conflict.
+    """
+
+    def __init__(self, artist_repo, replace=True):
+        self.artist_repo = artist_repo
+        self.replace = replace
+
+    def process_request(self, request_object):
+        artist = request_object.artist
+        created = self.artist_repo.upsert(artist, replace=self.replace)
+        if created is None:
+            return ro.ResponseFailure.build_conflict_error('Artist {} already exists'.format(artist['uuid']))
+
+        return ro.ResponseSuccess(ArtistWrite(domod.Artist.from_dict(artist), created))
+
+
+class ArtistDeleteUseCase(uc.UseCase):
+    def __init__(self, artist_repo):
+        self.artist_repo = artist_repo
+
+    def process_request(self, request_object):
+        if not self.artist_repo.delete(request_object.uuid):
+            return ro.ResponseFailure.build_resource_error('Artist {} not found'.format(request_object.uuid))
+
+        return ro.ResponseSuccess(None)
@@ -1,14 +1,210 @@
+import math
+import uuid as uuidlib
+
+from wgp_demo.domain import models as domod
 from wgp_demo.shared import request_object as plro
 
 
 class ArtistListRequestObject(plro.ValidRequestObject):
-    def __init__(self, filters=None, weights=None):
+    def __init__(self, filters=None, weights=None, limit=None, offset=None, fields=None):
         self.filters = filters
         self.weights = weights
+        self.limit = limit
+        self.offset = offset
+        self.fields = fields
 
     @classmethod
     def from_dict(cls, adict):
+        invalid_req = plro.InvalidRequestObject()
+
+        pagination = {}
+        for parameter in ['limit', 'offset']:
+            if adict.get(parameter, None) is None:
+                continue
+
+            try:
+                pagination[parameter] = int(adict[parameter])
+            except (TypeError, ValueError):
+                pagination[parameter] = -1
+
+            if pagination[parameter] < 0:
+                invalid_req.add_error(parameter, 'Is not a non-negative integer')
+
+        fields = None
+        if adict.get('fields', None) is not None:
+            fields = [field.strip() for field in str(adict['fields']).split(',') if field.strip()]
+            unknown_fields = [field for field in fields if field not in domod.Artist.__slots__]
+            if not fields:
+                invalid_req.add_error('fields', 'Is empty')
+            elif unknown_fields:
+                invalid_req.add_error('fields', 'Has unknown fields: {}'.format(', '.join(unknown_fields)))
+
+        if invalid_req.has_errors():
+            return invalid_req
+
         return ArtistListRequestObject(
             filters=adict.get('filters', None),
-            weights=adict.get('weights', None)
+            weights=adict.get('weights', None),
+            limit=pagination.get('limit', None),
+            offset=pagination.get('offset', None),
+            fields=fields
         )
+
+    @staticmethod
+    def _canonicalize_weight(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return str(value).strip()
+
+    def cache_key(self):
+        """Returns a hashable key identifying the results of the request.
+
+        Equivalent requests share the same key: parameters are sorted, weights are
+        compared as numbers and zero weights, which do not change the ranking, are
+        left out. The fields only select what is serialized, they are left out too.
+        """
+        filters = tuple(sorted(
+            (str(name), str(value)) for name, value in (self.filters or {}).items()
+        ))
+        weights = tuple(sorted(
+            (str(name), self._canonicalize_weight(value)) for name, value in (self.weights or {}).items()
+            if self._canonicalize_weight(value) != 0
+        ))
+
+        return filters, weights, self.limit, self.offset or 0
+
+
+class ArtistBatchRequestObject(plro.ValidRequestObject):
+    """A batch of artist list requests, answered by a single response."""
+
+    MAX_QUERIES = 100
+
+    def __init__(self, requests):
+        self.requests = requests
+
+    @classmethod
+    def from_dict(cls, adict):
+        invalid_req = plro.InvalidRequestObject()
+
+        queries = adict.get('queries', None)
+        if not isinstance(queries, list):
+            invalid_req.add_error('queries', 'Is not a list')
+            return invalid_req
+
+        if len(queries) > cls.MAX_QUERIES:
+            invalid_req.add_error('queries', 'Has more than {} queries'.format(cls.MAX_QUERIES))
+            return invalid_req
+
+        requests = []
+        for index, query in enumerate(queries):
+            parameter = 'queries.{}'.format(index)
+            if not isinstance(query, dict):
+                invalid_req.add_error(parameter, 'Is not an object')
+                continue
+
+            for name in ['filters', 'weights']:
+                if query.get(name, None) is not None and not isinstance(query[name], dict):
+                    invalid_req.add_error('{}.{}'.format(parameter, name), 'Is not an object')
+
+            request = ArtistListRequestObject.from_dict(query)
+            if not request:
+                for error in request.errors:
+                    invalid_req.add_error('{}.{}'.format(parameter, error['parameter']), error['message'])
+                continue
+
+            requests.append(request)
+
+        if invalid_req.has_errors():
+            return invalid_req
+
+        return ArtistBatchRequestObject(requests)
+
+
+def _get_uuid(value, invalid_req):
+    """Returns the canonical form of a UUID string, None after adding an error if it is not one."""
+    try:
+        return str(uuidlib.UUID(value))
+    except (AttributeError, TypeError, ValueError):
+        invalid_req.add_error('uuid', 'Is not a valid UUID')
+        return None
+
+
+def _get_number(artist, name, minimum, maximum, invalid_req, message):
+    """Returns an attribute of an artist as a float between minimum and maximum, None after adding an error."""
+    value = artist.get(name, None)
+    try:
+        number = float(value) if not isinstance(value, bool) else None
+    except (TypeError, ValueError):
+        number = None
+
+    if number is None or math.isnan(number) or not minimum <= number <= maximum:
+        invalid_req.add_error(name, message)
+        return None
+
+    return number
+
+
+class ArtistWriteRequestObject(plro.ValidRequestObject):
+    """An artist to add or to replace, as the dictionary of its attributes in canonical form."""
+
+    def __init__(self, artist):
+        self.artist = artist
+
+    @classmethod
+    def from_dict(cls, adict):
+        invalid_req = plro.InvalidRequestObject()
+
+        uuid = _get_uuid(adict.get('uuid', None), invalid_req)
+
+        artist = adict.get('artist', None)
+        if not isinstance(artist, dict):
+            invalid_req.add_error('artist', 'Is not an object')
+            return invalid_req
+
+        if uuid is not None and artist.get('uuid', None) is not None:
+            if _get_uuid(artist['uuid'], plro.InvalidRequestObject()) != uuid:
+                invalid_req.add_error('uuid', 'Does not match the uuid of the artist')
+
+        gender = artist.get('gender', None)
+        if not isinstance(gender, str) or not gender.strip():
+            invalid_req.add_error('gender', 'Is not a non-empty string')
+
+        age = artist.get('age', None)
+        try:
+            age = int(age) if not isinstance(age, (bool, float)) else -1
+        except (TypeError, ValueError):
+            age = -1
+        if age < 0:
+            invalid_req.add_error('age', 'Is not a non-negative integer')
+
+        latitude = _get_number(artist, 'latitude', -90, 90, invalid_req, 'Is not a latitude')
+        longitude = _get_number(artist, 'longitude', -180, 180, invalid_req, 'Is not a longitude')
+        rate = _get_number(artist, 'rate', 0, float('inf'), invalid_req, 'Is not a non-negative number')
+
+        if invalid_req.has_errors():
+            return invalid_req
+
+        return ArtistWriteRequestObject({
+            'uuid': uuid,
+            'gender': gender.strip(),
+            'age': age,
+            'latitude': latitude,
+            'longitude': longitude,
+            'rate': rate
+        })
+
+
+class ArtistDeleteRequestObject(plro.ValidRequestObject):
+    def __init__(self, uuid):
+        self.uuid = uuid
+
+    @classmethod
+    def from_dict(cls, adict):
+        invalid_req = plro.InvalidRequestObject()
+
+        uuid = _get_uuid(adict.get('uuid', None), invalid_req)
+        if invalid_req.has_errors():
+            return invalid_req
+
+        return ArtistDeleteRequestObject(uuid)
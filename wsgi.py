@@ -0,0 +1,7 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""The WSGI application, to be run by a WSGI server, e.g. `gunicorn wsgi:application` (see gunicorn.conf.py)."""
+
+from wgp_demo.app import create_and_initialize_app
+
+application = create_and_initialize_app()